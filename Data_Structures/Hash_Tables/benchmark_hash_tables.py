@@ -0,0 +1,805 @@
+"""
+Benchmarks for the Hash Tables
+
+Run from the repository root with:
+    python -m Data_Structures.Hash_Tables.benchmark_hash_tables [benchmark names]
+
+Without arguments every benchmark is run.
+
+Benchmarks:
+- `probe_lengths`: average and maximum probe length of every probing strategy at 0.5, 0.75 and 0.9 load.
+- `resize_latency`: slowest single set() with a stop-the-world resize and with an incremental resize.
+- `memory_per_entry`: bytes per entry and iteration time of separate chaining and the compact layout.
+- `concurrent_throughput`: operations per second of a single lock and of lock striping against thread count.
+- `typed_keys`: set and get time of int, tuple and bytes keys with and without typed mode.
+- `lookup_latency`: latency percentiles of hits and misses with linear probing and cuckoo hashing.
+- `group_probing`: full key comparisons and time per miss of linear probing and SwissTable style group probing.
+- `mmap_reopen`: time to rebuild a HashTableLinearProbe against reopening a memory-mapped table.
+- `cache_hit_rates`: hit rates of the LRU and LFU caches on Zipfian, scan-mixed and shifting traces.
+- `snapshot_vs_pickle`: save and load time and file size of dump()/load() against pickle.
+- `bloom_misses`: time per lookup of miss-heavy workloads with and without a Bloom filter front-end.
+- `stats_overhead`: set and get time with instrumentation disabled and enabled, and the recorded stats.
+- `shared_memory_throughput`: aggregate lookups per second of a shared memory table against process count.
+- `distinct_counting`: error, memory and time of HyperLogLog against counting the keys of a hash table.
+- `heavy_hitters`: top-k recall, overestimate, memory and time of Count-Min sketches against exact counts.
+- `perfect_hash`: build time, memory, lookup time and file size of a minimal perfect hash against linear probing.
+- `int_counters`: time and bytes per entry of counting int64 ids with linear probing and IntHashMap.
+- `frequency_counting`: time to count tokens with set(get() + 1) and with FrequencyCounter, and of most_common.
+"""
+
+import contextlib
+import io
+import multiprocessing
+import os
+import pickle
+import random
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+from .hash_table_compact_chaining import HashTableCompactChaining
+from .hash_table_concurrent import ConcurrentHashTable
+from .hash_table_cuckoo import HashTableCuckoo
+from .hash_table_mmap import HashTableMmap
+from .hash_table_open_adressing import HashTableLinearProbe
+from .hash_table_perfect import HashTablePerfect
+from .hash_table_separate_chaining import HashTableSeparateChaining
+from .frequency_counter import FrequencyCounter
+from .hash_table_shared_memory import HashTableSharedMemory
+from .hyperloglog import HyperLogLog
+from .lfu_cache import LFUCache
+from .lru_cache import LRUCache
+
+
+def _random_keys(n, seed=0):
+    """
+    Returns n distinct random session id like string keys
+    """
+    rng = random.Random(seed)
+    keys = set()
+    while len(keys) < n:
+        keys.add(f"session-{rng.getrandbits(64):016x}")
+    return list(keys)
+
+
+def _miss_probe_length(table, key):
+    """
+    Returns the number of slots inspected by an unsuccessful lookup of key
+    """
+    hash, step = table._hash_and_step(key)
+    x = 0
+    while True:
+        i = table._probe(hash, x, step)
+        if table.keys[i] is None:
+            return x + 1
+        if table.robin_hood and table.distances[i] < x:
+            return x + 1
+        x += 1
+
+
+def probe_lengths(size=2**13, loads=(0.5, 0.75, 0.9)):
+    """
+    Fills tables of every probing strategy up to each load factor (without resizing)
+    and reports the average number of slots inspected by successful and unsuccessful
+    lookups and the longest probe sequence.
+    """
+    strategies = [
+        ("linear", {"probing": "linear"}),
+        ("robin hood", {"probing": "linear", "robin_hood": True}),
+        ("quadratic", {"probing": "quadratic"}),
+        ("double", {"probing": "double"}),
+    ]
+    keys = _random_keys(int(size * max(loads)))
+    misses = _random_keys(2000, seed=1)
+    print(f"{'strategy':<12}{'load':>6}{'hit avg':>10}{'miss avg':>10}{'max':>6}")
+    for load in loads:
+        n = int(size * load)
+        for name, options in strategies:
+            table = HashTableLinearProbe(size, max_capacity=0.95, **options)
+            for key in keys[:n]:
+                table.set(key, 1)
+            lengths = table.probe_length_histogram()
+            hit_avg = sum((x + 1) * c for x, c in lengths.items()) / n
+            miss_avg = sum(_miss_probe_length(table, key) for key in misses) / len(
+                misses
+            )
+            print(
+                f"{name:<12}{load:>6}{hit_avg:>10.2f}{miss_avg:>10.2f}{max(lengths) + 1:>6}"
+            )
+
+
+def resize_latency(n=200_000):
+    """
+    Inserts n keys and reports the slowest single set() and the total time.
+    A stop-the-world resize re-inserts every entry inside one set(), an
+    incremental resize spreads that work over the following operations.
+    """
+    keys = _random_keys(n)
+    print(f"{'resize':<14}{'growth':>7}{'max set (ms)':>14}{'total (s)':>11}")
+    for incremental in (False, True):
+        for growth_factor in (2, 10):
+            table = HashTableLinearProbe(
+                8, growth_factor=growth_factor, incremental_resize=incremental
+            )
+            slowest = 0
+            start = time.perf_counter()
+            for key in keys:
+                t = time.perf_counter()
+                table.set(key, 1)
+                slowest = max(slowest, time.perf_counter() - t)
+            total = time.perf_counter() - start
+            name = "incremental" if incremental else "stop-the-world"
+            print(f"{name:<14}{growth_factor:>7}{slowest * 1000:>14.2f}{total:>11.2f}")
+
+
+def memory_per_entry(n=100_000):
+    """
+    Reports the memory allocated per entry (excluding the key and value objects,
+    which are shared) and the time of one keys() + values() pass.
+    """
+    keys = list(range(n))
+    print(f"{'table':<20}{'bytes/entry':>12}{'iterate (ms)':>14}")
+    for name, table_class in (
+        ("separate chaining", HashTableSeparateChaining),
+        ("compact chaining", HashTableCompactChaining),
+    ):
+        tracemalloc.start()
+        # growth prints a line per resize
+        with contextlib.redirect_stdout(io.StringIO()):
+            table = table_class(8)
+            for key in keys:
+                table.set(key, key)
+        allocated = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        start = time.perf_counter()
+        table.keys()
+        table.values()
+        elapsed = time.perf_counter() - start
+        print(f"{name:<20}{allocated / n:>12.1f}{elapsed * 1000:>14.2f}")
+
+
+def concurrent_throughput(ops_per_thread=50_000, thread_counts=(1, 2, 4, 8)):
+    """
+    Every thread runs a mix of 80% get and 20% set on its own keys.
+    A table with a single segment is the single global lock baseline.
+    Threads only run in parallel on a free-threaded CPython build.
+    """
+    gil_enabled = getattr(sys, "_is_gil_enabled", lambda: True)()
+    print(f"GIL enabled: {gil_enabled}")
+    print(f"{'segments':<10}{'threads':>8}{'ops/s':>12}")
+    for segments in (1, 16):
+        for threads in thread_counts:
+            table = ConcurrentHashTable(1024, segments=segments)
+            key_sets = [
+                [(t, i) for i in range(1000)] for t in range(threads)
+            ]
+            for keys in key_sets:
+                for key in keys:
+                    table.set(key, 0)
+
+            def worker(keys):
+                rng = random.Random(len(keys))
+                for n in range(ops_per_thread):
+                    key = keys[rng.randrange(len(keys))]
+                    if n % 5 == 0:
+                        table.set(key, n)
+                    else:
+                        table.get(key)
+
+            workers = [
+                threading.Thread(target=worker, args=(keys,)) for keys in key_sets
+            ]
+            start = time.perf_counter()
+            for thread in workers:
+                thread.start()
+            for thread in workers:
+                thread.join()
+            elapsed = time.perf_counter() - start
+            print(f"{segments:<10}{threads:>8}{threads * ops_per_thread / elapsed:>12.0f}")
+
+
+def typed_keys(n=100_000):
+    """
+    Inserts n keys of each type and looks every key up again, once with keys
+    and values converted to strings (the default) and once in typed mode.
+    """
+    rng = random.Random(0)
+    key_sets = {
+        "int": [rng.getrandbits(62) for _ in range(n)],
+        "tuple": [(rng.getrandbits(30), rng.getrandbits(30)) for _ in range(n)],
+        "bytes": [rng.getrandbits(64).to_bytes(8, "little") for _ in range(n)],
+    }
+    print(f"{'keys':<8}{'mode':<8}{'set (s)':>9}{'get (s)':>9}")
+    for name, keys in key_sets.items():
+        for typed in (False, True):
+            # growth prints a line per resize
+            with contextlib.redirect_stdout(io.StringIO()):
+                table = HashTableLinearProbe(8, typed=typed)
+                start = time.perf_counter()
+                for key in keys:
+                    table.set(key, key)
+                set_time = time.perf_counter() - start
+            # untyped tables only find the string form of the key
+            lookups = keys if typed else [str(key) for key in keys]
+            start = time.perf_counter()
+            for key in lookups:
+                table.get(key)
+            get_time = time.perf_counter() - start
+            mode = "typed" if typed else "str"
+            print(f"{name:<8}{mode:<8}{set_time:>9.2f}{get_time:>9.2f}")
+
+
+class _CountingKey(str):
+    """
+    String key that counts how often it is compared with ==
+    """
+
+    comparisons = 0
+
+    def __eq__(self, other):
+        _CountingKey.comparisons += 1
+        return str.__eq__(self, other)
+
+    __hash__ = str.__hash__
+
+
+def group_probing(size=2**14, loads=(0.5, 0.75, 0.85)):
+    """
+    Fills tables to each load factor and reports the number of full key comparisons
+    and the time per unsuccessful lookup. Untyped linear probing compares the key of
+    every slot it passes, typed linear probing compares cached hashes first and the
+    SwissTable compares 16 control bytes at once.
+    """
+    # imported here so that the other benchmarks run without numpy
+    from .hash_table_swiss import HashTableSwiss
+
+    keys = [_CountingKey(key) for key in _random_keys(int(size * max(loads)))]
+    misses = [_CountingKey(key) for key in _random_keys(5000, seed=1)]
+    print(f"{'table':<14}{'load':>6}{'== per miss':>13}{'us per miss':>13}")
+    for load in loads:
+        n = int(size * load)
+        tables = [
+            ("linear", HashTableLinearProbe(size, max_capacity=0.95)),
+            ("linear typed", HashTableLinearProbe(size, max_capacity=0.95, typed=True)),
+            ("swiss", HashTableSwiss(size, max_capacity=0.95)),
+        ]
+        for name, table in tables:
+            for key in keys[:n]:
+                table.set(key, 1)
+            _CountingKey.comparisons = 0
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                for key in misses:
+                    table.get(key)
+            elapsed = time.perf_counter() - start
+            comparisons = _CountingKey.comparisons / len(misses)
+            print(f"{name:<14}{load:>6}{comparisons:>13.2f}{elapsed / len(misses) * 1e6:>13.2f}")
+
+
+def _percentiles(samples, points=(50, 99, 99.9, 100)):
+    """
+    Returns the given percentiles of a list of samples
+    """
+    samples = sorted(samples)
+    return [samples[min(int(len(samples) * p / 100), len(samples) - 1)] for p in points]
+
+
+def lookup_latency(n=100_000, lookups=50_000):
+    """
+    Times every single get() of hits and misses and reports the latency distribution
+    in microseconds. Linear probing runs close to its maximum capacity, where probe
+    sequences are long, cuckoo hashing inspects a bounded number of slots at any load.
+    """
+    keys = _random_keys(n)
+    misses = _random_keys(lookups, seed=1)
+    rng = random.Random(2)
+    hits = [keys[rng.randrange(n)] for _ in range(lookups)]
+    tables = [
+        ("linear 0.74", HashTableLinearProbe(int(n / 0.74), max_capacity=0.95, typed=True)),
+        ("cuckoo 2-way", HashTableCuckoo(int(n / 0.45) + 1, ways=2, seed=0)),
+        ("cuckoo 3-way", HashTableCuckoo(int(n / 0.85) + 1, ways=3, max_capacity=0.9, seed=0)),
+    ]
+    print(f"{'table':<14}{'lookup':<7}{'p50':>7}{'p99':>7}{'p99.9':>7}{'max':>8}")
+    for name, table in tables:
+        for key in keys:
+            table.set(key, 1)
+        for kind, sample in (("hit", hits), ("miss", misses)):
+            latencies = []
+            # misses print a line each
+            with contextlib.redirect_stdout(io.StringIO()):
+                for key in sample:
+                    t = time.perf_counter()
+                    table.get(key)
+                    latencies.append((time.perf_counter() - t) * 1e6)
+            p50, p99, p999, slowest = _percentiles(latencies)
+            print(f"{name:<14}{kind:<7}{p50:>7.2f}{p99:>7.2f}{p999:>7.2f}{slowest:>8.2f}")
+
+
+def mmap_reopen(n=200_000, lookups=10_000):
+    """
+    Builds a table of n entries in memory and in a memory-mapped file, then
+    reports the time a new process would need before its first lookup:
+    rebuilding the in-memory table against reopening the file.
+    """
+    keys = [i.to_bytes(8, "little") for i in range(n)]
+    values = [b"value-%d" % i for i in range(n)]
+    path = os.path.join(tempfile.mkdtemp(), "table.htmm")
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        table = HashTableLinearProbe(int(n / 0.75) + 1, typed=True)
+        table.set_many(zip(keys, values))
+        rebuild_time = time.perf_counter() - start
+        start = time.perf_counter()
+        with HashTableMmap(path, key_size=8, size=int(n / 0.75) + 1) as mapped:
+            for key, value in zip(keys, values):
+                mapped.set(key, value)
+        create_time = time.perf_counter() - start
+    start = time.perf_counter()
+    mapped = HashTableMmap(path, read_only=True)
+    open_time = time.perf_counter() - start
+    rng = random.Random(0)
+    sample = [keys[rng.randrange(n)] for _ in range(lookups)]
+    start = time.perf_counter()
+    for key in sample:
+        mapped.get(key)
+    lookup_time = time.perf_counter() - start
+    mapped.close()
+    os.remove(path)
+    print(f"in-memory rebuild (s): {rebuild_time:.3f}")
+    print(f"mmap create (s):       {create_time:.3f}")
+    print(f"mmap reopen (ms):      {open_time * 1000:.3f}")
+    print(f"mmap get (us):         {lookup_time / lookups * 1e6:.2f}")
+
+
+def _zipf_trace(n, keys, s=1.0, seed=0, offset=0):
+    """
+    Returns n keys drawn from range(offset, offset + keys) with Zipf's law:
+    the key of rank r is drawn with probability proportional to 1 / r^s
+    """
+    rng = random.Random(seed)
+    weights = [1 / (rank**s) for rank in range(1, keys + 1)]
+    population = list(range(offset, offset + keys))
+    # ranks are shuffled so that popular keys are not small integers
+    rng.shuffle(population)
+    return rng.choices(population, weights=weights, k=n)
+
+
+def _scan_mixed_trace(n, keys, scan_every=5000, scan_length=2000, seed=0):
+    """
+    Returns a Zipfian trace interrupted every scan_every requests by a scan
+    of scan_length keys that are requested once and never again
+    """
+    trace = []
+    zipf = _zipf_trace(n, keys, seed=seed)
+    next_scan_key = keys
+    for i, key in enumerate(zipf):
+        trace.append(key)
+        if i % scan_every == scan_every - 1:
+            trace.extend(range(next_scan_key, next_scan_key + scan_length))
+            next_scan_key += scan_length
+    return trace
+
+
+def _hit_rate(cache, trace):
+    """
+    Replays a trace through a cache, filling it on every miss, and returns the hit rate
+    """
+    for key in trace:
+        if cache.get(key) is None:
+            cache.put(key, True)
+    return cache.stats()["hit_rate"]
+
+
+def cache_hit_rates(n=100_000, keys=10_000, capacities=(100, 1000)):
+    """
+    Replays request traces through LRU and LFU caches of several capacities
+    and reports their hit rates. The shifting trace changes its popular keys
+    half way through, which only an LFU with aging adapts to.
+    """
+    traces = {
+        "zipf": _zipf_trace(n, keys),
+        "scan-mixed": _scan_mixed_trace(n, keys),
+        "shifting": _zipf_trace(n // 2, keys) + _zipf_trace(n // 2, keys, seed=1, offset=keys),
+    }
+    print(f"{'trace':<12}{'capacity':>9}{'LRU':>8}{'LFU':>8}{'LFU aging':>11}")
+    for name, trace in traces.items():
+        for capacity in capacities:
+            lru = _hit_rate(LRUCache(max_entries=capacity), trace)
+            lfu = _hit_rate(LFUCache(capacity), trace)
+            aging = _hit_rate(LFUCache(capacity, decay_interval=10 * capacity), trace)
+            print(f"{name:<12}{capacity:>9}{lru:>8.3f}{lfu:>8.3f}{aging:>11.3f}")
+
+
+def snapshot_vs_pickle(n=1_000_000):
+    """
+    Saves and loads tables of n entries with dump()/load() and with pickle,
+    and reports the times and the file sizes. Untyped linear probing stores
+    str keys and values, the other tables int keys and values.
+    """
+    keys = _random_keys(n)
+    int_keys = random.Random(0).sample(range(2**62), n)
+    directory = tempfile.mkdtemp()
+    print(f"{'table':<20}{'format':<10}{'save (s)':>9}{'load (s)':>9}{'MB':>8}")
+    for name, table_class, pairs, options in (
+        ("linear probing", HashTableLinearProbe, zip(keys, range(n)), {}),
+        ("linear typed", HashTableLinearProbe, zip(int_keys, range(n)), {"typed": True}),
+        ("separate chaining", HashTableSeparateChaining, zip(int_keys, range(n)), {}),
+    ):
+        table = table_class.from_iterable(pairs, **options)
+        for format in ("snapshot", "pickle"):
+            path = os.path.join(directory, format)
+            start = time.perf_counter()
+            if format == "snapshot":
+                table.dump(path)
+            else:
+                with open(path, "wb") as file:
+                    pickle.dump(table, file, protocol=pickle.HIGHEST_PROTOCOL)
+            save_time = time.perf_counter() - start
+            start = time.perf_counter()
+            if format == "snapshot":
+                table_class.load(path)
+            else:
+                with open(path, "rb") as file:
+                    pickle.load(file)
+            load_time = time.perf_counter() - start
+            size = os.path.getsize(path) / 2**20
+            os.remove(path)
+            print(f"{name:<20}{format:<10}{save_time:>9.2f}{load_time:>9.2f}{size:>8.1f}")
+
+
+def bloom_misses(n=100_000, lookups=100_000, miss_ratios=(0.5, 0.9, 0.99)):
+    """
+    Fills tables up to just below their maximum capacity with n keys, then times
+    get_many() (which does not report misses) over lookups that miss with each ratio,
+    without a Bloom filter and with a standard and a counting filter. The last
+    column times get() one key at a time: a miss that the filter rules out returns
+    silently, other misses print their message (redirected to a buffer).
+    """
+    keys = _random_keys(n + lookups)
+    present, absent = keys[:n], keys[n:]
+    rng = random.Random(1)
+    print(f"{'table':<20}{'filter':<10}{'misses':>7}{'get_many (us)':>15}{'get (us)':>10}")
+    for name, table_class, options in (
+        ("linear probing", HashTableLinearProbe, {}),
+        ("linear typed", HashTableLinearProbe, {"typed": True}),
+        ("separate chaining", HashTableSeparateChaining, {}),
+    ):
+        for bloom_filter in (None, "standard", "counting"):
+            # sized so that n keys stay below max_capacity without a resize
+            table = table_class(int(n / 0.74), bloom_filter=bloom_filter, **options)
+            table.set_many(zip(present, present))
+            for miss_ratio in miss_ratios:
+                trace = [
+                    rng.choice(absent) if rng.random() < miss_ratio else rng.choice(present)
+                    for _ in range(lookups)
+                ]
+                start = time.perf_counter()
+                table.get_many(trace)
+                batch_time = (time.perf_counter() - start) / lookups * 1e6
+                start = time.perf_counter()
+                with contextlib.redirect_stdout(io.StringIO()):
+                    for key in trace:
+                        table.get(key)
+                single_time = (time.perf_counter() - start) / lookups * 1e6
+                print(
+                    f"{name:<20}{str(bloom_filter):<10}{miss_ratio:>7.2f}"
+                    f"{batch_time:>15.2f}{single_time:>10.2f}"
+                )
+
+
+def stats_overhead(n=200_000):
+    """
+    Times n sets followed by n gets with stats disabled and enabled,
+    and prints the stats that the instrumented table recorded.
+    """
+    keys = _random_keys(n)
+    print(f"{'table':<20}{'stats':<7}{'set (s)':>9}{'get (s)':>9}")
+    for name, table_class in (
+        ("linear probing", HashTableLinearProbe),
+        ("separate chaining", HashTableSeparateChaining),
+    ):
+        for stats in (False, True):
+            table = table_class(8, stats=stats)
+            with contextlib.redirect_stdout(io.StringIO()):
+                start = time.perf_counter()
+                for key in keys:
+                    table.set(key, key)
+                set_time = time.perf_counter() - start
+            start = time.perf_counter()
+            for key in keys:
+                table.get(key)
+            get_time = time.perf_counter() - start
+            print(f"{name:<20}{str(stats):<7}{set_time:>9.2f}{get_time:>9.2f}")
+        recorded = table.stats()
+        print(
+            f"  resizes: {recorded['resizes']} in {recorded['resize_seconds']:.2f}s,"
+            f" load factor: {recorded['load_factor']:.2f}, max chain: {recorded['max_chain']},"
+            f" hit lengths: {recorded['probe_lengths']['hit']}"
+        )
+
+
+def _shared_lookup_worker(table, keys, lookups, barrier):
+    """
+    Looks up random keys of a shared memory table once every process is ready
+    """
+    rng = random.Random(os.getpid())
+    batch = [rng.choice(keys) for _ in range(lookups)]
+    barrier.wait()
+    for key in batch:
+        table.get(key)
+
+
+def shared_memory_throughput(n=200_000, lookups=100_000, process_counts=(1, 2, 4, 8)):
+    """
+    Fills a HashTableSharedMemory with n 8-byte keys, then starts processes that each
+    look up lookups random keys without locks, and reports the aggregate lookups per
+    second from the moment all processes are ready until the last one finished.
+    Scaling requires at least as many free cores as processes.
+    """
+    keys = [i.to_bytes(8, "little") for i in random.Random(0).sample(range(2**62), n)]
+    print(f"cores: {os.cpu_count()}")
+    print(f"{'processes':>9}{'lookups/s':>12}")
+    with HashTableSharedMemory(key_size=8, shards=16, size=int(n / 0.5)) as table:
+        for key in keys:
+            table.set(key, key)
+        for processes in process_counts:
+            barrier = multiprocessing.Barrier(processes + 1)
+            workers = [
+                multiprocessing.Process(
+                    target=_shared_lookup_worker, args=(table, keys, lookups, barrier)
+                )
+                for _ in range(processes)
+            ]
+            for process in workers:
+                process.start()
+            barrier.wait()
+            start = time.perf_counter()
+            for process in workers:
+                process.join()
+            elapsed = time.perf_counter() - start
+            print(f"{processes:>9}{processes * lookups / elapsed:>12.0f}")
+
+
+def distinct_counting(n=500_000, distinct=200_000, precisions=(10, 12, 14, 16)):
+    """
+    Counts the distinct ids of a stream of n ids (distinct of them different) exactly,
+    as the number of keys of a HashTableSeparateChaining, and with HyperLogLog sketches
+    of several precisions. Reports the relative error, the memory allocated while
+    counting and the time.
+    """
+    rng = random.Random(0)
+    stream = [f"user-{rng.randrange(distinct)}" for _ in range(n)]
+    exact = len(set(stream))
+    print(f"{'counter':<22}{'error (%)':>10}{'KB':>10}{'time (s)':>10}")
+    tracemalloc.start()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        table = HashTableSeparateChaining(8)
+        for user in stream:
+            table.set(user, True)
+    count = len(table.keys())
+    elapsed = time.perf_counter() - start
+    allocated = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del table
+    error = (count / exact - 1) * 100
+    print(f"{'separate chaining':<22}{error:>10.2f}{allocated / 1024:>10.0f}{elapsed:>10.2f}")
+    for precision in precisions:
+        tracemalloc.start()
+        start = time.perf_counter()
+        sketch = HyperLogLog(precision)
+        sketch.add_many(stream)
+        estimate = sketch.estimate()
+        elapsed = time.perf_counter() - start
+        allocated = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        name = f"hyperloglog p={precision}"
+        error = (estimate / exact - 1) * 100
+        print(f"{name:<22}{error:>10.2f}{allocated / 1024:>10.0f}{elapsed:>10.2f}")
+
+
+def heavy_hitters(n=500_000, distinct=100_000, k=20, width=2048, depth=5):
+    """
+    Counts a Zipfian stream of n ids exactly with a HashTableLinearProbe and finds its k
+    most frequent ids with HeavyHitters, with and without conservative update, adding the
+    ids one by one and as one NumPy array. Reports the share of the true top k that was
+    found, the mean overestimate of the true top k, the memory and the time.
+    """
+    # imported here so that the other benchmarks run without numpy
+    import numpy as np
+
+    from .count_min_sketch import HeavyHitters
+
+    stream = np.random.default_rng(0).zipf(1.1, n) % distinct
+    ids = stream.tolist()
+    print(f"{'counter':<28}{'recall':>8}{'overestimate':>14}{'KB':>10}{'time (s)':>10}")
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        table = HashTableLinearProbe(1024, typed=True)
+        for id in ids:
+            found = table.get(id)
+            table.set(id, found[0] + 1 if found else 1)
+    elapsed = time.perf_counter() - start
+    exact = dict(table.items())
+    true_top = sorted(exact, key=exact.get, reverse=True)[:k]
+    print(f"{'exact (linear probing)':<28}{1:>8.2f}{0:>14.1f}{'':>10}{elapsed:>10.2f}")
+    for conservative in (False, True):
+        for batch in (False, True):
+            hitters = HeavyHitters(k, width, depth, conservative=conservative)
+            start = time.perf_counter()
+            hitters.update_many(stream if batch else ids)
+            elapsed = time.perf_counter() - start
+            found = {item for item, _ in hitters.top()}
+            recall = len(found.intersection(true_top)) / k
+            overestimate = sum(hitters.estimate(id) - exact[id] for id in true_top) / k
+            name = ("conservative" if conservative else "count-min") + (" batch" if batch else "")
+            memory = hitters.sketch.memory_bytes() / 1024
+            print(f"{name:<28}{recall:>8.2f}{overestimate:>14.1f}{memory:>10.0f}{elapsed:>10.2f}")
+
+
+def perfect_hash(n=200_000, lookups=100_000):
+    """
+    Builds static tables of n str keys with linear probing and with a minimal perfect
+    hash, and reports the build time, the memory allocated by the table (the keys
+    exist beforehand), the time per get() of hits and misses and the size of dump().
+    Both perfect hash tables store the keys as given, like typed linear probing.
+    """
+    keys = _random_keys(n)
+    rng = random.Random(2)
+    hits = [keys[rng.randrange(n)] for _ in range(lookups)]
+    misses = _random_keys(lookups, seed=1)
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, "table")
+    print(
+        f"{'table':<24}{'build (s)':>10}{'B/key':>7}{'us/hit':>8}{'us/miss':>9}{'file MB':>9}"
+    )
+    for name, table_class, options in (
+        ("linear", HashTableLinearProbe, {}),
+        ("linear typed", HashTableLinearProbe, {"typed": True}),
+        ("perfect stable_hash", HashTablePerfect, {}),
+        ("perfect default_hash", HashTablePerfect, {"hash_function": None}),
+    ):
+        # tracemalloc slows the build down, so the memory is measured on a second build
+        tracemalloc.start()
+        table = table_class.from_iterable(zip(keys, range(n)), **options)
+        allocated = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        del table
+        start = time.perf_counter()
+        table = table_class.from_iterable(zip(keys, range(n)), **options)
+        build_time = time.perf_counter() - start
+        times = []
+        with contextlib.redirect_stdout(io.StringIO()):
+            for sample in (hits, misses):
+                start = time.perf_counter()
+                for key in sample:
+                    table.get(key)
+                times.append((time.perf_counter() - start) / len(sample) * 1e6)
+        table.dump(path)
+        size = os.path.getsize(path) / 2**20
+        os.remove(path)
+        del table
+        print(
+            f"{name:<24}{build_time:>10.2f}{allocated / n:>7.0f}"
+            f"{times[0]:>8.2f}{times[1]:>9.2f}{size:>9.1f}"
+        )
+
+
+def int_counters(n=500_000, distinct=100_000):
+    """
+    Counts a stream of n int64 ids (distinct of them different) with typed linear
+    probing (get and set per id), with IntHashMap.add per id and with one
+    IntHashMap.add_many call, then looks every id up again (get per id or one
+    get_many call). Reports the times and the memory allocated per entry.
+    """
+    # imported here so that the other benchmarks run without numpy
+    import numpy as np
+
+    from .hash_table_int import IntHashMap
+
+    rng = np.random.default_rng(0)
+    universe = rng.integers(-(2**62), 2**62, distinct)
+    stream = universe[rng.integers(0, distinct, n)]
+    ids = stream.tolist()
+    print(f"{'counter':<22}{'count (s)':>10}{'lookup (s)':>11}{'B/entry':>9}")
+
+    def count_linear():
+        table = HashTableLinearProbe(16, typed=True)
+        for id in ids:
+            found = table.get(id)
+            table.set(id, found[0] + 1 if found else 1)
+        return table
+
+    def count_single():
+        table = IntHashMap()
+        for id in ids:
+            table.add(id)
+        return table
+
+    def count_batch():
+        table = IntHashMap()
+        table.add_many(stream)
+        return table
+
+    for name, count, lookup in (
+        ("linear typed", count_linear, lambda table: [table.get(id) for id in ids]),
+        ("IntHashMap add", count_single, lambda table: [table.get(id) for id in ids]),
+        ("IntHashMap add_many", count_batch, lambda table: table.get_many(stream)),
+    ):
+        with contextlib.redirect_stdout(io.StringIO()):
+            tracemalloc.start()
+            table = count()
+            allocated = tracemalloc.get_traced_memory()[0]
+            tracemalloc.stop()
+            del table
+            start = time.perf_counter()
+            table = count()
+            count_time = time.perf_counter() - start
+            start = time.perf_counter()
+            lookup(table)
+            lookup_time = time.perf_counter() - start
+        entries = len(table)
+        print(f"{name:<22}{count_time:>10.2f}{lookup_time:>11.2f}{allocated / entries:>9.1f}")
+
+
+def frequency_counting(n=500_000, vocabulary=50_000, k=10):
+    """
+    Counts a Zipfian stream of n tokens with HashTableSeparateChaining.set(get() + 1),
+    with FrequencyCounter.update() of a list and of a NumPy array, and finds the k most
+    common tokens with most_common(k) and by sorting every count.
+    """
+    # imported here so that the other benchmarks run without numpy
+    import numpy as np
+
+    ranks = np.random.default_rng(0).zipf(1.2, n) % vocabulary
+    tokens = [f"token-{rank}" for rank in ranks.tolist()]
+    array = np.array(tokens)
+    print(f"{'counting':<28}{'time (s)':>10}")
+    start = time.perf_counter()
+    # get() reports every new token on stdout
+    with contextlib.redirect_stdout(io.StringIO()):
+        table = HashTableSeparateChaining(16)
+        for token in tokens:
+            table.set(token, (table.get(token) or 0) + 1)
+    print(f"{'chaining set(get() + 1)':<28}{time.perf_counter() - start:>10.2f}")
+    for name, items in (("FrequencyCounter list", tokens), ("FrequencyCounter array", array)):
+        start = time.perf_counter()
+        counter = FrequencyCounter(items)
+        print(f"{name:<28}{time.perf_counter() - start:>10.2f}")
+    start = time.perf_counter()
+    counter.most_common(k)
+    print(f"{f'most_common({k})':<28}{time.perf_counter() - start:>10.2f}")
+    start = time.perf_counter()
+    sorted(counter.items(), key=lambda item: item[1], reverse=True)[:k]
+    print(f"{'sort every count':<28}{time.perf_counter() - start:>10.2f}")
+
+
+BENCHMARKS = {
+    "probe_lengths": probe_lengths,
+    "resize_latency": resize_latency,
+    "memory_per_entry": memory_per_entry,
+    "concurrent_throughput": concurrent_throughput,
+    "typed_keys": typed_keys,
+    "lookup_latency": lookup_latency,
+    "group_probing": group_probing,
+    "mmap_reopen": mmap_reopen,
+    "cache_hit_rates": cache_hit_rates,
+    "snapshot_vs_pickle": snapshot_vs_pickle,
+    "bloom_misses": bloom_misses,
+    "stats_overhead": stats_overhead,
+    "shared_memory_throughput": shared_memory_throughput,
+    "distinct_counting": distinct_counting,
+    "heavy_hitters": heavy_hitters,
+    "perfect_hash": perfect_hash,
+    "int_counters": int_counters,
+    "frequency_counting": frequency_counting,
+}
+
+
+if __name__ == "__main__":
+    names = sys.argv[1:] or list(BENCHMARKS)
+    for name in names:
+        print(f"== {name} ==")
+        BENCHMARKS[name]()
@@ -0,0 +1,211 @@
+"""
+Bloom Filter and Counting Bloom Filter
+
+A Bloom filter is a compact set that answers "is this key present?" with either "definitely not" or
+"probably". It is a bit array of m bits and k hash functions: adding a key sets the k bits its hashes
+point to, and a key is reported present only if all of its k bits are set. A key that was added is
+always reported present (no false negatives); a key that was not added is reported present only if
+other keys happen to have set all of its bits (a false positive).
+
+For n keys the false positive rate is about (1 - e^(-k * n / m))^k. Given the expected number of keys
+(`capacity`) and a target `error_rate` p, the filter picks the optimal sizes
+- m = -n * ln(p) / ln(2)^2 bits (about 9.6 bits per key for p = 1%),
+- k = m / n * ln(2) hashes (7 for p = 1%).
+
+The k hashes are derived from one 64-bit hash (Kirsch and Mitzenmacher, "Less Hashing, Same
+Performance"): the hash is mixed with fmix64 and split into two 32-bit halves h1 and h2, and the i-th
+bit position is (h1 + i * h2) mod m. So a key is only hashed once however large k is, and a hash table
+can pass the hash it already computed for its own slots (`add_hash`, `contains_hash`).
+
+A plain Bloom filter cannot remove keys: clearing the bits of one key could clear bits that other keys
+share. The counting variant keeps an 8-bit counter instead of every bit, increments the k counters on
+add and decrements them on remove. A counter that reaches 255 stays at 255 forever (it can no longer
+tell how many keys share it), which only costs false positives. Only keys that were added may be
+removed, otherwise counters of other keys are decremented and false negatives appear.
+
+Key Operations:
+- `add(key)`, `add_hash(full_hash)`: Adds a key, or a key by its 64-bit hash.
+- `__contains__(key)`, `contains_hash(full_hash)`: Returns False if the key was certainly never added.
+- `remove(key)`, `remove_hash(full_hash)`: Removes a key (CountingBloomFilter only).
+- `false_positive_rate()`: Returns the expected false positive rate for the keys added so far.
+- `optimal_size(capacity, error_rate)`: Returns the number of bits and of hashes for a target rate.
+
+HashTableLinearProbe and HashTableSeparateChaining take `bloom_filter="standard"` or `"counting"` to
+consult a filter before probing (see `BLOOM_FILTERS`).
+"""
+
+import math
+
+from .hash_functions import MASK_64, fmix64, resolve_hash_function
+
+
+def optimal_size(capacity, error_rate):
+    """
+    Returns (bits, hashes), the bit array size and the number of hashes
+    that give error_rate false positives once capacity keys were added
+    """
+    if capacity < 1:
+        raise ValueError("capacity must be at least 1")
+    if not 0 < error_rate < 1:
+        raise ValueError("error_rate must be between 0 and 1")
+    bits = max(math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2), 8)
+    hashes = max(round(bits / capacity * math.log(2)), 1)
+    return bits, hashes
+
+
+class BloomFilter:
+    def __init__(self, capacity, error_rate=0.01, hash_function=None):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.bits, self.hashes = optimal_size(capacity, error_rate)
+        # any callable key -> int, only used by add() and __contains__()
+        self.hash_function = resolve_hash_function(hash_function)
+        self.array = bytearray((self.bits + 7) // 8)
+        # number of adds, including keys that were added more than once
+        self.count = 0
+
+    def _positions(self, full_hash):
+        """
+        Returns the k bit positions of a 64-bit hash
+
+        Takes O(k)
+        """
+        h = fmix64(full_hash & MASK_64)
+        h1 = h & 0xFFFFFFFF
+        h2 = (h >> 32) | 1
+        bits = self.bits
+        return [(h1 + i * h2) % bits for i in range(self.hashes)]
+
+    def add(self, key):
+        """
+        Adds key to the filter
+
+        Takes O(k)
+        """
+        self.add_hash(self.hash_function(key))
+
+    def add_hash(self, full_hash):
+        """
+        Adds a key by its 64-bit hash
+
+        Takes O(k)
+        """
+        array = self.array
+        for position in self._positions(full_hash):
+            array[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, key):
+        return self.contains_hash(self.hash_function(key))
+
+    def contains_hash(self, full_hash):
+        """
+        Returns False if no key with this hash was added and True if one probably was.
+        Stops at the first bit that is not set.
+
+        Takes O(k) and O(1) on average for keys that were not added
+        """
+        array = self.array
+        h = fmix64(full_hash & MASK_64)
+        h1 = h & 0xFFFFFFFF
+        h2 = (h >> 32) | 1
+        bits = self.bits
+        for i in range(self.hashes):
+            position = (h1 + i * h2) % bits
+            if not array[position >> 3] & (1 << (position & 7)):
+                return False
+        return True
+
+    def false_positive_rate(self):
+        """
+        Returns the expected false positive rate for the keys added so far
+
+        Takes O(1)
+        """
+        return (1 - math.exp(-self.hashes * self.count / self.bits)) ** self.hashes
+
+    def clear(self):
+        """
+        Removes every key
+
+        Takes O(m) time
+        """
+        self.array = bytearray(len(self.array))
+        self.count = 0
+
+
+class CountingBloomFilter(BloomFilter):
+    # a counter that reached this value is never decremented again
+    MAX_COUNT = 255
+
+    def __init__(self, capacity, error_rate=0.01, hash_function=None):
+        super().__init__(capacity, error_rate, hash_function)
+        # one 8-bit counter per position instead of one bit
+        self.array = bytearray(self.bits)
+
+    def add_hash(self, full_hash):
+        """
+        Adds a key by its 64-bit hash, incrementing its k counters
+
+        Takes O(k)
+        """
+        array = self.array
+        for position in self._positions(full_hash):
+            if array[position] < self.MAX_COUNT:
+                array[position] += 1
+        self.count += 1
+
+    def contains_hash(self, full_hash):
+        """
+        Returns False if no key with this hash is in the filter and True if one probably is.
+        Stops at the first counter that is zero.
+
+        Takes O(k) and O(1) on average for keys that are not in the filter
+        """
+        array = self.array
+        h = fmix64(full_hash & MASK_64)
+        h1 = h & 0xFFFFFFFF
+        h2 = (h >> 32) | 1
+        bits = self.bits
+        for i in range(self.hashes):
+            if not array[(h1 + i * h2) % bits]:
+                return False
+        return True
+
+    def remove(self, key):
+        """
+        Removes key, which must have been added before
+
+        Takes O(k)
+        """
+        self.remove_hash(self.hash_function(key))
+
+    def remove_hash(self, full_hash):
+        """
+        Removes a key by its 64-bit hash, decrementing its k counters.
+        Saturated counters are left unchanged.
+
+        Takes O(k)
+        """
+        array = self.array
+        for position in self._positions(full_hash):
+            if 0 < array[position] < self.MAX_COUNT:
+                array[position] -= 1
+        self.count -= 1
+
+
+# filter classes by the name the hash tables accept for their bloom_filter option
+BLOOM_FILTERS = {"standard": BloomFilter, "counting": CountingBloomFilter}
+
+
+if __name__ == "__main__":
+    bloom = BloomFilter(1000, error_rate=0.01)
+    for i in range(1000):
+        bloom.add(f"key-{i}")
+    false_positives = sum(f"other-{i}" in bloom for i in range(10000))
+    print(bloom.bits, bloom.hashes, false_positives / 10000, bloom.false_positive_rate())
+
+    counting = CountingBloomFilter(100)
+    counting.add("apple")
+    counting.remove("apple")
+    print("apple" in counting)
@@ -0,0 +1,424 @@
+"""
+Count-Min Sketch and Heavy Hitters
+
+Counting how often every item of a stream occurs exactly takes one table entry per distinct item. A
+Count-Min sketch (Cormode and Muthukrishnan) estimates the counts in a fixed amount of memory instead: a
+`depth` x `width` array of counters where every row has its own hash function. Adding an item increments
+one counter per row, and the estimated count of an item is the smallest of its counters. Other items that
+share a counter only ever add to it, so an estimate is never below the true count, and with
+- width = ceil(e / epsilon) and
+- depth = ceil(ln(1 / delta))
+an estimate exceeds the true count by more than epsilon * N (N the total of all counts added) with
+probability at most delta (`optimal_dimensions`).
+
+As in bloom_filter.py, the row hashes are derived from one 64-bit hash (Kirsch and Mitzenmacher): the
+hash is mixed with fmix64 and split into h1 and h2, and the counter of row i is (h1 + i * h2) mod width.
+Items are hashed with `stable_hash` by default, so sketches built in different worker processes place
+items identically and can be merged.
+
+Conservative update (`conservative=True`, Estan and Varghese) only raises the counters of an item to its
+new estimate (the minimum of its counters plus the count) instead of adding the count to every counter.
+Counters that were already larger because of other items are left alone, which removes much of the
+overestimate of rare items. Estimates still never fall below the true counts.
+
+The counters are a NumPy int64 array, so a whole array of items is added with a few vectorized
+operations: `update_many` counts the distinct items of the array with np.unique, hashes each distinct
+item once and updates every row in one np.add.at (np.maximum.at with conservative update). Items of a
+NumPy array are hashed by their python value (`tolist()`), so they land on the same counters as the
+same items added one by one. Requires NumPy.
+
+Sketches with the same dimensions and hash function are merged by adding their counters, which gives
+the sketch of both streams (for conservative sketches an upper bound that is at least as good as a
+sketch without conservative update).
+
+`HeavyHitters` finds the k most frequent items of a stream. It feeds a Count-Min sketch and keeps the k
+items with the largest estimates in a MinHeap of (estimate, order, item) entries, together with a dict
+{item: entry}. The heap root is the smallest tracked estimate: an untracked item replaces the root once
+its estimate exceeds it. The order number breaks ties between equal estimates, so items themselves are
+never compared.
+
+Key Operations:
+- `add(item, count)`: Adds count occurrences of an item.
+- `update_many(items, counts)`: Adds every item of an iterable or a NumPy array.
+- `estimate(item)`, `estimate_many(items)`: Returns the estimated count of an item, or of every item.
+- `merge(other)`: Merges another sketch (or HeavyHitters) into this one.
+- `top(n)`: Returns the tracked heavy hitters with their estimates, largest first (HeavyHitters only).
+- `optimal_dimensions(epsilon, delta)`: Returns the width and depth for an error bound.
+"""
+
+import math
+
+import numpy as np
+
+from ..Priority_Queue.min_heap import MinHeap
+from .hash_functions import MASK_64, fmix64, resolve_hash_function, stable_hash
+from .hash_table_snapshot import hash_fingerprint
+
+_MASK_32 = np.uint64(0xFFFFFFFF)
+
+
+def optimal_dimensions(epsilon, delta):
+    """
+    Returns (width, depth) of a sketch whose estimates exceed the true counts
+    by more than epsilon * N with probability at most delta
+    """
+    if not 0 < epsilon < 1:
+        raise ValueError("epsilon must be between 0 and 1")
+    if not 0 < delta < 1:
+        raise ValueError("delta must be between 0 and 1")
+    return math.ceil(math.e / epsilon), math.ceil(math.log(1 / delta))
+
+
+def _fmix64_array(hashes):
+    """
+    fmix64 of every hash of a uint64 array. NumPy multiplies uint64 modulo 2^64.
+
+    Takes O(n) time
+    """
+    h = hashes ^ (hashes >> np.uint64(33))
+    h *= np.uint64(0xFF51AFD7ED558CCD)
+    h ^= h >> np.uint64(33)
+    h *= np.uint64(0xC4CEB9FE1A85EC53)
+    h ^= h >> np.uint64(33)
+    return h
+
+
+class CountMinSketch:
+    def __init__(self, width=2048, depth=5, conservative=False, hash_function=stable_hash):
+        if width < 1 or depth < 1:
+            raise ValueError("width and depth must be at least 1")
+        self.width = width
+        self.depth = depth
+        self.conservative = conservative
+        # any callable item -> int, the low 64 bits of the result are used
+        self.hash_function = resolve_hash_function(hash_function)
+        self.table = np.zeros((depth, width), dtype=np.int64)
+        # the counters as one flat view, indexed by row * width + column
+        self._counters = self.table.reshape(-1)
+        # total of all counts added (N of the error bound)
+        self.total = 0
+
+    def _positions(self, full_hash):
+        """
+        Returns the flat index of the counter of every row for a 64-bit hash
+
+        Takes O(depth)
+        """
+        h = fmix64(full_hash & MASK_64)
+        h1 = h & 0xFFFFFFFF
+        h2 = (h >> 32) | 1
+        width = self.width
+        return [row * width + (h1 + row * h2) % width for row in range(self.depth)]
+
+    def _positions_many(self, hashes):
+        """
+        Returns a (depth, n) array of the flat counter indexes of n 64-bit hashes
+
+        Takes O(depth * n) time
+        """
+        h = _fmix64_array(hashes)
+        h1 = h & _MASK_32
+        h2 = (h >> np.uint64(32)) | np.uint64(1)
+        rows = np.arange(self.depth, dtype=np.uint64)[:, None]
+        columns = (h1 + rows * h2) % np.uint64(self.width)
+        return (columns + rows * np.uint64(self.width)).astype(np.intp)
+
+    def hash_many(self, items):
+        """
+        Returns the 64-bit hashes of a list of items as a uint64 array
+
+        Takes O(n) time
+        """
+        hash_function = self.hash_function
+        return np.fromiter(
+            (hash_function(item) & MASK_64 for item in items), dtype=np.uint64, count=len(items)
+        )
+
+    def add(self, item, count=1):
+        """
+        Adds count occurrences of item
+
+        Takes O(depth)
+        """
+        self.add_hash(self.hash_function(item), count)
+
+    def add_hash(self, full_hash, count=1):
+        """
+        Adds count occurrences of an item by its 64-bit hash
+        and returns the new estimate of the item
+
+        Takes O(depth)
+        """
+        if count < 0:
+            raise ValueError("count must not be negative")
+        counters = self._counters
+        positions = self._positions(full_hash)
+        self.total += count
+        if self.conservative:
+            target = int(min(counters[position] for position in positions)) + count
+            for position in positions:
+                if counters[position] < target:
+                    counters[position] = target
+            return target
+        for position in positions:
+            counters[position] += count
+        return int(min(counters[position] for position in positions))
+
+    def update_many(self, items, counts=None):
+        """
+        Adds every item of an iterable, or of a NumPy array with one vectorized update.
+        counts gives the number of occurrences of every item (1 each by default).
+
+        Takes O(n) time, O(n log n) for arrays (np.unique sorts the items)
+        """
+        if not isinstance(items, np.ndarray):
+            if counts is None:
+                for item in items:
+                    self.add(item)
+            else:
+                for item, count in zip(items, counts):
+                    self.add(item, count)
+            return
+        distinct, counts = _count_distinct(items, counts)
+        self.update_hashes(self.hash_many(distinct), counts)
+
+    def update_hashes(self, hashes, counts):
+        """
+        Adds counts[i] occurrences of the item with 64-bit hash hashes[i] for every i.
+        The hashes should be distinct: with conservative update, repeated hashes
+        are added as if only the largest count was given.
+
+        Takes O(depth * n) time
+        """
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        counts = np.asarray(counts, dtype=np.int64)
+        if (counts < 0).any():
+            raise ValueError("count must not be negative")
+        positions = self._positions_many(hashes)
+        if self.conservative:
+            targets = self._counters[positions].min(axis=0) + counts
+            np.maximum.at(self._counters, positions.ravel(), np.tile(targets, self.depth))
+        else:
+            np.add.at(self._counters, positions.ravel(), np.tile(counts, self.depth))
+        self.total += int(counts.sum())
+
+    def estimate(self, item):
+        """
+        Returns the estimated count of item, never below its true count
+
+        Takes O(depth)
+        """
+        return self.estimate_hash(self.hash_function(item))
+
+    def estimate_hash(self, full_hash):
+        """
+        Returns the estimated count of an item by its 64-bit hash
+
+        Takes O(depth)
+        """
+        counters = self._counters
+        return int(min(counters[position] for position in self._positions(full_hash)))
+
+    def estimate_many(self, items):
+        """
+        Returns the estimated counts of a list or array of items as an int64 array
+
+        Takes O(depth * n) time
+        """
+        if isinstance(items, np.ndarray):
+            items = items.tolist()
+        return self.estimate_hashes(self.hash_many(items))
+
+    def estimate_hashes(self, hashes):
+        """
+        Returns the estimated counts of the items with the given 64-bit hashes
+
+        Takes O(depth * n) time
+        """
+        positions = self._positions_many(np.asarray(hashes, dtype=np.uint64))
+        return self._counters[positions].min(axis=0)
+
+    def merge(self, other):
+        """
+        Adds the counters of other to this sketch.
+        Raises ValueError if the sketches differ in dimensions or hash function.
+
+        Takes O(depth * width) time
+        """
+        if (other.width, other.depth) != (self.width, self.depth):
+            raise ValueError("sketches with different dimensions cannot be merged")
+        if hash_fingerprint(other.hash_function) != hash_fingerprint(self.hash_function):
+            raise ValueError("sketches with different hash functions cannot be merged")
+        self.table += other.table
+        self.total += other.total
+        return self
+
+    def copy(self):
+        """
+        Returns an independent copy of the sketch
+
+        Takes O(depth * width) time
+        """
+        sketch = CountMinSketch(self.width, self.depth, self.conservative, self.hash_function)
+        sketch.table[:] = self.table
+        sketch.total = self.total
+        return sketch
+
+    def error_bound(self):
+        """
+        Returns epsilon * N, the overestimate that is exceeded with probability at most delta
+
+        Takes O(1)
+        """
+        return math.e / self.width * self.total
+
+    def memory_bytes(self):
+        """
+        Returns the memory used by the counters
+
+        Takes O(1)
+        """
+        return self.table.nbytes
+
+
+def _count_distinct(items, counts=None):
+    """
+    Returns the distinct items of a NumPy array as a list and their total counts
+
+    Takes O(n log n) time
+    """
+    if counts is None:
+        distinct, counts = np.unique(items, return_counts=True)
+    else:
+        distinct, inverse = np.unique(items, return_inverse=True)
+        # np.bincount sums weights as float64, exact only up to 2**53, so the counts are added as int64
+        totals = np.zeros(len(distinct), dtype=np.int64)
+        np.add.at(totals, inverse.ravel(), np.asarray(counts, dtype=np.int64).ravel())
+        counts = totals
+    return distinct.tolist(), counts.astype(np.int64)
+
+
+class HeavyHitters:
+    def __init__(self, k, width=2048, depth=5, conservative=True, hash_function=stable_hash):
+        if k < 1:
+            raise ValueError("k must be at least 1")
+        self.k = k
+        self.sketch = CountMinSketch(width, depth, conservative, hash_function)
+        # (estimate, order, item) of every tracked item, the root has the smallest estimate
+        self.heap = MinHeap()
+        # item -> its entry in the heap
+        self.entries = {}
+        self._order = 0
+
+    def _offer(self, item, estimate):
+        """
+        Tracks item with its new estimate if it is tracked already or belongs to the top k
+
+        Takes O(log k) for untracked items and O(k) to update a tracked item
+        """
+        entry = self.entries.get(item)
+        if entry is not None:
+            if estimate == entry[0]:
+                return
+            self.heap.remove(entry)
+        elif self.heap.size >= self.k:
+            if estimate <= self.heap.heap[0][0]:
+                return
+            evicted = self.heap.extract_min()
+            del self.entries[evicted[2]]
+        self._order += 1
+        entry = (estimate, self._order, item)
+        self.entries[item] = entry
+        self.heap.insert(entry)
+
+    def add(self, item, count=1):
+        """
+        Adds count occurrences of item and updates the tracked heavy hitters
+
+        Takes O(depth + log k), O(depth + k) if item is already tracked
+        """
+        self._offer(item, self.sketch.add_hash(self.sketch.hash_function(item), count))
+
+    def update_many(self, items, counts=None):
+        """
+        Adds every item of an iterable, or of a NumPy array with one vectorized
+        sketch update. Only the distinct items of an array are offered to the heap.
+
+        Takes O(n) time, O(n log n) for arrays
+        """
+        if not isinstance(items, np.ndarray):
+            if counts is None:
+                for item in items:
+                    self.add(item)
+            else:
+                for item, count in zip(items, counts):
+                    self.add(item, count)
+            return
+        distinct, counts = _count_distinct(items, counts)
+        hashes = self.sketch.hash_many(distinct)
+        self.sketch.update_hashes(hashes, counts)
+        for item, estimate in zip(distinct, self.sketch.estimate_hashes(hashes).tolist()):
+            self._offer(item, estimate)
+
+    def estimate(self, item):
+        """
+        Returns the estimated count of item from the sketch, tracked or not
+
+        Takes O(depth)
+        """
+        return self.sketch.estimate(item)
+
+    def merge(self, other):
+        """
+        Merges the sketch of other into this one and keeps the k items with the largest
+        merged estimates among the items tracked by either.
+        Raises ValueError if the sketches cannot be merged.
+
+        Takes O(depth * width + k log k) time
+        """
+        self.sketch.merge(other.sketch)
+        candidates = list(self.entries)
+        candidates.extend(item for item in other.entries if item not in self.entries)
+        self.heap = MinHeap()
+        self.entries = {}
+        for item in candidates:
+            self._offer(item, self.sketch.estimate(item))
+        return self
+
+    def top(self, n=None):
+        """
+        Returns [(item, estimate)] of the n (default k) tracked items with the largest
+        estimates, largest first
+
+        Takes O(k log k) time
+        """
+        entries = sorted(self.heap.heap, key=lambda entry: (-entry[0], entry[1]))
+        return [(item, estimate) for estimate, _, item in entries[:n]]
+
+    def __contains__(self, item):
+        """
+        Returns whether item is one of the tracked heavy hitters
+
+        Takes O(1) on average
+        """
+        return item in self.entries
+
+    def __len__(self):
+        """
+        Returns the number of tracked items, at most k
+
+        Takes O(1)
+        """
+        return self.heap.size
+
+
+if __name__ == "__main__":
+    rng = np.random.default_rng(0)
+    stream = rng.zipf(1.3, 200_000) % 10_000
+    hitters = HeavyHitters(5, width=1024, depth=4)
+    hitters.update_many(stream[:100_000])
+    other = HeavyHitters(5, width=1024, depth=4)
+    other.update_many(stream[100_000:])
+    print(hitters.merge(other).top())
+    values, counts = np.unique(stream, return_counts=True)
+    print(sorted(zip(counts.tolist(), values.tolist()), reverse=True)[:5])
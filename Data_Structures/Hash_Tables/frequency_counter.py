@@ -0,0 +1,204 @@
+"""
+Frequency Counter (Multiset) on HashTableSeparateChaining
+
+Counting tokens or events with a hash table as `table.set(key, table.get(key) + 1)` looks every item up
+twice. FrequencyCounter keeps {item: count} in a HashTableSeparateChaining and increments the count of a
+present item in place: the entry of a chaining table is a dict, so one lookup finds it and its "value" is
+updated directly. Only a new item is looked up a second time, by set().
+
+The counter sizes the table by its number of distinct items: once the table reports that one more item
+would not fit (`fits()`), it reserves room for twice as many. A growth triggered by the table itself
+(which reports it on stdout) therefore never happens.
+
+`update(items)` counts every item of an iterable. A NumPy array takes a fast path: np.unique(...,
+return_counts=True) counts the array in compiled code and only the distinct items (as python values,
+`tolist()`) are added to the table, once each. A mapping or another FrequencyCounter adds its counts.
+NumPy is only needed for the fast path.
+
+`most_common(k)` keeps the k largest counts in a MinHeap of (count, -order, item) entries while walking
+the table once: an item replaces the root (the smallest count kept) only when its count is larger.
+Among equal counts the items seen first in the walk are kept, and items themselves are never compared.
+Counters built by parallel workers are combined with `merge()`.
+
+Key Operations:
+- `add(item, count)`: Adds count occurrences of item.
+- `update(items)`: Counts every item of an iterable, NumPy array, mapping or counter.
+- `counter[item]`: Returns the count of item, 0 if it was never added.
+- `most_common(k)`: Returns the k items with the largest counts, largest first.
+- `merge(other)`: Adds the counts of another counter.
+- `remove(item)`: Removes an item and returns its count.
+"""
+
+from ..Priority_Queue.min_heap import MinHeap
+from .hash_table_separate_chaining import HashTableSeparateChaining
+
+# the fast path of update() is only taken when NumPy is installed
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+class FrequencyCounter:
+    def __init__(self, items=None, size=16, **options):
+        # item -> count, options are passed to HashTableSeparateChaining (e.g. hash_function)
+        self.table = HashTableSeparateChaining(size, **options)
+        # sum of all counts
+        self.total = 0
+        if items is not None:
+            self.update(items)
+
+    def _reserve(self, distinct):
+        """
+        Grows the table to twice the entries once distinct items would not fit
+
+        Takes O(n) time when the table grows, amortized O(1) per new item
+        """
+        table = self.table
+        if not table.fits(distinct):
+            table.reserve(max(distinct, 2 * len(table)))
+
+    def add(self, item, count=1):
+        """
+        Adds count occurrences of item and returns its new count
+
+        Takes O(1) on average
+        """
+        self.total += count
+        entry = self.table.get_entry(item)
+        if entry is not None:
+            entry["value"] += count
+            return entry["value"]
+        self._reserve(len(self.table) + 1)
+        self.table.set(item, count)
+        return count
+
+    def update(self, items):
+        """
+        Counts every item of an iterable. A NumPy array is counted with np.unique
+        and only its distinct items are added. A mapping or a FrequencyCounter
+        adds its counts.
+
+        Takes O(n) time for n items, O(n log n) in compiled code for an array
+        """
+        if isinstance(items, FrequencyCounter):
+            self.merge(items)
+            return
+        if hasattr(items, "items"):
+            for item, count in items.items():
+                self.add(item, count)
+            return
+        if np is not None and isinstance(items, np.ndarray):
+            distinct, counts = np.unique(items.reshape(-1), return_counts=True)
+            self._reserve(len(self.table) + len(distinct))
+            for item, count in zip(distinct.tolist(), counts.tolist()):
+                self.add(item, count)
+            return
+        add = self.add
+        for item in items:
+            add(item)
+
+    def merge(self, other):
+        """
+        Adds the counts of another counter, for example the partial
+        counter of a worker, and returns this counter
+
+        Takes O(m) time for m distinct items in other
+        """
+        self._reserve(len(self.table) + len(other))
+        for item, count in other.items():
+            self.add(item, count)
+        return self
+
+    def __getitem__(self, item):
+        """
+        Returns the count of item, 0 if it was never added
+
+        Takes O(1) on average
+        """
+        entry = self.table.get_entry(item)
+        return 0 if entry is None else entry["value"]
+
+    def get(self, item):
+        """
+        Returns the count of item, 0 if it was never added
+
+        Takes O(1) on average
+        """
+        return self[item]
+
+    def remove(self, item):
+        """
+        Removes item and returns its count, None if it was never added
+
+        Takes O(1) on average
+        """
+        entry = self.table.pop_entry(item)
+        if entry is None:
+            return None
+        self.total -= entry["value"]
+        return entry["value"]
+
+    def __contains__(self, item):
+        """
+        Returns whether item has been added
+
+        Takes O(1) on average
+        """
+        return self.table.get_entry(item) is not None
+
+    def __len__(self):
+        """
+        Returns the number of distinct items
+
+        Takes O(1)
+        """
+        return len(self.table)
+
+    def __iter__(self):
+        """
+        Returns an iterator over the distinct items
+
+        Takes O(n) time in total
+        """
+        return iter(self.table)
+
+    def items(self):
+        """
+        Returns an iterator over the item, count pairs
+
+        Takes O(n) time in total
+        """
+        return self.table.items()
+
+    def most_common(self, k=None):
+        """
+        Returns [(item, count)] of the k items with the largest counts, largest first,
+        or of every item if k is None.
+        A MinHeap of at most k entries holds the largest counts seen so far.
+
+        Takes O(n log k) time for n distinct items
+        """
+        if k is None:
+            k = len(self)
+        if k <= 0:
+            return []
+        heap = MinHeap()
+        for order, (item, count) in enumerate(self.table.items()):
+            if heap.size < k:
+                heap.insert((count, -order, item))
+            elif count > heap.heap[0][0]:
+                heap.extract_min()
+                heap.insert((count, -order, item))
+        common = []
+        while heap.size:
+            count, _, item = heap.extract_min()
+            common.append((item, count))
+        common.reverse()
+        return common
+
+
+if __name__ == "__main__":
+    words = "the quick brown fox jumps over the lazy dog the end".split()
+    first, second = FrequencyCounter(words[:6]), FrequencyCounter(words[6:])
+    print(first.merge(second).most_common(3), first["the"], first["cat"], first.total)
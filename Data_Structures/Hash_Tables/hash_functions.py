@@ -0,0 +1,140 @@
+"""
+Hash Functions for the Hash Tables
+
+A hash table is only as good as its hash function. A good hash function spreads keys uniformly over
+the slots of the table so that collisions are rare and probe sequences / chains stay short.
+
+The original tables summed the `ord()` of every character of `str(key)`. That function is cheap
+to understand but distributes keys very poorly: anagrams ("abc", "cab") always collide and short
+numeric keys only ever reach a handful of buckets because their character sums are tiny.
+
+This module provides pluggable hash strategies. A hash strategy is any callable that takes a key
+and returns an integer; the hash table reduces it into a slot index itself.
+
+- `default_hash(key)`: native `hash()` passed through a 64-bit finalizer (the murmur3 `fmix64` step)
+  so that every input bit affects every output bit.
+- `SeededHash(seed)`: the default hash with a seed mixed in. Tables built with different seeds place
+  the same keys in different slots.
+- `char_sum_hash(key)`: the original character-sum hash, kept for comparison.
+- `stable_hash(key)`: 64-bit BLAKE2b digest of the key bytes. Unlike hash(), it is the same in every
+  process, so it can place keys in tables that are stored on disk.
+- Any user-supplied callable, e.g. `lambda key: zlib.crc32(key.encode())`.
+
+Helpers:
+- `resolve_hash_function(hash_function)`: returns the strategy to use for a table.
+- `histogram(lengths)`: counts how many buckets have each chain length / occupancy.
+"""
+
+import hashlib
+
+MASK_64 = (1 << 64) - 1
+
+
+def fmix64(h):
+    """
+    Finalization mix of murmur3. Forces all bits of h to avalanche
+    so that keys differing in a single bit end up in unrelated slots.
+
+    Takes O(1)
+    """
+    h &= MASK_64
+    h ^= h >> 33
+    h = (h * 0xFF51AFD7ED558CCD) & MASK_64
+    h ^= h >> 33
+    h = (h * 0xC4CEB9FE1A85EC53) & MASK_64
+    h ^= h >> 33
+    return h
+
+
+def default_hash(key):
+    """
+    Default hash strategy. Uses the native hash() of the key and
+    mixes the result with fmix64.
+
+    Note: hash() of str and bytes is randomized per process (PYTHONHASHSEED),
+    so slot positions are only stable within a single process.
+
+    Takes O(1) for fixed size keys and O(k) for strings of length k
+    (python caches the hash of a string after the first call)
+    """
+    return fmix64(hash(key))
+
+
+class SeededHash:
+    """
+    Hash strategy with a seed mixed into the default hash.
+    Useful to make slot positions depend on a per-table secret.
+    """
+
+    def __init__(self, seed):
+        self.seed = seed
+        self._seed_mix = fmix64(seed)
+
+    def __call__(self, key):
+        """
+        Takes O(1) for fixed size keys and O(k) for strings of length k
+        """
+        return fmix64(hash(key) ^ self._seed_mix)
+
+    def __repr__(self):
+        return f"SeededHash(seed={self.seed})"
+
+
+def char_sum_hash(key):
+    """
+    Original hash function of the hash tables.
+    Sums the unicode code points of the characters of str(key).
+    Distributes keys poorly and is only kept for comparison.
+
+    Takes O(k) for a key of k characters
+    """
+    char_sum = 0
+    for char in str(key):
+        char_sum += ord(char)
+    return char_sum
+
+
+def stable_hash(key):
+    """
+    Hash strategy that does not depend on the process or on PYTHONHASHSEED.
+    Bytes are hashed as they are, str as utf-8 and other keys by their str() form.
+
+    Takes O(k) for a key of k bytes
+    """
+    if isinstance(key, str):
+        key = key.encode()
+    elif not isinstance(key, (bytes, bytearray, memoryview)):
+        key = str(key).encode()
+    return int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), "little")
+
+
+def resolve_hash_function(hash_function):
+    """
+    Returns the hash strategy to use for a table.
+    None selects default_hash, any other callable is used as is.
+    """
+    if hash_function is None:
+        return default_hash
+    if not callable(hash_function):
+        raise TypeError("hash_function must be callable and return an int")
+    return hash_function
+
+
+def histogram(lengths):
+    """
+    Builds a histogram {length: number of buckets} from an iterable
+    of per-bucket lengths (chain lengths, bucket occupancy, probe lengths).
+    The histogram is sorted by length.
+
+    Takes O(n) time
+    """
+    counts = {}
+    for length in lengths:
+        counts[length] = counts.get(length, 0) + 1
+    return dict(sorted(counts.items()))
+
+
+if __name__ == "__main__":
+    keys = ["abc", "cab", "bca", "1", "2", "10", "01"]
+    for key in keys:
+        print(key, char_sum_hash(key) % 10, default_hash(key) % 10)
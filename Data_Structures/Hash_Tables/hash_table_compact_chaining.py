@@ -0,0 +1,476 @@
+"""
+Hash Table Implementation Using Separate Chaining With a Compact Layout
+
+This hash table handles collisions with separate chaining like HashTableSeparateChaining, but it stores
+its entries the way CPython's compact dict does instead of as one {"key": ..., "value": ...} dict per
+entry inside a python list per bucket.
+
+Layout:
+- `index`: one small integer per bucket (an `array`) holding the position of the first entry of the
+  bucket's chain, or -1 if the bucket is empty. The integer width (1, 2, 4 or 8 bytes) is the smallest
+  that can address every entry.
+- Dense entry arrays, one position per entry in insertion order:
+  - `entry_keys` and `entry_values`: python lists of the keys and values.
+  - `entry_hashes`: the cached 64-bit hash of every key (an `array` of unsigned 64-bit integers).
+  - `entry_next`: the position of the next entry of the same chain, or -1 (an `array`).
+
+A chain is walked by following `entry_next` from `index[bucket]`. The cached hash is compared before the
+keys, so full key comparisons only happen on real hash matches. An entry costs about 32 bytes plus the
+key and value objects themselves, several times less than a dict per entry.
+
+Because the entries are dense, `keys()` and `values()` walk contiguous arrays in insertion order instead
+of every bucket. Resizing only rebuilds the small `index` and `entry_next` arrays from the cached hashes,
+keys are never rehashed.
+
+Shrinking is opt-in with `shrink_threshold`, with the same hysteresis as HashTableSeparateChaining: the
+table is rebuilt at half of `max_capacity` once the entries fall below `shrink_threshold * size`, but only
+if the load factor has reached the threshold since the last resize (a table that `reserve()` grew for
+entries that have not arrived yet is not shrunk by its first removal).
+
+Removed entries are unlinked from their chain and their key is replaced by a dummy object. The dense
+arrays are compacted on the next resize or once more than half of the entries are dummies.
+
+Key Operations:
+- `set(key, value)`: Inserts or updates a key-value pair in the hash table.
+- `get(key)`: Retrieves the value associated with a given key.
+- `remove(key)`: Removes a key-value pair from the hash table.
+- `keys()`: Returns a list of all keys in the hash table, in insertion order.
+- `values()`: Returns a list of all values in the hash table, in insertion order.
+- `set_many(pairs)`, `get_many(keys)`, `remove_many(keys)`: Batch versions of set, get and remove.
+- `hash_key(key)`: Returns the 64-bit hash of a key.
+- `set_hashed(hash, key, value)`, `get_hashed(hash, key, default)`, `pop_hashed(hash, key)`: set, get and
+  remove for a key hashed with hash_key(), without reporting a missing key.
+- `reserve(n)`: Grows the table once so that n entries fit without another resize.
+- `occupancy()`: Returns the number of buckets against the number of live entries.
+- `from_iterable(pairs)`: Builds a table sized for an iterable of (key, value) pairs.
+- `bucket_histogram()`: Returns a histogram of the chain lengths of all buckets.
+- `_increase_size(resize_factor)`: Increases the number of buckets by resize_factor.
+- `_check_capacity()`: Checks if the current capacity exceeds the maximum capacity and resizes if necessary.
+"""
+
+from array import array
+
+from .hash_functions import MASK_64, histogram, resolve_hash_function
+
+
+class Dummy:
+    """
+    Dummy object to represent a removed entry in the dense entry arrays
+    """
+
+    def __init__(self):
+        pass
+
+
+DUMMY = Dummy()
+
+
+def _index_typecode(n):
+    """
+    Returns the smallest signed array typecode that can hold the positions 0..n and -1
+    """
+    for typecode in ("b", "h", "i", "q"):
+        if n < 2 ** (array(typecode).itemsize * 8 - 1):
+            return typecode
+    raise OverflowError("too many entries")
+
+
+class HashTableCompactChaining:
+    def __init__(
+        self,
+        size,
+        max_capacity=0.75,
+        hash_function=None,
+        growth_factor=10,
+        shrink_threshold=None,
+    ):
+        if growth_factor <= 1:
+            raise ValueError("growth_factor must be greater than 1")
+        if shrink_threshold is not None and shrink_threshold >= min(
+            max_capacity / growth_factor, max_capacity / 2
+        ):
+            raise ValueError(
+                "shrink_threshold must be below max_capacity / growth_factor and max_capacity / 2"
+            )
+        self.size = size
+        self.max_capacity = max_capacity
+        self.growth_factor = growth_factor
+        # load factor that triggers a shrink, None disables shrinking
+        self.shrink_threshold = shrink_threshold
+        # set once the load factor reached shrink_threshold after the last resize
+        self._shrink_armed = False
+        self.min_size = self.size
+        # any callable key -> int, defaults to native hash() + finalizer
+        self.hash_function = resolve_hash_function(hash_function)
+        # number of live entries and number of dummies in the dense arrays
+        self.count = 0
+        self.dummies = 0
+        self.entry_keys = []
+        self.entry_values = []
+        self.entry_hashes = array("Q")
+        self._build_index()
+
+    def _hash(self, key):
+        """
+        Returns the 64-bit hash of key that is cached in entry_hashes
+
+        Takes O(1)
+        """
+        return self.hash_function(key) & MASK_64
+
+    def hash_key(self, key):
+        """
+        Returns the 64-bit hash of key used by set_hashed, get_hashed and pop_hashed,
+        so a caller that needs the hash itself (for example to pick a segment)
+        hashes the key only once
+
+        Takes O(1)
+        """
+        return self._hash(key)
+
+    def set_hashed(self, hash, key, value):
+        """
+        Inserts or updates key with its hash from hash_key()
+
+        Takes O(1) on average and O(n) for worst case.
+        """
+        self._set(hash, key, value)
+
+    def get_hashed(self, hash, key, default=None):
+        """
+        Returns the value of key with its hash from hash_key(),
+        or default without reporting it if the key is not present
+
+        Takes O(1) on average and O(n) for worst case.
+        """
+        i = self._find(hash, key)
+        if i == -1:
+            return default
+        return self.entry_values[i]
+
+    def pop_hashed(self, hash, key):
+        """
+        Removes and returns the entry {"key": key, "value": value} of key with its
+        hash from hash_key(), or None without reporting it if the key is not present
+
+        Takes O(1) on average and O(n) for worst case.
+        """
+        return self._pop(hash, key)
+
+    def _build_index(self):
+        """
+        Rebuilds the bucket index and the chain links from the cached hashes.
+        The integer width is chosen so that every entry position, including
+        the position of the next appended entry, fits.
+
+        Takes O(n + size) time
+        """
+        self._typecode = _index_typecode(len(self.entry_keys))
+        self._max_position = 2 ** (array(self._typecode).itemsize * 8 - 1) - 1
+        self.index = array(self._typecode, [-1]) * self.size
+        self.entry_next = array(self._typecode, [-1]) * len(self.entry_keys)
+        for i, hash in enumerate(self.entry_hashes):
+            if self.entry_keys[i] is DUMMY:
+                continue
+            bucket = hash % self.size
+            self.entry_next[i] = self.index[bucket]
+            self.index[bucket] = i
+
+    def set(self, key, value):
+        """
+        This function sets a new key value pair into the hash table.
+        After the new entry is added, the capacity is checked and resized
+        if necessary.  If a key already exists, the value will be updated
+        with the specified value.
+
+        Takes O(1) on average and O(n) for worst case.
+        Note: average case only true if you have a good uniform hash function.
+        """
+        self._set(self._hash(key), key, value)
+
+    def _set(self, hash, key, value):
+        """
+        Inserts or updates key with its precomputed 64-bit hash.
+
+        Takes O(1) on average and O(n) for worst case.
+        """
+        bucket = hash % self.size
+        i = self.index[bucket]
+        while i != -1:
+            # compare the cached hash first, keys only on a hash match
+            if self.entry_hashes[i] == hash and (
+                self.entry_keys[i] is key or self.entry_keys[i] == key
+            ):
+                self.entry_values[i] = value
+                return
+            i = self.entry_next[i]
+        # append the new entry to the dense arrays and make it the head of its chain
+        position = len(self.entry_keys)
+        if position > self._max_position:
+            self._build_index()
+        self.entry_keys.append(key)
+        self.entry_values.append(value)
+        self.entry_hashes.append(hash)
+        self.entry_next.append(self.index[bucket])
+        self.index[bucket] = position
+        self.count += 1
+        self._check_capacity()
+
+    def get(self, key):
+        """
+        Gets the value corresponding to the specified key.
+        If the key is not present in the hash table, null is returned.
+
+        Takes O(1) on average and O(n) for worst case.
+        Note: average case only true if you have a good uniform hash function.
+        """
+        i = self._find(self._hash(key), key)
+        if i != -1:
+            return self.entry_values[i]
+        print(f"Key: {key} not found in hash table")
+        return
+
+    def _find(self, hash, key):
+        """
+        Returns the position of key with its precomputed 64-bit hash
+        in the dense arrays or -1 if the key is not present
+
+        Takes O(1) on average and O(n) for worst case.
+        """
+        i = self.index[hash % self.size]
+        while i != -1:
+            if self.entry_hashes[i] == hash and (
+                self.entry_keys[i] is key or self.entry_keys[i] == key
+            ):
+                return i
+            i = self.entry_next[i]
+        return -1
+
+    def remove(self, key):
+        """
+        Removes and returns the entry {"key": key, "value": value} if present.
+        The entry is unlinked from its chain and replaced by a dummy in the dense arrays.
+
+        Takes O(1) on average and O(n) for worst case.
+        Note: average case only true if you have a good uniform hash function.
+        """
+        entry = self._pop(self._hash(key), key)
+        if entry is None:
+            print(f"Key: {key} not found in hash table")
+        return entry
+
+    def _pop(self, hash, key):
+        """
+        Removes and returns the entry of key with its precomputed 64-bit hash
+        without reporting a missing key
+
+        Takes O(1) on average and O(n) for worst case.
+        """
+        bucket = hash % self.size
+        previous = -1
+        i = self.index[bucket]
+        while i != -1:
+            if self.entry_hashes[i] == hash and (
+                self.entry_keys[i] is key or self.entry_keys[i] == key
+            ):
+                # unlink entry i from the chain
+                if previous == -1:
+                    self.index[bucket] = self.entry_next[i]
+                else:
+                    self.entry_next[previous] = self.entry_next[i]
+                entry = {"key": self.entry_keys[i], "value": self.entry_values[i]}
+                self.entry_keys[i] = DUMMY
+                self.entry_values[i] = None
+                self.count -= 1
+                self.dummies += 1
+                # compact once dummies make up more than half of the dense arrays
+                if self.dummies > self.count:
+                    self._compact()
+                self._check_shrink()
+                return entry
+            previous = i
+            i = self.entry_next[i]
+        return
+
+    def _check_shrink(self):
+        """
+        Shrinks the table once the entries fall below shrink_threshold of the buckets.
+        The new size puts the load factor at half of max_capacity, away from
+        both the growth and the shrink threshold.
+        Not done before the load factor reached shrink_threshold since the last resize.
+
+        Takes O(n + size) time when triggered, amortized O(1) per removal
+        """
+        if self.shrink_threshold is None or not self._shrink_armed:
+            return
+        if self.size > self.min_size and self.count < self.shrink_threshold * self.size:
+            target_size = int(self.count / (self.max_capacity / 2)) + 1
+            self._resize(max(target_size, self.min_size))
+
+    def _arm_shrink(self):
+        """
+        Allows shrinking once the load factor reaches shrink_threshold.
+        A resize disarms it, so a table that lands below the threshold after a
+        resize is not shrunk by the next removal.
+
+        Takes O(1)
+        """
+        if self.shrink_threshold is not None and not self._shrink_armed:
+            self._shrink_armed = self.count >= self.shrink_threshold * self.size
+
+    def occupancy(self):
+        """
+        Returns the number of buckets against the number of live entries
+
+        Takes O(1)
+        """
+        return {
+            "slots": self.size,
+            "live_entries": self.count,
+            "dummies": self.dummies,
+            "load_factor": self.count / self.size,
+        }
+
+    def set_many(self, pairs):
+        """
+        Sets all (key, value) pairs of an iterable. The table is resized at most
+        once, before the first pair is inserted, and all keys are hashed in one pass.
+
+        Takes O(n) time on average for n pairs
+        """
+        pairs = list(pairs)
+        self.reserve(self.count + len(pairs))
+        hashes = [self._hash(key) for key, _ in pairs]
+        # the cached hashes stay valid across resizes
+        for hash, (key, value) in zip(hashes, pairs):
+            self._set(hash, key, value)
+
+    def get_many(self, keys):
+        """
+        Returns a list with the value of every key of an iterable.
+        Keys that are not present give None.
+
+        Takes O(n) time on average for n keys
+        """
+        values = []
+        for key in keys:
+            i = self._find(self._hash(key), key)
+            values.append(None if i == -1 else self.entry_values[i])
+        return values
+
+    def remove_many(self, keys):
+        """
+        Removes every key of an iterable and returns a list of the removed entries.
+        Keys that are not present give None.
+
+        Takes O(n) time on average for n keys
+        """
+        return [self._pop(self._hash(key), key) for key in keys]
+
+    def reserve(self, n):
+        """
+        Grows the table once so that n entries fit without another resize.
+
+        Takes O(n) time if the table has to grow and O(1) otherwise
+        """
+        required_size = int(n / self.max_capacity) + 1
+        if required_size > self.size:
+            self._resize(required_size)
+
+    @classmethod
+    def from_iterable(cls, pairs, max_capacity=0.75, **options):
+        """
+        Builds a hash table from an iterable of (key, value) pairs.
+        The table is allocated once with room for all pairs.
+
+        Takes O(n) time on average for n pairs
+        """
+        pairs = list(pairs)
+        table = cls(int(len(pairs) / max_capacity) + 1, max_capacity, **options)
+        table.set_many(pairs)
+        return table
+
+    def keys(self):
+        """
+        Returns all keys in the hash table in insertion order
+        Takes O(n) time
+        """
+        return [key for key in self.entry_keys if key is not DUMMY]
+
+    def values(self):
+        """
+        Returns all values in the hash table in insertion order
+        Takes O(n) time
+        """
+        if not self.dummies:
+            return list(self.entry_values)
+        return [
+            value
+            for key, value in zip(self.entry_keys, self.entry_values)
+            if key is not DUMMY
+        ]
+
+    def bucket_histogram(self):
+        """
+        Returns a histogram {chain length: number of buckets}.
+        A uniform hash function keeps almost all chains at length 0, 1 or 2.
+        Takes O(n) time
+        """
+        lengths = [0] * self.size
+        for i, hash in enumerate(self.entry_hashes):
+            if self.entry_keys[i] is not DUMMY:
+                lengths[hash % self.size] += 1
+        return histogram(lengths)
+
+    def _compact(self):
+        """
+        Drops the dummies from the dense arrays and rebuilds the index.
+        Takes O(n + size) time
+        """
+        live = [i for i, key in enumerate(self.entry_keys) if key is not DUMMY]
+        self.entry_keys = [self.entry_keys[i] for i in live]
+        self.entry_values = [self.entry_values[i] for i in live]
+        self.entry_hashes = array("Q", [self.entry_hashes[i] for i in live])
+        self.dummies = 0
+        self._build_index()
+
+    def _increase_size(self, resize_factor):
+        """
+        Increases the number of buckets by resize_factor.
+        The dense arrays are compacted and the index is rebuilt from the cached hashes,
+        no key is rehashed.
+        Takes O(n) time
+        """
+        self._resize(max(int(self.size * resize_factor), self.size + 1))
+
+    def _resize(self, size):
+        """
+        Sets the number of buckets, compacts the dense arrays and rebuilds the index.
+        Takes O(n + size) time
+        """
+        self.size = size
+        if self.dummies:
+            self._compact()
+        else:
+            self._build_index()
+        self._shrink_armed = False
+        self._arm_shrink()
+
+    def _check_capacity(self):
+        """
+        Checks that the number of entries per bucket is less than the maximum capacity.
+        If maximum capacity is exceeded, the hash table is resized
+        """
+        self._arm_shrink()
+        if self.count / self.size >= self.max_capacity:
+            self._increase_size(self.growth_factor)
+
+
+if __name__ == "__main__":
+    h = HashTableCompactChaining(8)
+    for word in ["apple", "pear", "plum", "fig", "kiwi", "lime", "date"]:
+        h.set(word, len(word))
+    h.remove("plum")
+    print(h.keys())
+    print(h.values())
+    print(h.bucket_histogram())
@@ -0,0 +1,146 @@
+"""
+Thread-Safe Hash Table Implementation Using Lock Striping
+
+Wrapping a hash table in a single lock makes it thread-safe, but every thread then waits for the same
+lock even when the threads touch unrelated keys.
+
+Lock striping partitions the table into independent segments, each with its own lock (the design of
+Java's original ConcurrentHashMap). A key is routed to a segment by its hash, so operations on keys of
+different segments take different locks and can proceed in parallel. Each segment is a complete hash
+table (HashTableCompactChaining) that resizes on its own, under its own lock, so a resize only blocks the
+keys of one segment.
+
+The segment is chosen from a second mix of the key hash (fmix64) so that the bits used to pick the
+segment are independent of the bits used to pick the bucket inside the segment.
+
+Parallel speedup requires a free-threaded CPython build (python3.13t and later). With the GIL only one
+thread runs python code at a time, but striping still removes the contention on a single lock.
+
+Key Operations:
+- `set(key, value)`: Inserts or updates a key-value pair in the hash table.
+- `get(key)`: Retrieves the value associated with a given key.
+- `remove(key)`: Removes a key-value pair from the hash table.
+- `keys()`: Returns a list of all keys in the hash table.
+- `values()`: Returns a list of all values in the hash table.
+
+keys() and values() lock one segment at a time. They never see a segment in the middle of an update
+but may miss updates made to other segments while they run.
+"""
+
+import threading
+
+from .hash_functions import fmix64, resolve_hash_function
+from .hash_table_compact_chaining import HashTableCompactChaining
+
+# marks a missing key, as stored values may be None
+_MISSING = object()
+
+
+class ConcurrentHashTable:
+    def __init__(
+        self,
+        size,
+        segments=16,
+        max_capacity=0.75,
+        hash_function=None,
+        growth_factor=10,
+    ):
+        # any callable key -> int, defaults to native hash() + finalizer
+        self.hash_function = resolve_hash_function(hash_function)
+        self.segments = [
+            HashTableCompactChaining(
+                max(size // segments, 1),
+                max_capacity,
+                self.hash_function,
+                growth_factor,
+            )
+            for _ in range(segments)
+        ]
+        # one lock per segment (stripe)
+        self.locks = [threading.Lock() for _ in range(segments)]
+
+    def _route(self, key):
+        """
+        Returns the 64-bit hash of key and the segment that owns the key.
+        The hash is passed on to the segment so the key is only hashed once.
+
+        Takes O(1)
+        """
+        hash = self.segments[0].hash_key(key)
+        return hash, fmix64(hash) % len(self.segments)
+
+    def set(self, key, value):
+        """
+        Sets key to value in the segment that owns the key.
+        Only that segment is locked.
+
+        Takes O(1) on average and O(n) for worst case.
+        """
+        hash, s = self._route(key)
+        with self.locks[s]:
+            self.segments[s].set_hashed(hash, key, value)
+
+    def get(self, key):
+        """
+        Gets the value corresponding to the specified key.
+        If the key is not present in the hash table, null is returned.
+
+        Takes O(1) on average and O(n) for worst case.
+        """
+        hash, s = self._route(key)
+        with self.locks[s]:
+            value = self.segments[s].get_hashed(hash, key, _MISSING)
+        if value is _MISSING:
+            print(f"Key: {key} not found in hash table")
+            return
+        return value
+
+    def remove(self, key):
+        """
+        Removes and returns the entry {"key": key, "value": value} if present.
+
+        Takes O(1) on average and O(n) for worst case.
+        """
+        hash, s = self._route(key)
+        with self.locks[s]:
+            entry = self.segments[s].pop_hashed(hash, key)
+        if entry is None:
+            print(f"Key: {key} not found in hash table")
+        return entry
+
+    def keys(self):
+        """
+        Returns all keys in the hash table, locking one segment at a time
+        Takes O(n) time
+        """
+        keys_array = []
+        for lock, segment in zip(self.locks, self.segments):
+            with lock:
+                keys_array.extend(segment.keys())
+        return keys_array
+
+    def values(self):
+        """
+        Returns all values in the hash table, locking one segment at a time
+        Takes O(n) time
+        """
+        values_array = []
+        for lock, segment in zip(self.locks, self.segments):
+            with lock:
+                values_array.extend(segment.values())
+        return values_array
+
+
+if __name__ == "__main__":
+    h = ConcurrentHashTable(64, segments=4)
+    threads = [
+        threading.Thread(
+            target=lambda t=t: [h.set((t, i), i) for i in range(1000)]
+        )
+        for t in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    print(len(h.keys()), [segment.count for segment in h.segments])
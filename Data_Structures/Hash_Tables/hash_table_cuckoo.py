@@ -0,0 +1,307 @@
+"""
+Hash Table Implementation Using Cuckoo Hashing
+
+Open addressing with probing and separate chaining only give O(1) lookups on average: a lookup may have to
+walk a long probe sequence or chain. Cuckoo hashing bounds the work of every lookup instead.
+
+The slots are split into `ways` sub-tables (2 by default), each with its own hash function. A key can only
+live in one of its `ways` candidate slots, one per sub-table, so a lookup inspects at most `ways` slots
+plus a small stash and is O(1) in the worst case.
+
+Insertion places the key in a free candidate slot. If all candidates are taken, the key evicts the
+resident of one of them (like a cuckoo chick pushing an egg out of the nest) and the evicted entry moves
+to one of its own other candidates, possibly evicting another entry. The eviction chain is bounded by
+`max_evictions`. An entry still without a slot at the end of the chain is kept in the stash, a short
+list of at most `stash_size` entries that every lookup also checks. Only when the stash is full is the
+table rebuilt with new hash functions (and grown if a rebuild at the same size fails as well).
+
+The hash functions are derived from one base hash (pluggable, see hash_functions.py) by mixing a random
+seed per sub-table into it with fmix64, so new hash functions are drawn by drawing new seeds.
+
+Insertions fail often once the load passes about 50% with 2 ways, 91% with 3 ways and 97% with 4 ways,
+so the table grows by `growth_factor` once `max_capacity` (0.45 by default) of the slots are used.
+Tables with 3 or more ways can run with a much higher max_capacity.
+
+Keys and values are stored as given, they are not converted to strings.
+
+Key Operations:
+- `set(key, value)`: Inserts or updates a key-value pair in the hash table.
+- `get(key)`: Retrieves the value associated with a given key.
+- `remove(key)`: Removes a key-value pair from the hash table.
+- `get_keys()`: Returns a list of all keys, including the stash.
+- `get_values()`: Returns a list of all values, including the stash.
+- `occupancy()`: Returns the number of allocated slots against the number of live entries.
+- `_rebuild(size)`: Reinserts every entry with new hash functions.
+- `_check_capacity()`: Checks if the current capacity exceeds the maximum capacity and resizes if necessary.
+"""
+
+import random
+
+from .hash_functions import fmix64, resolve_hash_function
+
+# rebuilds with new hash functions before giving up on a key set
+MAX_REBUILDS = 16
+
+
+class HashTableCuckoo:
+    def __init__(
+        self,
+        size,
+        ways=2,
+        max_capacity=0.45,
+        hash_function=None,
+        max_evictions=32,
+        stash_size=4,
+        growth_factor=2,
+        seed=None,
+    ):
+        if ways < 2:
+            raise ValueError("cuckoo hashing needs at least two ways")
+        if growth_factor <= 1:
+            raise ValueError("growth_factor must be greater than 1")
+        self.ways = ways
+        self.max_capacity = max_capacity
+        self.max_evictions = max_evictions
+        self.stash_size = stash_size
+        self.growth_factor = growth_factor
+        # base hash of a key, the sub-table hash functions are derived from it
+        self.hash_function = resolve_hash_function(hash_function)
+        # draws the seeds of the hash functions and the victims of eviction chains
+        self.rng = random.Random(seed)
+        self.count = 0
+        self.evictions = 0
+        self.rebuilds = 0
+        self._reset_slots(size)
+
+    def _reset_slots(self, size):
+        """
+        Replaces the slots and the stash with empty ones of the given total size
+        and draws new hash functions.
+        Sub-table t owns the slots [t * table_size, (t + 1) * table_size).
+        """
+        self.table_size = max(-(-size // self.ways), 1)
+        self.size = self.table_size * self.ways
+        self.keys = [None] * self.size
+        self.values = [None] * self.size
+        self.stash_keys = []
+        self.stash_values = []
+        self.seeds = [fmix64(self.rng.getrandbits(64)) for _ in range(self.ways)]
+
+    def _slots(self, key):
+        """
+        Returns the candidate slot of key in every sub-table.
+        The key is hashed once and the hash is mixed with the seed of each sub-table.
+
+        Takes O(ways)
+        """
+        base_hash = self.hash_function(key)
+        m = self.table_size
+        return [t * m + fmix64(base_hash ^ seed) % m for t, seed in enumerate(self.seeds)]
+
+    def set(self, key, value):
+        """
+        Sets a new key value pair into the hash table or updates the value of an existing key.
+        After a new entry is added, the capacity is checked and resized if necessary.
+
+        Takes O(1) on average and O(max_evictions) for worst case
+        (plus an amortized rebuild when the stash overflows).
+        """
+        i = self._find(key)
+        if i is not None:
+            if i < self.size:
+                self.values[i] = value
+            else:
+                self.stash_values[i - self.size] = value
+            return
+        homeless = self._place(key, value)
+        if homeless is not None:
+            self._rebuild(self.size, homeless)
+        self.count += 1
+        self._check_capacity()
+
+    def _place(self, key, value):
+        """
+        Inserts an entry that is not in the table yet.
+        Follows an eviction chain of at most max_evictions steps. An entry left
+        without a slot goes into the stash.
+        Returns None on success, or the (key, value) entry that found no room
+        if the stash is full as well.
+
+        Takes O(1) on average and O(max_evictions) for worst case.
+        """
+        slots = self._slots(key)
+        for i in slots:
+            if self.keys[i] is None:
+                self.keys[i] = key
+                self.values[i] = value
+                return
+        i = self.rng.choice(slots)
+        for _ in range(self.max_evictions):
+            # the entry takes slot i and the resident becomes the entry to place
+            key, self.keys[i] = self.keys[i], key
+            value, self.values[i] = self.values[i], value
+            self.evictions += 1
+            alternatives = [j for j in self._slots(key) if j != i]
+            for j in alternatives:
+                if self.keys[j] is None:
+                    self.keys[j] = key
+                    self.values[j] = value
+                    return
+            i = self.rng.choice(alternatives)
+        if len(self.stash_keys) < self.stash_size:
+            self.stash_keys.append(key)
+            self.stash_values.append(value)
+            return
+        return key, value
+
+    def get(self, key):
+        """
+        Gets the value corresponding to the specified key and its slot.
+        Stash entries are reported at slots size, size + 1, ...
+        If the key is not present in the hash table, null is returned.
+
+        Takes O(1) in the worst case (ways slots and the stash are inspected).
+        """
+        i = self._find(key)
+        if i is None:
+            print("Key is not present in Hash Table")
+            return
+        if i < self.size:
+            return self.values[i], i
+        return self.stash_values[i - self.size], i
+
+    def _find(self, key):
+        """
+        Returns the slot holding key (size + j for the j-th stash entry)
+        or None if the key is not present.
+
+        Takes O(ways + stash_size)
+        """
+        for i in self._slots(key):
+            if self.keys[i] == key:
+                return i
+        for j, stash_key in enumerate(self.stash_keys):
+            if stash_key == key:
+                return self.size + j
+        return
+
+    def remove(self, key):
+        """
+        Removes key, value pair and returns the corresponding value if present.
+        A slot freed in the sub-tables is offered to the entries of the stash.
+
+        Takes O(1) in the worst case.
+        """
+        i = self._find(key)
+        if i is None:
+            print("Key is not present in Hash Table")
+            return
+        self.count -= 1
+        if i >= self.size:
+            j = i - self.size
+            self.stash_keys.pop(j)
+            return self.stash_values.pop(j)
+        deleted_value = self.values[i]
+        self.keys[i] = None
+        self.values[i] = None
+        self._drain_stash()
+        return deleted_value
+
+    def _drain_stash(self):
+        """
+        Moves every stash entry that has a free candidate slot back into the sub-tables
+
+        Takes O(stash_size * ways)
+        """
+        j = 0
+        while j < len(self.stash_keys):
+            key = self.stash_keys[j]
+            for i in self._slots(key):
+                if self.keys[i] is None:
+                    self.keys[i] = key
+                    self.values[i] = self.stash_values[j]
+                    self.stash_keys.pop(j)
+                    self.stash_values.pop(j)
+                    break
+            else:
+                j += 1
+
+    def _rebuild(self, size, *pending):
+        """
+        Reinserts every entry (and the pending (key, value) entries) into
+        empty slots of the given size with newly drawn hash functions.
+        If the entries do not fit, new hash functions are drawn again,
+        growing the table after every second failed attempt.
+
+        Takes O(n) time on average
+        """
+        entries = list(zip(self.get_keys(), self.get_values()))
+        entries.extend(pending)
+        for attempt in range(MAX_REBUILDS):
+            self.rebuilds += 1
+            self._reset_slots(size)
+            if all(self._place(key, value) is None for key, value in entries):
+                return
+            if attempt % 2 == 1:
+                size = int(size * self.growth_factor)
+        raise RuntimeError(
+            f"Could not place {len(entries)} entries after {MAX_REBUILDS} rebuilds, "
+            "too many keys share the same hash"
+        )
+
+    def get_keys(self):
+        """
+        Returns all keys in the hash table, including the stash
+
+        Takes O(n) time
+        """
+        keys_array = [key for key in self.keys if key is not None]
+        keys_array.extend(self.stash_keys)
+        return keys_array
+
+    def get_values(self):
+        """
+        Returns all values in the hash table, including the stash
+
+        Takes O(n) time
+        """
+        values_array = [
+            value for key, value in zip(self.keys, self.values) if key is not None
+        ]
+        values_array.extend(self.stash_values)
+        return values_array
+
+    def occupancy(self):
+        """
+        Returns the number of allocated slots against the number of live entries
+        and the number of entries in the stash.
+
+        Takes O(1)
+        """
+        return {
+            "slots": self.size,
+            "live_entries": self.count,
+            "stash": len(self.stash_keys),
+            "load_factor": self.count / self.size,
+        }
+
+    def _check_capacity(self):
+        """
+        Checks that current hash table capacity (slot filled)
+        is less than the maximum capacity.
+        If maximum capacity is exceeded, the hash table is rebuilt at a larger size
+        """
+        if self.count / self.size >= self.max_capacity:
+            print(
+                f"Capacity exceeded. Increasing Hash Table size by factor of {self.growth_factor}"
+            )
+            self._rebuild(int(self.size * self.growth_factor))
+
+
+if __name__ == "__main__":
+    h = HashTableCuckoo(10, seed=1)
+    for i in range(20):
+        h.set(f"route-{i}", i)
+    h.remove("route-3")
+    print(h.get("route-7"))
+    print(h.occupancy(), h.evictions, h.rebuilds)
@@ -0,0 +1,482 @@
+"""
+Integer to Integer Hash Map Using Linear Probing Over NumPy Arrays
+
+HashTableLinearProbe keeps its keys and values in python lists, so every entry costs two list pointers
+plus two int objects (about 80 bytes per entry with the empty slots), and every operation runs in the
+interpreter. Many hot tables only map int64 ids to int64 counters. IntHashMap stores such a table in two
+NumPy int64 arrays, `keys` and `values`, which cost 16 bytes per slot: about 20 to 30 bytes per entry
+between max_capacity (0.8 by default) and the load right after a growth by `growth_factor` (1.5 by
+default), and 16 / max_capacity bytes for a table sized once with `reserve` or `from_arrays`.
+
+An empty slot holds the key `EMPTY` (the smallest int64), which therefore cannot be used as a key. Keys
+are hashed with fmix64 of their 64 bits (computed with NumPy for whole arrays) and placed by linear
+probing. Removal shifts the following entries of the cluster back (as in Robin Hood mode of
+HashTableLinearProbe), so there are no tombstones.
+
+The batch operations take whole arrays of keys and process all of them per NumPy operation, one probe
+step at a time: every key that has not reached its slot yet moves to its next slot in the same step,
+so a batch takes as many steps as its longest probe sequence.
+- `get_many` / `contains_many` compare the keys of all pending slots at once and stop keys at a match or
+  an EMPTY slot.
+- `set_many` and `add_many` first combine repeated keys of the batch (the last value wins for set_many,
+  values are summed for add_many), update the keys that are present in place, grow the table at most once
+  and insert the new keys. When several new keys reach the same empty slot in a step, the first one takes
+  it and the others move on to the next slot.
+
+Requires NumPy.
+
+Key Operations:
+- `set(key, value)`, `add(key, value)`: Inserts or updates a pair, adds value to the value of key.
+- `get(key)`: Retrieves the value associated with a given key.
+- `remove(key)`: Removes a key-value pair from the hash table.
+- `set_many(keys, values)`, `add_many(keys, values)`: Sets or adds every pair of two arrays.
+- `get_many(keys, default)`, `contains_many(keys)`: Returns the value of every key, or whether it is present.
+- `remove_many(keys)`: Removes every key of an array.
+- `occupancy()`: Returns the number of allocated slots against the number of live entries.
+- `_rebuild(size)`: Reinserts every entry into arrays of the given size.
+"""
+
+import operator
+
+import numpy as np
+
+from .count_min_sketch import _fmix64_array
+from .hash_functions import MASK_64, fmix64
+
+EMPTY = np.iinfo(np.int64).min
+INT64_MAX = np.iinfo(np.int64).max
+# remove_many shifts entries one removal at a time below this share of the slots
+# and rebuilds the whole table above it
+REBUILD_SHARE = 1 / 64
+
+
+def _int_array(items, name):
+    """
+    Returns items as a one dimensional int64 array.
+    Raises TypeError if the items are not integers and ValueError if they do not fit in an int64.
+    """
+    array = np.asarray(items)
+    if array.size == 0:
+        return np.zeros(0, dtype=np.int64)
+    if array.dtype == object and all(isinstance(item, (int, np.integer)) for item in array.flat):
+        # python ints beyond 64 bits
+        raise ValueError(f"{name} must fit in an int64")
+    if array.dtype.kind not in "iu":
+        raise TypeError(f"{name} must be integers")
+    if array.dtype.kind == "u" and array.max() > INT64_MAX:
+        raise ValueError(f"{name} must fit in an int64")
+    return np.ascontiguousarray(array, dtype=np.int64).reshape(-1)
+
+
+def _int_scalar(item, name):
+    """
+    Returns item as a python int.
+    Raises TypeError if item is not an integer and ValueError if it does not fit in an int64.
+    """
+    item = operator.index(item)
+    if not EMPTY <= item <= INT64_MAX:
+        raise ValueError(f"{name} must fit in an int64")
+    return item
+
+
+class IntHashMap:
+    def __init__(self, size=16, max_capacity=0.8, growth_factor=1.5):
+        if growth_factor <= 1:
+            raise ValueError("growth_factor must be greater than 1")
+        if not 0 < max_capacity < 1:
+            raise ValueError("max_capacity must be between 0 and 1")
+        self.max_capacity = max_capacity
+        self.growth_factor = growth_factor
+        self.size = max(int(size), 2)
+        self.keys = np.full(self.size, EMPTY, dtype=np.int64)
+        self.values = np.zeros(self.size, dtype=np.int64)
+        self.count = 0
+
+    @classmethod
+    def from_arrays(cls, keys, values, max_capacity=0.8, **options):
+        """
+        Builds a map from an array of keys and an array of values.
+        The arrays are allocated once with room for every key.
+
+        Takes O(n) time on average for n pairs
+        """
+        keys = _int_array(keys, "keys")
+        table = cls(int(len(keys) / max_capacity) + 1, max_capacity, **options)
+        table.set_many(keys, values)
+        return table
+
+    def _home_slot(self, key):
+        """
+        Returns the first slot of the probe sequence of key
+
+        Takes O(1)
+        """
+        return fmix64(key & MASK_64) % self.size
+
+    def _home_slots(self, keys):
+        """
+        Returns the first slot of the probe sequence of every key of an int64 array
+
+        Takes O(n) time
+        """
+        return (_fmix64_array(keys.view(np.uint64)) % np.uint64(self.size)).astype(np.intp)
+
+    def _find(self, key):
+        """
+        Returns the slot of key, or None if key is not present
+
+        Takes O(1) on average
+        """
+        if key == EMPTY:
+            # would match the first empty slot
+            return None
+        keys = self.keys
+        i = self._home_slot(key)
+        while True:
+            stored = keys[i]
+            if stored == key:
+                return i
+            if stored == EMPTY:
+                return None
+            i += 1
+            if i == self.size:
+                i = 0
+
+    def _find_slots(self, keys):
+        """
+        Returns the slot of every key of an int64 array, -1 for keys that are not present.
+        All keys move one probe step per iteration.
+
+        Takes O(n) time on average for n keys
+        """
+        result = np.full(len(keys), -1, dtype=np.intp)
+        # EMPTY would match the first empty slot
+        active = np.flatnonzero(keys != EMPTY)
+        slots = self._home_slots(keys[active])
+        table_keys = self.keys
+        while active.size:
+            stored = table_keys[slots]
+            found = stored == keys[active]
+            result[active[found]] = slots[found]
+            pending = ~found & (stored != EMPTY)
+            active = active[pending]
+            slots = slots[pending] + 1
+            slots[slots == self.size] = 0
+        return result
+
+    def _insert_new(self, keys, values):
+        """
+        Inserts keys that are distinct and not present yet. The table must have room.
+        In every step the first of the keys that reached the same empty slot takes it.
+
+        Takes O(n) time on average for n keys
+        """
+        active = np.arange(len(keys))
+        slots = self._home_slots(keys)
+        table_keys = self.keys
+        while active.size:
+            free = np.flatnonzero(table_keys[slots] == EMPTY)
+            if free.size:
+                free_slots, first = np.unique(slots[free], return_index=True)
+                winners = active[free[first]]
+                table_keys[free_slots] = keys[winners]
+                self.values[free_slots] = values[winners]
+                pending = np.ones(active.size, dtype=bool)
+                pending[free[first]] = False
+                active = active[pending]
+                slots = slots[pending]
+            slots = slots + 1
+            slots[slots == self.size] = 0
+        self.count += len(keys)
+
+    def _check_key(self, key):
+        """
+        Returns key as a python int.
+        Raises TypeError for keys that are not integers and ValueError for EMPTY
+        or keys that do not fit in an int64.
+        """
+        key = _int_scalar(key, "keys")
+        if key == EMPTY:
+            raise ValueError(f"{EMPTY} marks empty slots and cannot be used as a key")
+        return key
+
+    def set(self, key, value):
+        """
+        Inserts the key, value pair or updates the value of key
+
+        Takes O(1) on average
+        """
+        key = self._check_key(key)
+        value = _int_scalar(value, "values")
+        i = self._find(key)
+        if i is None:
+            self._check_capacity(1)
+            i = self._home_slot(key)
+            while self.keys[i] != EMPTY:
+                i = (i + 1) % self.size
+            self.keys[i] = key
+            self.count += 1
+        self.values[i] = value
+
+    def add(self, key, value=1):
+        """
+        Adds value to the value of key (a missing key counts as 0) and returns the new value
+
+        Takes O(1) on average
+        """
+        key = self._check_key(key)
+        value = _int_scalar(value, "values")
+        i = self._find(key)
+        if i is None:
+            self.set(key, value)
+            return value
+        self.values[i] += value
+        return int(self.values[i])
+
+    def get(self, key):
+        """
+        Gets the value corresponding to the specified key.
+        If the key is not present in the hash table, null is returned.
+
+        Takes O(1) on average and O(n) for worst case.
+        """
+        i = self._find(operator.index(key))
+        if i is None:
+            print("Key is not present in Hash Table")
+            return
+        return int(self.values[i]), i
+
+    def remove(self, key):
+        """
+        Removes key, value pair and returns the corresponding value if present.
+        The following entries of the cluster are shifted back into the gap.
+
+        Takes O(1) on average and O(n) for worst case.
+        """
+        i = self._find(operator.index(key))
+        if i is None:
+            print("Key is not present in Hash Table")
+            return
+        deleted_value = int(self.values[i])
+        self._delete_slot(i)
+        return deleted_value
+
+    def _delete_slot(self, i):
+        """
+        Empties slot i and moves back every following entry of the cluster
+        whose probe sequence passes the gap
+
+        Takes O(cluster length)
+        """
+        keys, values = self.keys, self.values
+        j = i
+        while True:
+            j = (j + 1) % self.size
+            key = keys[j]
+            if key == EMPTY:
+                break
+            home = self._home_slot(int(key))
+            # the entry stays if its home slot lies after the gap, up to j (cyclically)
+            if (i < home <= j) if i <= j else (home > i or home <= j):
+                continue
+            keys[i] = key
+            values[i] = values[j]
+            i = j
+        keys[i] = EMPTY
+        values[i] = 0
+        self.count -= 1
+
+    def __contains__(self, key):
+        return self._find(operator.index(key)) is not None
+
+    def __len__(self):
+        return self.count
+
+    def set_many(self, keys, values):
+        """
+        Sets every pair keys[i], values[i]. values may also be a single value for every key.
+        For a key that appears more than once the last value is kept.
+        The table is resized at most once.
+
+        Takes O(n log n) time for n keys (combining repeated keys sorts them)
+        """
+        keys = _int_array(keys, "keys")
+        if np.ndim(values):
+            values = _int_array(values, "values")
+        else:
+            values = _int_scalar(values, "values")
+        values = np.broadcast_to(np.asarray(values, dtype=np.int64), keys.shape)
+        if (keys == EMPTY).any():
+            raise ValueError(f"{EMPTY} marks empty slots and cannot be used as a key")
+        # np.unique keeps the first occurrence, so the keys are reversed to keep the last one
+        keys, last = np.unique(keys[::-1], return_index=True)
+        values = values[::-1][last]
+        self._update_or_insert(keys, values, add=False)
+
+    def add_many(self, keys, values=1):
+        """
+        Adds values[i] (or the single value) to the value of keys[i] for every i.
+        Missing keys count as 0 and repeated keys add up.
+        The table is resized at most once.
+
+        Takes O(n log n) time for n keys (combining repeated keys sorts them)
+        """
+        keys = _int_array(keys, "keys")
+        if (keys == EMPTY).any():
+            raise ValueError(f"{EMPTY} marks empty slots and cannot be used as a key")
+        keys, inverse = np.unique(keys, return_inverse=True)
+        sums = np.zeros(len(keys), dtype=np.int64)
+        if np.ndim(values):
+            np.add.at(sums, inverse.reshape(-1), _int_array(values, "values"))
+        else:
+            np.add.at(sums, inverse.reshape(-1), _int_scalar(values, "values"))
+        self._update_or_insert(keys, sums, add=True)
+
+    def _update_or_insert(self, keys, values, add):
+        """
+        Updates the distinct keys that are present and inserts the others,
+        growing the table once if they do not fit
+
+        Takes O(n) time on average for n keys
+        """
+        slots = self._find_slots(keys)
+        present = slots >= 0
+        if add:
+            self.values[slots[present]] += values[present]
+        else:
+            self.values[slots[present]] = values[present]
+        new = ~present
+        if new.any():
+            self._check_capacity(int(new.sum()))
+            self._insert_new(keys[new], values[new])
+
+    def get_many(self, keys, default=0):
+        """
+        Returns an int64 array with the value of every key of an array.
+        Keys that are not present give default.
+
+        Takes O(n) time on average for n keys
+        """
+        keys = _int_array(keys, "keys")
+        slots = self._find_slots(keys)
+        present = slots >= 0
+        result = np.full(len(keys), default, dtype=np.int64)
+        result[present] = self.values[slots[present]]
+        return result
+
+    def contains_many(self, keys):
+        """
+        Returns a bool array telling for every key of an array whether it is present
+
+        Takes O(n) time on average for n keys
+        """
+        return self._find_slots(_int_array(keys, "keys")) >= 0
+
+    def remove_many(self, keys):
+        """
+        Removes every key of an array that is present and returns the number of removed keys.
+        Few removals shift entries back one by one, many rebuild the table at its size.
+
+        Takes O(n) time on average for n keys, O(size) when the table is rebuilt
+        """
+        slots = self._find_slots(np.unique(_int_array(keys, "keys")))
+        slots = slots[slots >= 0]
+        if len(slots) < REBUILD_SHARE * self.size:
+            for key in self.keys[slots].tolist():
+                self._delete_slot(self._find(key))
+        else:
+            self.keys[slots] = EMPTY
+            self.values[slots] = 0
+            self._rebuild(self.size)
+        return len(slots)
+
+    def _check_capacity(self, new_entries):
+        """
+        Grows the table by growth_factor (or more if needed) so that new_entries more
+        entries stay within max_capacity
+
+        Takes O(n) time if the table grows and O(1) otherwise
+        """
+        required = self.count + new_entries
+        if required > self.max_capacity * self.size:
+            grown_size = int(self.size * self.growth_factor)
+            self._rebuild(max(grown_size, int(required / self.max_capacity) + 1))
+
+    def reserve(self, n):
+        """
+        Grows the table once so that n entries fit without another resize.
+
+        Takes O(n) time if the table has to grow and O(1) otherwise
+        """
+        required_size = int(n / self.max_capacity) + 1
+        if required_size > self.size:
+            self._rebuild(required_size)
+
+    def _rebuild(self, size):
+        """
+        Reinserts every entry into new arrays of the given size
+
+        Takes O(n) time
+        """
+        full = self.keys != EMPTY
+        keys, values = self.keys[full], self.values[full]
+        self.size = size
+        self.keys = np.full(size, EMPTY, dtype=np.int64)
+        self.values = np.zeros(size, dtype=np.int64)
+        self.count = 0
+        self._insert_new(keys, values)
+
+    def get_keys(self):
+        """
+        Returns all keys in the hash table as an int64 array
+
+        Takes O(size) time
+        """
+        return self.keys[self.keys != EMPTY]
+
+    def get_values(self):
+        """
+        Returns all values in the hash table as an int64 array, in the order of get_keys()
+
+        Takes O(size) time
+        """
+        return self.values[self.keys != EMPTY]
+
+    def items(self):
+        """
+        Yields every (key, value) pair as python ints
+
+        Takes O(size) time
+        """
+        full = self.keys != EMPTY
+        return zip(self.keys[full].tolist(), self.values[full].tolist())
+
+    def occupancy(self):
+        """
+        Returns the number of allocated slots against the number of live entries
+        and the bytes used per entry.
+
+        Takes O(1)
+        """
+        return {
+            "slots": self.size,
+            "live_entries": self.count,
+            "load_factor": self.count / self.size,
+            "bytes_per_entry": self.memory_bytes() / max(self.count, 1),
+        }
+
+    def memory_bytes(self):
+        """
+        Returns the memory used by the key and value arrays
+
+        Takes O(1)
+        """
+        return self.keys.nbytes + self.values.nbytes
+
+
+if __name__ == "__main__":
+    counters = IntHashMap()
+    events = np.random.default_rng(0).integers(0, 10_000, 100_000)
+    counters.add_many(events)
+    print(counters.get(int(events[0])), counters.get_many(events[:5]), counters.occupancy())
+    counters.get(-1)
@@ -0,0 +1,400 @@
+"""
+Memory-Mapped Persistent Hash Table Using Linear Probing
+
+HashTableLinearProbe lives in python lists, so a large table has to be rebuilt with one set() per entry
+every time a process starts. This table keeps its slots in a file that is mapped into memory with `mmap`.
+Opening an existing table only reads a small header, the slots are paged in by the OS on first access,
+and processes that map the same file share the same pages of the page cache.
+
+File layout:
+- Header (64 bytes): magic, format version, key size, number of slots, number of entries, number of
+  tombstones and the end of the value heap.
+- Slots: fixed-width records of `1 + key_size + 8 + 4` bytes: a state byte (empty, full or tombstone),
+  the key, and the offset and length of the value in the value heap.
+- Value heap: the value bytes, addressed by the offsets stored in the slots. The file grows when the
+  heap is full.
+
+Keys are fixed-size: bytes (or str, encoded as utf-8) of exactly `key_size` bytes. Values are bytes of any
+length. An update writes the new value over the old one if it fits and appends it to the heap otherwise.
+Space of overwritten and removed values is reclaimed whenever the table is rebuilt.
+
+Collisions are resolved with linear probing and deletions leave tombstones, like HashTableLinearProbe.
+Slot positions have to be the same in every process, so keys are placed with `stable_hash` (a hash
+function passed instead must be just as stable). When the used slots reach `max_capacity` the table is
+rebuilt into a new file, which then replaces the old file. The new file has `growth_factor` times the
+slots, unless tombstones make up at least half of the used slots: then it keeps the same number of slots,
+so inserts and removals of a stable number of keys do not grow the file.
+
+With `read_only=True` the file is mapped read-only and set/remove raise io.UnsupportedOperation. Any
+number of read-only tables can use the same file concurrently. Readers must not share the file with a
+writer: a reader keeps the mapping it opened, so it does not see the writes to a grown (replaced) file,
+and it may observe a slot in the middle of a write.
+
+Key Operations:
+- `set(key, value)`: Inserts or updates a key-value pair in the hash table.
+- `get(key)`: Retrieves the value associated with a given key.
+- `remove(key)`: Removes a key-value pair from the hash table.
+- `get_keys()`: Returns a list of all keys.
+- `get_values()`: Returns a list of all values.
+- `occupancy()`: Returns the number of allocated slots against the number of live entries.
+- `flush()`: Writes the changes of the mapping back to the file.
+- `close()`: Flushes and unmaps the file.
+- `_rebuild(slots)`: Copies every entry into a new file with the given number of slots.
+- `_check_capacity()`: Checks if the current capacity exceeds the maximum capacity and resizes if necessary.
+"""
+
+import io
+import mmap
+import os
+import struct
+
+from .hash_functions import resolve_hash_function, stable_hash
+
+MAGIC = b"HTMM"
+VERSION = 1
+# magic, version, key size, slots, entries, tombstones, heap end
+HEADER = struct.Struct("<4sIIQQQQ")
+HEADER_SIZE = 64
+# offset and length of the value of a slot
+VALUE_REF = struct.Struct("<QI")
+
+EMPTY = 0
+FULL = 1
+TOMBSTONE = 2
+
+
+class HashTableMmap:
+    def __init__(
+        self,
+        path,
+        key_size=None,
+        size=1024,
+        max_capacity=0.75,
+        growth_factor=2,
+        read_only=False,
+        hash_function=stable_hash,
+    ):
+        if growth_factor <= 1:
+            raise ValueError("growth_factor must be greater than 1")
+        self.path = path
+        self.max_capacity = max_capacity
+        self.growth_factor = growth_factor
+        self.read_only = read_only
+        self.hash_function = resolve_hash_function(hash_function)
+        if not os.path.exists(path):
+            if read_only:
+                raise FileNotFoundError(path)
+            if key_size is None:
+                raise ValueError("key_size is required to create a table")
+            self._create(path, key_size, size)
+        self._open()
+        if key_size is not None and key_size != self.key_size:
+            self.close()
+            raise ValueError(f"table has key_size {self.key_size}, not {key_size}")
+
+    @staticmethod
+    def _create(path, key_size, slots, heap_size=4096):
+        """
+        Writes an empty table with the given number of slots to path.
+        Empty slots are all zero bytes, so the file only needs the header and a length.
+        """
+        slot_size = 1 + key_size + VALUE_REF.size
+        heap_start = HEADER_SIZE + slots * slot_size
+        with open(path, "wb") as file:
+            file.write(HEADER.pack(MAGIC, VERSION, key_size, slots, 0, 0, heap_start))
+            file.truncate(heap_start + heap_size)
+
+    def _open(self):
+        """
+        Maps the file and reads the header
+        """
+        self.file = open(self.path, "rb" if self.read_only else "r+b")
+        access = mmap.ACCESS_READ if self.read_only else mmap.ACCESS_WRITE
+        self.mm = mmap.mmap(self.file.fileno(), 0, access=access)
+        magic, version, key_size, slots, count, tombstones, heap_end = HEADER.unpack_from(
+            self.mm
+        )
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f"{self.path} is not a memory-mapped hash table")
+        self.key_size = key_size
+        self.slot_size = 1 + key_size + VALUE_REF.size
+        self.size = slots
+        self.count = count
+        self.tombstones = tombstones
+        self.heap_end = heap_end
+
+    def _write_header(self):
+        HEADER.pack_into(
+            self.mm,
+            0,
+            MAGIC,
+            VERSION,
+            self.key_size,
+            self.size,
+            self.count,
+            self.tombstones,
+            self.heap_end,
+        )
+
+    def _check_writable(self):
+        if self.read_only:
+            raise io.UnsupportedOperation("hash table was opened read-only")
+
+    def _encode_key(self, key):
+        """
+        Returns key as bytes of exactly key_size bytes
+        """
+        if isinstance(key, str):
+            key = key.encode()
+        key = bytes(key)
+        if len(key) != self.key_size:
+            raise ValueError(f"keys must be {self.key_size} bytes, got {len(key)}")
+        return key
+
+    def _slot_offset(self, i):
+        return HEADER_SIZE + i * self.slot_size
+
+    def _find(self, key):
+        """
+        Returns (slot, first tombstone slot) of key. The slot is None if the key is
+        not present, the tombstone slot is None if no tombstone preceded it.
+
+        Takes O(1) on average and O(n) for worst case.
+        """
+        i = self.hash_function(key) % self.size
+        first_tombstone = None
+        mm = self.mm
+        for _ in range(self.size):
+            offset = self._slot_offset(i)
+            state = mm[offset]
+            if state == EMPTY:
+                return None, first_tombstone
+            if state == TOMBSTONE:
+                if first_tombstone is None:
+                    first_tombstone = i
+            elif mm[offset + 1 : offset + 1 + self.key_size] == key:
+                return i, first_tombstone
+            i = (i + 1) % self.size
+        return None, first_tombstone
+
+    def _value_ref(self, i):
+        return VALUE_REF.unpack_from(self.mm, self._slot_offset(i) + 1 + self.key_size)
+
+    def _read_value(self, i):
+        value_offset, length = self._value_ref(i)
+        return self.mm[value_offset : value_offset + length]
+
+    def _append_value(self, value):
+        """
+        Appends value to the value heap and returns its offset.
+        The file is doubled in size when the heap is full.
+
+        Takes O(len(value)), amortized
+        """
+        end = self.heap_end + len(value)
+        if end > len(self.mm):
+            self.mm.resize(max(end, 2 * len(self.mm)))
+        self.mm[self.heap_end : end] = value
+        value_offset = self.heap_end
+        self.heap_end = end
+        return value_offset
+
+    def set(self, key, value):
+        """
+        Sets a new key value pair into the hash table or updates the value of an existing key.
+        Keys are bytes or str of key_size bytes, values are bytes.
+
+        Takes O(1) on average and O(n) for worst case.
+        """
+        self._check_writable()
+        key = self._encode_key(key)
+        value = bytes(value)
+        i, first_tombstone = self._find(key)
+        if i is not None:
+            value_offset, length = self._value_ref(i)
+            if len(value) <= length:
+                # the new value fits in the space of the old one
+                self.mm[value_offset : value_offset + len(value)] = value
+            else:
+                value_offset = self._append_value(value)
+            VALUE_REF.pack_into(
+                self.mm, self._slot_offset(i) + 1 + self.key_size, value_offset, len(value)
+            )
+            self._write_header()
+            return
+        self._insert(key, value, first_tombstone)
+        self._check_capacity()
+
+    def _insert(self, key, value, first_tombstone):
+        """
+        Writes a key that is not in the table into the first tombstone of its
+        probe sequence, or into the empty slot that ended the probe sequence.
+
+        Takes O(1) on average and O(n) for worst case.
+        """
+        if first_tombstone is not None:
+            i = first_tombstone
+            self.tombstones -= 1
+        else:
+            i = self.hash_function(key) % self.size
+            while self.mm[self._slot_offset(i)] != EMPTY:
+                i = (i + 1) % self.size
+        value_offset = self._append_value(value)
+        offset = self._slot_offset(i)
+        self.mm[offset] = FULL
+        self.mm[offset + 1 : offset + 1 + self.key_size] = key
+        VALUE_REF.pack_into(self.mm, offset + 1 + self.key_size, value_offset, len(value))
+        self.count += 1
+        self._write_header()
+
+    def get(self, key):
+        """
+        Gets the value corresponding to the specified key and its slot.
+        If the key is not present in the hash table, null is returned.
+
+        Takes O(1) on average and O(n) for worst case.
+        """
+        i, _ = self._find(self._encode_key(key))
+        if i is None:
+            print("Key is not present in Hash Table")
+            return
+        return self._read_value(i), i
+
+    def remove(self, key):
+        """
+        Removes key, value pair and returns the corresponding value if present.
+        The slot becomes a tombstone.
+
+        Takes O(1) on average and O(n) for worst case.
+        """
+        self._check_writable()
+        i, _ = self._find(self._encode_key(key))
+        if i is None:
+            print("Key is not present in Hash Table")
+            return
+        deleted_value = self._read_value(i)
+        self.mm[self._slot_offset(i)] = TOMBSTONE
+        self.count -= 1
+        self.tombstones += 1
+        self._write_header()
+        return deleted_value
+
+    def _full_slots(self):
+        """
+        Yields every slot that holds an entry
+
+        Takes O(n) time
+        """
+        for i in range(self.size):
+            if self.mm[self._slot_offset(i)] == FULL:
+                yield i
+
+    def get_keys(self):
+        """
+        Returns all keys in the hash table
+
+        Takes O(n) time
+        """
+        return [
+            self.mm[self._slot_offset(i) + 1 : self._slot_offset(i) + 1 + self.key_size]
+            for i in self._full_slots()
+        ]
+
+    def get_values(self):
+        """
+        Returns all values in the hash table
+
+        Takes O(n) time
+        """
+        return [self._read_value(i) for i in self._full_slots()]
+
+    def occupancy(self):
+        """
+        Returns the number of allocated slots against the number of live entries,
+        and the number of bytes used by the value heap.
+
+        Takes O(1)
+        """
+        return {
+            "slots": self.size,
+            "live_entries": self.count,
+            "tombstones": self.tombstones,
+            "load_factor": self.count / self.size,
+            "heap_bytes": self.heap_end - self._slot_offset(self.size),
+        }
+
+    def _rebuild(self, slots):
+        """
+        Copies every live entry into a new file with the given number of slots,
+        then replaces the old file with it. Tombstones and the space of
+        overwritten and removed values are dropped.
+
+        Takes O(n) time
+        """
+        tmp_path = self.path + ".tmp"
+        heap_size = max(self.heap_end - self._slot_offset(self.size), 4096)
+        self._create(tmp_path, self.key_size, slots, heap_size)
+        new = HashTableMmap(
+            tmp_path,
+            max_capacity=self.max_capacity,
+            growth_factor=self.growth_factor,
+            hash_function=self.hash_function,
+        )
+        for key, value in zip(self.get_keys(), self.get_values()):
+            new._insert(key, value, None)
+        new.close()
+        self.close()
+        os.replace(tmp_path, self.path)
+        self._open()
+
+    def _check_capacity(self):
+        """
+        Checks that current hash table capacity (entries and tombstones)
+        is less than the maximum capacity.
+        If maximum capacity is exceeded, the hash table is rebuilt with more slots,
+        or with the same slots if tombstones make up at least half of the used slots
+        """
+        if self.count + self.tombstones >= self.max_capacity * self.size:
+            if self.tombstones >= self.count:
+                # clearing the tombstones is enough, the live entries fill at most half of max_capacity
+                self._rebuild(self.size)
+                return
+            print(
+                f"Capacity exceeded. Increasing Hash Table size by factor of {self.growth_factor}"
+            )
+            self._rebuild(int(self.size * self.growth_factor))
+
+    def flush(self):
+        """
+        Writes the changes of the mapping back to the file
+        """
+        if not self.read_only:
+            self.mm.flush()
+
+    def close(self):
+        """
+        Flushes and unmaps the file. The table cannot be used afterwards.
+        """
+        if not self.mm.closed:
+            self.flush()
+            self.mm.close()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+if __name__ == "__main__":
+    import tempfile
+
+    path = os.path.join(tempfile.mkdtemp(), "table.htmm")
+    with HashTableMmap(path, key_size=8, size=4) as h:
+        for i in range(10):
+            h.set(i.to_bytes(8, "little"), f"value {i}".encode())
+        h.remove((3).to_bytes(8, "little"))
+    with HashTableMmap(path, read_only=True) as h:
+        print(h.get((7).to_bytes(8, "little")), h.occupancy())
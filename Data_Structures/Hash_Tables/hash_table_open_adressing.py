@@ -12,12 +12,44 @@ is crucial to maintaining the efficiency of the hash table operations.
 Tombstones are dummy objects used to mark the position of deleted elements in the hash table. They indicate 
 that a slot was previously occupied but is now available for insertion. Using tombstones helps in maintaining 
 the performance of the hash table by ensuring that search operations do not terminate prematurely when they 
-encounter a deleted slot.
+encounter a deleted slot. All deletions share the single TOMBSTONE object.
 
-Other methods to implement open addressing include:
-- Double hashing
-- Quadratic probing
-- Pseudo random number generation
+Tombstones are counted. They still occupy their slot, so they count towards the capacity, but once they
+make up `tombstone_ratio` (0.25 by default) of the slots the table is rehashed in place at the same size,
+which clears every tombstone without growing the table.
+
+Shrinking is opt-in with `shrink_threshold`. Once removals bring the live entries below
+`shrink_threshold * size`, the table is rebuilt at the size that puts its load factor at half of
+`max_capacity` (never below its initial size). The threshold has to be lower than the load factor right
+after a growth. That load factor can still end up below the threshold, because quadratic probing and
+double hashing round the size up to a power of two and a resize drops the tombstones that counted towards
+the capacity, so a table only shrinks once its live load factor has reached the threshold since the last
+resize. Alternating inserts and removals therefore cannot resize it back and forth (hysteresis).
+
+Robin Hood mode (`robin_hood=True`) keeps the probe distance of every entry. On insertion an entry that
+is further from its home slot than the resident entry takes the slot and the resident continues probing
+("take from the rich, give to the poor"). This keeps the variance of probe lengths low and allows a lookup
+to stop as soon as it meets an entry closer to home than the key would be. Removal uses backward-shift
+deletion: the entries following the removed one are shifted back by one slot until an empty slot or an
+entry at its home slot is reached. No tombstones are ever written, so probe sequences do not degrade
+under insert/delete churn.
+
+The probe sequence is selectable with `probing`:
+- "linear": P(x) = x. Simple and cache friendly but builds long clusters of occupied slots at high load.
+- "quadratic": P(x) = (x^2 + x) / 2. The table size is kept a power of two, for which this sequence
+  visits every slot before repeating. Breaks up primary clustering.
+- "double": P(x) = x * H2(k). The step H2(k) is taken from the high bits of the hash and forced odd, so it
+  is co-prime with the power of two table size and every slot is reachable. Keys with the same home slot
+  follow different probe sequences, which also removes secondary clustering.
+
+Another method to implement open addressing is pseudo random number generation.
+
+Iterating with `for key in table` or `table.items()` walks the slot arrays lazily. Every operation that
+adds, removes or moves an entry (including the migration steps of an incremental resize) changes the
+table's version, and an iterator raises RuntimeError on its next step if the version changed since it
+started, like iterating over a dict that changes size. While an iterator is live, lookups neither move
+their key into an earlier tombstone nor run migration steps of an incremental resize, so reading the
+table during an iteration is allowed.
 
 Key Operations:
 - `set(key, value)`: Inserts or updates a key-value pair in the hash table.
@@ -25,10 +57,72 @@ Key Operations:
 - `remove(key)`: Removes a key-value pair from the hash table.
 - `get_keys()`: Returns a list of all non-null and non-Tombstone keys.
 - `get_values()`: Returns a list of all non-null values.
-- `_increase_size(resize_factor)`: Increases the size of the hash table.
+- `__iter__()`, `items()`: Lazily yield the keys / (key, value) pairs without building a list.
+- `__len__()`: Returns the number of entries in O(1) from the slot counters.
+- `__contains__(key)`: Returns whether key is present, without reporting a missing key.
+- `set_many(pairs)`, `get_many(keys)`, `remove_many(keys)`: Batch versions of set, get and remove.
+- `reserve(n)`: Grows the table once so that n entries fit without another resize.
+- `occupancy()`: Returns the number of allocated slots against the number of live entries.
+- `stats()`: Returns probe length histograms, resize counters and load metrics (with `stats=True`).
+- `from_iterable(pairs)`: Builds a table sized for an iterable of (key, value) pairs.
+- `dump(path)`, `load(path)`: Writes the table to a binary snapshot file and restores it (see hash_table_snapshot.py).
+- `bucket_histogram()`: Returns a histogram of how many keys hash to each bucket.
+- `probe_length_histogram()`: Returns a histogram of how many probe steps it takes to reach each key.
+- `_increase_size(resize_factor)`: Increases the size of the hash table by resize_factor.
 - `_check_capacity()`: Checks if the current capacity exceeds the maximum capacity and resizes if necessary.
+
+Resizing normally rebuilds the whole table inside the set() that crossed the maximum capacity. With
+`incremental_resize=True` the table resizes progressively (like the rehash of Redis dictionaries): the old
+and the new slot arrays coexist, every set/get/remove migrates `rehash_step` old slots into the new arrays
+and lookups check both arrays until the migration is finished. The table grows by `growth_factor` (10 by
+default) each time.
+
+The hash function is pluggable (see hash_functions.py). By default keys are hashed with the native
+hash() followed by a 64-bit finalizer.
+
+Most lookups of some workloads are for keys that are not present, and an unsuccessful lookup walks the
+whole probe sequence of the key up to an empty slot. With `bloom_filter="standard"` or
+`bloom_filter="counting"` the table keeps a Bloom filter of the full hashes of its keys (see
+bloom_filter.py) sized for the entries at which the table grows and `bloom_error_rate` false positives,
+and a lookup whose hash is not in the filter returns without probing. A standard filter cannot forget
+removed keys, so they stay false positives until the filter is rebuilt, which happens on every resize
+and in-place rehash and once the filter has seen more adds than its capacity. A counting filter removes
+keys as well, at one byte instead of one bit per position. get() and remove() return None without the
+message for a missing key when the filter rules it out, so only false positives and keys that passed the
+filter are reported; `__contains__` tests for a key without any message.
+
+With `stats=True` the table records a histogram of the slots inspected by every lookup and insert, the
+number of resizes and the time spent resizing (see hash_table_stats.py); `on_resize` is called with every
+resize and turns stats on as well. Without them nothing is recorded.
+
+By default keys and values are converted to strings before they are stored, so set(1, 2) stores "1" and
+"2". Typed mode (`typed=True`) stores the original objects instead: keys keep their own hash() and
+equality, values are returned unchanged and no string is ever built. The full hash of every key is
+cached next to it, so a probe only calls `==` on keys whose cached hash matches, and a resize moves
+entries by their cached hash without hashing any key again.
 """
 
+import time
+
+from .bloom_filter import BLOOM_FILTERS
+from .hash_functions import histogram, resolve_hash_function
+from .hash_table_snapshot import (
+    gc_paused,
+    hash_fingerprint,
+    read_snapshot,
+    write_snapshot,
+)
+from .hash_table_stats import TableStats
+
+PROBING_STRATEGIES = ("linear", "quadratic", "double")
+
+
+def _next_power_of_two(n):
+    """
+    Returns the smallest power of two greater than or equal to n
+    """
+    return 1 << max(n - 1, 0).bit_length()
+
 
 class Tombstone:
     """
@@ -39,14 +133,82 @@ class Tombstone:
         pass
 
 
+# shared by every deleted slot, compared by identity
+TOMBSTONE = Tombstone()
+
+
 class HashTableLinearProbe:
-    def __init__(self, size, max_capacity=0.75):
-        self.size = size
+    def __init__(
+        self,
+        size,
+        max_capacity=0.75,
+        hash_function=None,
+        robin_hood=False,
+        probing="linear",
+        growth_factor=10,
+        incremental_resize=False,
+        rehash_step=4,
+        tombstone_ratio=0.25,
+        shrink_threshold=None,
+        typed=False,
+        bloom_filter=None,
+        bloom_error_rate=0.01,
+        stats=False,
+        on_resize=None,
+    ):
+        if probing not in PROBING_STRATEGIES:
+            raise ValueError(f"probing must be one of {PROBING_STRATEGIES}")
+        if bloom_filter is not None and bloom_filter not in BLOOM_FILTERS:
+            raise ValueError(f"bloom_filter must be None or one of {tuple(BLOOM_FILTERS)}")
+        if robin_hood and probing != "linear":
+            raise ValueError("Robin Hood hashing requires linear probing")
+        if growth_factor <= 1:
+            raise ValueError("growth_factor must be greater than 1")
+        if shrink_threshold is not None and shrink_threshold >= min(
+            max_capacity / growth_factor, max_capacity / 2
+        ):
+            raise ValueError(
+                "shrink_threshold must be below max_capacity / growth_factor and max_capacity / 2"
+            )
+        self.probing = probing
+        self.size = self._table_size(size)
         # empty slots include null slots only and do not include tombstones
         self.empty_slots = self.size
+        self.tombstones = 0
+        # share of tombstone slots that triggers an in-place rehash, None disables it
+        self.tombstone_ratio = tombstone_ratio
         self.keys = [None] * self.size
         self.values = [None] * self.size
+        # typed mode keeps keys and values as given and caches the full hash of each key
+        self.typed = typed
+        self.hashes = [None] * self.size if typed else None
         self.max_capacity = max_capacity
+        self.growth_factor = growth_factor
+        # live load factor that triggers a shrink, None disables shrinking
+        self.shrink_threshold = shrink_threshold
+        # set once the live load factor reached shrink_threshold after the last resize
+        self._shrink_armed = False
+        self.min_size = self.size
+        # any callable key -> int, defaults to native hash() + finalizer
+        self.hash_function = resolve_hash_function(hash_function)
+        self.robin_hood = robin_hood
+        # probe distance of the entry in each slot from its home slot (robin hood only)
+        self.distances = [0] * self.size if robin_hood else None
+        # incremental resize: old table being migrated into this one and the next old slot to migrate
+        self.incremental_resize = incremental_resize
+        self.rehash_step = rehash_step
+        self._rehash_source = None
+        self._rehash_index = 0
+        # incremented whenever entries are added, removed or moved, checked by iterators
+        self._version = 0
+        # number of live iterators, lookups do not relocate keys or migrate slots while it is not 0
+        self._iterators = 0
+        # Bloom filter of the full hashes of the keys in the slot arrays, None if disabled
+        self.bloom_filter = bloom_filter
+        self.bloom_error_rate = bloom_error_rate
+        self.bloom = self._new_bloom_filter() if bloom_filter is not None else None
+        # recorded probe lengths and resizes, None unless stats are enabled
+        self._stats = TableStats(on_resize) if stats or on_resize is not None else None
 
     def _hash(self, key):
         """
@@ -56,11 +218,81 @@ class HashTableLinearProbe:
 
         Takes O(1)
         """
-        key = str(key)
-        char_sum = 0
-        for char in key:
-            char_sum += ord(char)
-        return char_sum % self.size
+        return self._full_hash(key) % self.size
+
+    def _full_hash(self, key):
+        """
+        Returns the hash of key before it is reduced to a slot.
+        Keys are stored as strings unless the table is typed,
+        so the string form of the key is hashed.
+
+        Takes O(1)
+        """
+        if self.typed:
+            return self.hash_function(key)
+        return self.hash_function(str(key))
+
+    def _entry_hash(self, i):
+        """
+        Returns the full hash of the key in slot i, from the cache in typed mode.
+
+        Takes O(1)
+        """
+        if self.hashes is not None:
+            return self.hashes[i]
+        return self._full_hash(self.keys[i])
+
+    def _is_key(self, i, key, full_hash):
+        """
+        Checks whether slot i holds key. In typed mode the cached hash is
+        compared first so that == is only called on likely matches.
+
+        Takes O(1)
+        """
+        if self.hashes is not None and self.hashes[i] != full_hash:
+            return False
+        return self.keys[i] == key
+
+    def _hash_and_step(self, key):
+        """
+        Returns the home slot of the key and the step of its probe sequence.
+
+        Takes O(1)
+        """
+        return self._slot_and_step(self._full_hash(key))
+
+    def _slot_and_step(self, full_hash):
+        """
+        Returns the home slot and the probe step of a full hash.
+        The step is only used by double hashing, where it is taken from the bits
+        of the hash above the ones used for the home slot and forced odd so that
+        it is co-prime with the power of two table size.
+
+        Takes O(1)
+        """
+        if self.probing == "double":
+            return full_hash % self.size, (full_hash // self.size) | 1
+        return full_hash % self.size, 1
+
+    def _probe(self, hash, x, step):
+        """
+        Returns the slot visited at the x-th step of the probe sequence
+        starting from the home slot hash.
+
+        Takes O(1)
+        """
+        if self.probing == "quadratic":
+            return (hash + (x * x + x) // 2) % self.size
+        return (hash + x * step) % self.size
+
+    def _table_size(self, size):
+        """
+        Quadratic probing and double hashing only reach every slot
+        when the table size is a power of two
+        """
+        if self.probing == "linear":
+            return size
+        return _next_power_of_two(size)
 
     def set(self, key, value):
         """
@@ -72,47 +304,72 @@ class HashTableLinearProbe:
         Takes O(1) on average and O(n) for worst case.
         Note: average case only true if you have a good uniform hash function.
         """
-        hash = self._hash(key)
-        # convert key, value to str if not str already
-        if not isinstance(key, str):
-            key = str(key)
-        if not isinstance(value, str):
-            value = str(value)
+        # convert key, value to str if not str already (typed tables store them as given)
+        if not self.typed:
+            if not isinstance(key, str):
+                key = str(key)
+            if not isinstance(value, str):
+                value = str(value)
+        full_hash = self._full_hash(key)
+        if self._rehash_source is not None:
+            self._rehash()
+            # the key moves to the new table so the copy in the old table is dropped
+            if self._rehash_source is not None:
+                self._rehash_source._pop(key, full_hash)
+        self._set(full_hash, key, value)
+
+    def _set(self, full_hash, key, value):
+        """
+        Inserts or updates key starting from the home slot of its full hash.
+        Shared by set() and the migration of entries during a resize.
+
+        Takes O(1) on average and O(n) for worst case.
+        """
+        if self.robin_hood:
+            self._set_robin_hood(full_hash, key, value)
+            return
+        hash, step = self._slot_and_step(full_hash)
         x = 0
         # store tombstone index as t
         T = None
         while True:
-            i = (hash + x) % self.size
+            i = self._probe(hash, x, step)
             # saves index of first Tombstone
-            if isinstance(self.keys[i], Tombstone) and T == None:
+            if self.keys[i] is TOMBSTONE and T == None:
                 T = i
 
             # key already exists in the table
-            if self.keys[i] == key:
+            if self._is_key(i, key, full_hash):
+                if self._stats is not None:
+                    self._stats.record_probe("set", x + 1)
                 # If there is a first tombstone index, replace the key and updated value
                 # put tombstone in previous key location
                 # this will require less probing for future lookup
-                if T:
-                    self.keys[T] = key
-                    self.values[T] = value
-                    self.keys[i] = Tombstone()
-                    self.values[i] = None
-                    self.empty_slots -= 1
-                    self._check_capacity()
+                # (one tombstone is reused and one is created so the count is unchanged)
+                if T is not None:
+                    self._fill_slot(T, key, value, full_hash)
+                    self._clear_slot(i, TOMBSTONE)
                     return
                 else:
                     self.values[i] = value
                     return
-            # Either on null value or hit a tombstone
-            elif self.keys[i] is None or isinstance(self.keys[i], Tombstone):
+            # Reached a null value so the key is not in the table.
+            # Tombstones do not end the search: the key may still follow them.
+            elif self.keys[i] is None:
+                if self._stats is not None:
+                    self._stats.record_probe("set", x + 1)
                 if T != None:
-                    self.keys[T] = key
-                    self.values[T] = value
+                    self._fill_slot(T, key, value, full_hash)
+                    self.tombstones -= 1
+                    if self.bloom is not None:
+                        self._bloom_add(full_hash)
+                    self._arm_shrink()
                     return
                 else:
-                    self.keys[i] = key
-                    self.values[i] = value
+                    self._fill_slot(i, key, value, full_hash)
                     self.empty_slots -= 1
+                    if self.bloom is not None:
+                        self._bloom_add(full_hash)
                     self._check_capacity()
                 return
             x += 1
@@ -121,32 +378,90 @@ class HashTableLinearProbe:
         """
         Gets the value corresponding to the specified key.
         If the key is not present in the hash table, null is returned.
+        While an incremental resize is in progress the old table is checked as well.
+        A key ruled out by the Bloom filter returns None without a message.
+        No migration step is taken while an iterator is live.
 
         Takes O(1) on average and O(n) for worst case.
         Note: average case only true if you have a good uniform hash function.
         """
-        hash = self._hash(key)
+        if self._rehash_source is not None and not self._iterators:
+            self._rehash()
+        full_hash = self._full_hash(key)
+        if self._bloom_rejects(full_hash):
+            return
+        lookup = self._get_slot(key, full_hash, bloom_checked=True)
+        if lookup is None:
+            print("Key is not present in Hash Table")
+            return
+        table, i = lookup
+        return table.values[i], i
+
+    def _get_slot(self, key, full_hash=None, bloom_checked=False):
+        """
+        Returns (table, slot) of key without reporting a missing key.
+        The table is this table or, during an incremental resize, the old table.
+
+        Takes O(1) on average and O(n) for worst case.
+        """
+        if full_hash is None:
+            full_hash = self._full_hash(key)
+        i = self._find(full_hash, key, bloom_checked=bloom_checked)
+        if i is not None:
+            return self, i
+        if self._rehash_source is not None:
+            old = self._rehash_source
+            i = old._find(full_hash, key, relocate=False, bloom_checked=bloom_checked)
+            if i is not None:
+                return old, i
+        return
+
+    def _find(self, full_hash, key, relocate=True, bloom_checked=False):
+        """
+        Returns the slot holding key or None if the key is not present.
+        If relocate is True, a key found after a Tombstone is moved into the
+        first Tombstone of its probe sequence so that future lookups are shorter.
+        Keys are not moved while an iterator is live.
+
+        Returns None without probing if the Bloom filter rules the key out,
+        unless the caller already asked the filter (bloom_checked).
+
+        Takes O(1) on average and O(n) for worst case.
+        """
+        if (
+            not bloom_checked
+            and self.bloom is not None
+            and not self.bloom.contains_hash(full_hash)
+        ):
+            if self._stats is not None:
+                self._stats.record_probe("miss", 0)
+            return
+        if self.robin_hood:
+            return self._find_robin_hood(full_hash, key)
+        hash, step = self._slot_and_step(full_hash)
         x = 0
         # store tombstone index as t
         T = None
         while True:
-            i = (hash + x) % self.size
-            if isinstance(self.keys[i], Tombstone) and T == None:
+            i = self._probe(hash, x, step)
+            if self.keys[i] is TOMBSTONE and T == None:
                 T = i
-            if self.keys[i] == key:
+            if self._is_key(i, key, full_hash):
+                if self._stats is not None:
+                    self._stats.record_probe("hit", x + 1)
                 # case when first Tombstone is encountered
-                if T:
+                if T is not None and relocate and not self._iterators:
                     # swap k,v into first Tombstone position
-                    self.keys[T] = self.keys[i]
-                    self.values[T] = self.values[i]
-                    # Open slots in previous k,v position
-                    self.keys[i] = None
-                    self.values[i] = None
-                    return
+                    self._fill_slot(T, self.keys[i], self.values[i], full_hash)
+                    # previous k,v position becomes a Tombstone so that
+                    # probe sequences passing through it are not cut short
+                    self._clear_slot(i, TOMBSTONE)
+                    return T
                 else:
-                    return self.values[i], i
-            if self.keys[i] == None:
-                print("Key is not present in Hash Table")
+                    return i
+            if self.keys[i] is None:
+                if self._stats is not None:
+                    self._stats.record_probe("miss", x + 1)
                 return
             x += 1
 
@@ -154,25 +469,541 @@ class HashTableLinearProbe:
         """
         Removes key, value pair and returns the corresponding value if present.
         Key is replaced with Tombstone object and value is set to None.
+        A key ruled out by the Bloom filter returns None without a message.
 
         Takes O(1) on average and O(n) for worst case.
         Note: average case only true if you have a good uniform hash function.
         """
-        hash = self._hash(key)
-        x = 0
+        if self._rehash_source is not None:
+            self._rehash()
+        full_hash = self._full_hash(key)
+        if self._bloom_rejects(full_hash):
+            return
+        lookup = self._remove_entry(key, full_hash, bloom_checked=True)
+        if lookup is None:
+            print("Key is not present in Hash Table")
+            return
+        return lookup[0]
+
+    def _remove_entry(self, key, full_hash=None, bloom_checked=False):
+        """
+        Removes key from this table or, during an incremental resize, from the old table.
+        Returns (value, slot) if the key was present and None otherwise.
+
+        Takes O(1) on average and O(n) for worst case.
+        """
+        if full_hash is None:
+            full_hash = self._full_hash(key)
+        lookup = self._pop(key, full_hash, bloom_checked)
+        if lookup is None and self._rehash_source is not None:
+            lookup = self._rehash_source._pop(key, full_hash, bloom_checked)
+        return lookup
+
+    def _pop(self, key, full_hash=None, bloom_checked=False):
+        """
+        Removes key without reporting a missing key.
+        Returns (value, slot) if the key was present and None otherwise.
+
+        Takes O(1) on average and O(n) for worst case.
+        """
+        if full_hash is None:
+            full_hash = self._full_hash(key)
+        i = self._find(full_hash, key, relocate=False, bloom_checked=bloom_checked)
+        if i is None:
+            return
+        deleted_value = self.values[i]
+        self._delete_slot(i, full_hash)
+        return deleted_value, i
+
+    def _delete_slot(self, i, full_hash=None):
+        """
+        Deletes the entry in slot i, whose full hash the caller may pass
+        so that a counting Bloom filter does not hash the key again.
+        Key is replaced with Tombstone object and value is set to None,
+        in Robin Hood mode the following entries are shifted back instead.
+
+        Takes O(1) on average
+        """
+        if self.bloom_filter == "counting":
+            self.bloom.remove_hash(self._entry_hash(i) if full_hash is None else full_hash)
+        if self.robin_hood:
+            self._backward_shift(i)
+        else:
+            self._clear_slot(i, TOMBSTONE)
+            self.tombstones += 1
+            self._check_tombstones()
+        self._check_shrink()
+
+    def _check_tombstones(self):
+        """
+        Rehashes the table in place at the same size once tombstones make up
+        tombstone_ratio of the slots. This clears all tombstones so probe sequences
+        become short again, without growing the table.
+
+        Takes O(n) time when triggered, amortized O(1) per removal
+        """
+        if (
+            self.tombstone_ratio is not None
+            and self.tombstones >= self.tombstone_ratio * self.size
+        ):
+            self._rebuild(self.size)
+
+    def _check_shrink(self):
+        """
+        Shrinks the table once the live entries fall below shrink_threshold of the slots.
+        The new size puts the load factor at half of max_capacity, away from
+        both the growth and the shrink threshold.
+        Not done while an incremental resize is in progress, nor before the
+        live load factor reached shrink_threshold since the last resize.
+
+        Takes O(size) time when triggered, amortized O(1) per removal
+        """
+        if (
+            self.shrink_threshold is None
+            or self._rehash_source is not None
+            or not self._shrink_armed
+        ):
+            return
+        live_entries = self.size - self.empty_slots - self.tombstones
+        if self.size > self.min_size and live_entries < self.shrink_threshold * self.size:
+            target_size = int(live_entries / (self.max_capacity / 2)) + 1
+            self._rebuild(max(target_size, self.min_size))
+
+    def _arm_shrink(self):
+        """
+        Allows shrinking once the live load factor reaches shrink_threshold.
+        A resize disarms it, so a table that lands below the threshold after a
+        resize is not shrunk by the next removal.
+
+        Takes O(1)
+        """
+        if self.shrink_threshold is not None and not self._shrink_armed:
+            live_entries = self.size - self.empty_slots - self.tombstones
+            self._shrink_armed = live_entries >= self.shrink_threshold * self.size
+
+    def occupancy(self):
+        """
+        Returns the number of allocated slots against the number of live entries.
+        During an incremental resize both the old and the new slots are counted.
+
+        Takes O(1)
+        """
+        slots = self.size
+        if self._rehash_source is not None:
+            slots += self._rehash_source.size
+        live_entries = len(self)
+        return {
+            "slots": slots,
+            "live_entries": live_entries,
+            "tombstones": self.tombstones,
+            "load_factor": live_entries / slots,
+        }
+
+    def stats(self):
+        """
+        Returns the recorded probe length histograms and resize counters
+        together with the occupancy of the table and its longest probe sequence.
+        Raises ValueError if the table was created without stats.
+
+        Takes O(size) time to find the longest probe sequence
+        """
+        if self._stats is None:
+            raise ValueError("stats are disabled, create the table with stats=True")
+        probe_lengths = self.probe_length_histogram()
+        return {
+            **self._stats.snapshot(),
+            **self.occupancy(),
+            "max_chain": max(probe_lengths, default=0),
+        }
+
+    def set_many(self, pairs):
+        """
+        Sets all (key, value) pairs of an iterable. The table is resized at most
+        once, before the first pair is inserted, and all keys are hashed in one pass.
+
+        Takes O(n) time on average for n pairs
+        """
+        keys = []
+        values = []
+        for key, value in pairs:
+            if not self.typed:
+                key = key if isinstance(key, str) else str(key)
+                value = value if isinstance(value, str) else str(value)
+            keys.append(key)
+            values.append(value)
+        # tombstones count as used slots, so they are reserved for as well
+        self.reserve(self.size - self.empty_slots + len(keys))
+        # full hashes do not depend on the table size, so they stay valid across a resize
+        hashes = [self._full_hash(key) for key in keys]
+        for full_hash, key, value in zip(hashes, keys, values):
+            self._set(full_hash, key, value)
+
+    def get_many(self, keys):
+        """
+        Returns a list with the value of every key of an iterable.
+        Keys that are not present give None.
+
+        Takes O(n) time on average for n keys
+        """
+        values = []
+        for key in keys:
+            lookup = self._get_slot(key)
+            if lookup is None:
+                values.append(None)
+            else:
+                table, i = lookup
+                values.append(table.values[i])
+        return values
+
+    def remove_many(self, keys):
+        """
+        Removes every key of an iterable and returns a list of the removed values.
+        Keys that are not present give None.
+
+        Takes O(n) time on average for n keys
+        """
+        removed = []
+        for key in keys:
+            lookup = self._remove_entry(key)
+            removed.append(None if lookup is None else lookup[0])
+        return removed
+
+    def reserve(self, n):
+        """
+        Grows the table once so that n entries fit without another resize.
+        An incremental resize in progress is finished first.
+
+        Takes O(n) time if the table has to grow and O(1) otherwise
+        """
+        while self._rehash_source is not None:
+            self._finish_rehash()
+        required_size = int(n / self.max_capacity) + 1
+        if required_size > self.size:
+            self._rebuild(required_size)
+
+    @classmethod
+    def from_iterable(cls, pairs, max_capacity=0.75, **options):
+        """
+        Builds a hash table from an iterable of (key, value) pairs.
+        The table is allocated once with room for all pairs.
+
+        Takes O(n) time on average for n pairs
+        """
+        pairs = list(pairs)
+        table = cls(int(len(pairs) / max_capacity) + 1, max_capacity, **options)
+        table.set_many(pairs)
+        return table
+
+    def dump(self, path):
+        """
+        Writes the table to a binary snapshot: the options and counters of the table
+        and columns with the slot, key and value of every entry and the slot of every
+        tombstone (plus the probe distances or cached hashes if the table keeps them).
+        An incremental resize in progress is finished first.
+
+        Takes O(size) time
+        """
+        while self._rehash_source is not None:
+            self._finish_rehash()
+        with gc_paused():
+            slots = [
+                i
+                for i, key in enumerate(self.keys)
+                if key is not None and key is not TOMBSTONE
+            ]
+            tombstones = []
+            if self.tombstones:
+                tombstones = [i for i, key in enumerate(self.keys) if key is TOMBSTONE]
+            columns = [slots, tombstones]
+            arrays = [self.keys, self.values]
+            if self.robin_hood:
+                arrays.append(self.distances)
+            if self.typed:
+                arrays.append(self.hashes)
+            for slot_array in arrays:
+                columns.append(list(map(slot_array.__getitem__, slots)))
+        header = {
+            "kind": type(self).__name__,
+            "fingerprint": hash_fingerprint(self.hash_function),
+            "min_size": self.min_size,
+            "options": {
+                "size": self.size,
+                "max_capacity": self.max_capacity,
+                "robin_hood": self.robin_hood,
+                "probing": self.probing,
+                "growth_factor": self.growth_factor,
+                "incremental_resize": self.incremental_resize,
+                "rehash_step": self.rehash_step,
+                "tombstone_ratio": self.tombstone_ratio,
+                "shrink_threshold": self.shrink_threshold,
+                "typed": self.typed,
+                "bloom_filter": self.bloom_filter,
+                "bloom_error_rate": self.bloom_error_rate,
+            },
+        }
+        with gc_paused():
+            write_snapshot(path, header, columns)
+
+    @classmethod
+    def load(cls, path, hash_function=None):
+        """
+        Restores a table written by dump(). Hash functions are not stored,
+        so a table that did not use the default hash needs the same one again.
+        If hash_function places keys like the dumped table did, every entry and
+        tombstone is written straight back into its slot. Otherwise (for example
+        str keys in a process with another PYTHONHASHSEED) the entries are placed again.
+
+        Takes O(size) time
+        """
+        with gc_paused():
+            header, columns = read_snapshot(path, cls.__name__)
+        table = cls(hash_function=hash_function, **header["options"])
+        table.min_size = header["min_size"]
+        slots, tombstones, keys, values = columns[:4]
+        extra = columns[4:]
+        distances = extra.pop(0) if table.robin_hood else None
+        hashes = extra.pop(0) if table.typed else None
+        if header["fingerprint"] is None or header["fingerprint"] != hash_fingerprint(
+            table.hash_function
+        ):
+            for key, value in zip(keys, values):
+                table._set(table._full_hash(key), key, value)
+            return table
+        for i, key, value in zip(slots, keys, values):
+            table.keys[i] = key
+            table.values[i] = value
+        for i in tombstones:
+            table.keys[i] = TOMBSTONE
+        if distances is not None:
+            for i, distance in zip(slots, distances):
+                table.distances[i] = distance
+        if hashes is not None:
+            for i, full_hash in zip(slots, hashes):
+                table.hashes[i] = full_hash
+        table.empty_slots = table.size - len(slots) - len(tombstones)
+        table.tombstones = len(tombstones)
+        if table.bloom is not None:
+            table._rebuild_bloom_filter()
+        return table
+
+    def _set_robin_hood(self, full_hash, key, value):
+        """
+        Robin Hood insertion. Probes linearly from the home slot and swaps the
+        entry being inserted with any resident entry that is closer to its own home slot.
+        Once a swap happened the key cannot be further along the probe sequence,
+        so the displaced entry simply continues probing.
+
+        Takes O(1) on average and O(n) for worst case.
+        """
+        i = full_hash % self.size
+        distance = 0
+        # the entry being placed changes with every swap, the new key is the one to add to the filter
+        new_hash = full_hash
         while True:
-            i = (hash + x) % self.size
-            if self.keys[i] == key:
-                self.keys[i] = Tombstone()
-                deleted_value = self.values[i]
-                self.values[i] = None
-                return deleted_value
-
-            if self.keys[i] == None:
-                print("Key is not present in Hash Table")
+            if self.keys[i] is None:
+                if self._stats is not None:
+                    self._stats.record_probe("set", distance + 1)
+                self._fill_slot(i, key, value, full_hash)
+                self.distances[i] = distance
+                self.empty_slots -= 1
+                if self.bloom is not None:
+                    self._bloom_add(new_hash)
+                self._check_capacity()
                 return
+            if self._is_key(i, key, full_hash):
+                if self._stats is not None:
+                    self._stats.record_probe("set", distance + 1)
+                self.values[i] = value
+                return
+            # resident is "richer" (closer to home) so the new entry takes its slot
+            if self.distances[i] < distance:
+                key, self.keys[i] = self.keys[i], key
+                value, self.values[i] = self.values[i], value
+                distance, self.distances[i] = self.distances[i], distance
+                # the displaced entry carries its cached hash along (typed mode only)
+                if self.hashes is not None:
+                    full_hash, self.hashes[i] = self.hashes[i], full_hash
+            i = (i + 1) % self.size
+            distance += 1
 
-            x += 1
+    def _find_robin_hood(self, full_hash, key):
+        """
+        Robin Hood lookup. The search stops at an empty slot or as soon as the
+        resident entry is closer to its home slot than the key would be at that point.
+
+        Takes O(1) on average and O(log n) expected worst case.
+        """
+        i = full_hash % self.size
+        distance = 0
+        while self.keys[i] is not None and self.distances[i] >= distance:
+            if self._is_key(i, key, full_hash):
+                if self._stats is not None:
+                    self._stats.record_probe("hit", distance + 1)
+                return i
+            i = (i + 1) % self.size
+            distance += 1
+        if self._stats is not None:
+            self._stats.record_probe("miss", distance + 1)
+        return
+
+    def _backward_shift(self, i):
+        """
+        Robin Hood removal with backward-shift deletion. Every following entry
+        that is not at its home slot is moved back by one slot, so no tombstone is needed.
+
+        Takes O(1) on average and O(n) for worst case.
+        """
+        j = (i + 1) % self.size
+        while self.keys[j] is not None and self.distances[j] > 0:
+            self.keys[i] = self.keys[j]
+            self.values[i] = self.values[j]
+            if self.hashes is not None:
+                self.hashes[i] = self.hashes[j]
+            self.distances[i] = self.distances[j] - 1
+            i = j
+            j = (j + 1) % self.size
+        self._clear_slot(i, None)
+        self.distances[i] = 0
+        self.empty_slots += 1
+
+    def _fill_slot(self, i, key, value, full_hash):
+        """
+        Stores key and value in slot i, with the hash of key in typed mode
+
+        Takes O(1)
+        """
+        self.keys[i] = key
+        self.values[i] = value
+        if self.hashes is not None:
+            self.hashes[i] = full_hash
+        self._version += 1
+
+    def _clear_slot(self, i, marker):
+        """
+        Empties slot i, leaving marker (None or TOMBSTONE) as its key
+
+        Takes O(1)
+        """
+        self.keys[i] = marker
+        self.values[i] = None
+        if self.hashes is not None:
+            self.hashes[i] = None
+        self._version += 1
+
+    def __contains__(self, key):
+        """
+        Returns True if key is present. Unlike get(), a missing key is not reported.
+
+        Takes O(1) on average and O(n) for worst case.
+        """
+        if not self.typed and not isinstance(key, str):
+            key = str(key)
+        return self._get_slot(key) is not None
+
+    def _new_bloom_filter(self, entries=0):
+        """
+        Returns an empty Bloom filter for the current size, with room for the entries
+        that fit below max_capacity or for entries if there are more
+
+        Takes O(size) time
+        """
+        capacity = max(int(self.max_capacity * self.size) + 1, entries)
+        return BLOOM_FILTERS[self.bloom_filter](capacity, self.bloom_error_rate)
+
+    def _bloom_rejects(self, full_hash):
+        """
+        Returns True if the Bloom filter, and during an incremental resize the
+        filter of the old table as well, rules out a key with this full hash
+
+        Takes O(k)
+        """
+        if self.bloom is None or self.bloom.contains_hash(full_hash):
+            return False
+        old = self._rehash_source
+        if old is not None and old.bloom.contains_hash(full_hash):
+            return False
+        if self._stats is not None:
+            self._stats.record_probe("miss", 0)
+        return True
+
+    def _bloom_add(self, full_hash):
+        """
+        Adds the full hash of a new key to the Bloom filter.
+        Once the filter has seen more adds than its capacity (removed keys
+        stay in a standard filter) it is rebuilt from the live entries.
+
+        Takes O(k), plus O(size) when the filter is rebuilt
+        """
+        self.bloom.add_hash(full_hash)
+        if self.bloom.count > self.bloom.capacity:
+            self._rebuild_bloom_filter()
+
+    def _rebuild_bloom_filter(self):
+        """
+        Replaces the Bloom filter with a new one that holds the live entries of the slot arrays.
+        The entries of the old table of an incremental resize are in the filter of the old table.
+
+        Takes O(size) time
+        """
+        live_entries = self.size - self.empty_slots - self.tombstones
+        self.bloom = self._new_bloom_filter(2 * live_entries)
+        for i, key in enumerate(self.keys):
+            if key is not None and key is not TOMBSTONE:
+                self.bloom.add_hash(self._entry_hash(i))
+
+    def __len__(self):
+        """
+        Returns the number of entries, including the entries of the old table
+        during an incremental resize
+
+        Takes O(1)
+        """
+        live_entries = self.size - self.empty_slots - self.tombstones
+        if self._rehash_source is not None:
+            old = self._rehash_source
+            # migrated old slots become tombstones or empty slots of the old table
+            live_entries += old.size - old.empty_slots - old.tombstones
+        return live_entries
+
+    def _modification_state(self):
+        """
+        Returns the versions of this table and of the old table of an incremental resize
+        """
+        old = self._rehash_source
+        return self._version, old, None if old is None else old._version
+
+    def items(self):
+        """
+        Yields every (key, value) pair without building a list, the pairs
+        of the old table last during an incremental resize.
+        Raises RuntimeError if the table is modified during the iteration.
+
+        Takes O(size) time in total and O(1) memory
+        """
+        state = self._modification_state()
+        tables = [self] if self._rehash_source is None else [self, self._rehash_source]
+        self._iterators += 1
+        try:
+            for table in tables:
+                keys, values = table.keys, table.values
+                for i in range(len(keys)):
+                    key = keys[i]
+                    if key is not None and key is not TOMBSTONE:
+                        yield key, values[i]
+                        if self._modification_state() != state:
+                            raise RuntimeError("hash table changed during iteration")
+        finally:
+            self._iterators -= 1
+
+    def __iter__(self):
+        """
+        Yields every key without building a list.
+        Raises RuntimeError if the table is modified during the iteration.
+
+        Takes O(size) time in total and O(1) memory
+        """
+        for key, _ in self.items():
+            yield key
 
     def get_keys(self):
         """
@@ -182,38 +1013,207 @@ class HashTableLinearProbe:
         """
         keys_array = []
         for key in self.keys:
-            if key != None and not isinstance(key, Tombstone):
+            if key != None and key is not TOMBSTONE:
                 keys_array.append(key)
+        if self._rehash_source is not None:
+            keys_array.extend(self._rehash_source.get_keys())
         return keys_array
 
     def get_values(self):
         """
-        Returns all non-null values in the hash table
+        Returns the values of all non-null and non-Tombstone keys in the hash table.
+        Typed tables may store None as a value, so slots are selected by their key.
 
         Takes O(n) time
         """
         values_array = []
-        for value in self.values:
-            if value != None:
+        for key, value in zip(self.keys, self.values):
+            if key is not None and key is not TOMBSTONE:
                 values_array.append(value)
+        if self._rehash_source is not None:
+            values_array.extend(self._rehash_source.get_values())
         return values_array
 
+    def bucket_histogram(self):
+        """
+        Returns a histogram {number of keys: number of buckets} of how many
+        keys hash to each bucket (bucket occupancy before probing).
+        A uniform hash function keeps almost all buckets at 0, 1 or 2 keys.
+
+        Takes O(n) time
+        """
+        occupancy = [0] * self.size
+        for key in self.keys:
+            if key is not None and key is not TOMBSTONE:
+                occupancy[self._hash(key)] += 1
+        return histogram(occupancy)
+
+    def probe_length_histogram(self):
+        """
+        Returns a histogram {probe length: number of keys} where the probe length
+        is the number of probe steps from the home bucket to the key (0 means no collision).
+
+        Takes O(n) time on average
+        """
+        lengths = []
+        for i, key in enumerate(self.keys):
+            if key is not None and key is not TOMBSTONE:
+                lengths.append(self._probe_length(key, i))
+        return histogram(lengths)
+
+    def _probe_length(self, key, i):
+        """
+        Returns the number of steps x of the probe sequence of key that lead to slot i
+
+        Takes O(x) time
+        """
+        hash, step = self._hash_and_step(key)
+        x = 0
+        while self._probe(hash, x, step) != i:
+            x += 1
+        return x
+
     def _increase_size(self, resize_factor):
         """
         Increases the size of the hash table by extracting all k,v pairs,
         reinitializes keys and values arrays with null values incorporating
         new size factor, then sets the entries into the new hash table.
+        With incremental_resize the entries are migrated by later operations instead.
+
+        Takes O(n) time, O(1) with incremental_resize
+        """
+        if self.incremental_resize:
+            self._start_rehash(resize_factor)
+            return
+        self._rebuild(self._grown_size(resize_factor))
+
+    def _grown_size(self, resize_factor):
+        """
+        Returns the size of the table after growing by resize_factor
+        """
+        return max(int(self.size * resize_factor), self.size + 1)
+
+    def _rebuild(self, size):
+        """
+        Extracts all k,v pairs, reinitializes keys and values arrays with
+        null values of the given size, then sets the entries into the new hash table.
+        Tombstones are dropped. Also used to rehash in place at the same size.
 
         Takes O(n) time
         """
-        kv_pairs = zip(self.get_keys(), self.get_values())
-        self.size *= resize_factor
+        while self._rehash_source is not None:
+            self._finish_rehash()
+        # moved entries are not recorded as sets
+        stats, self._stats = self._stats, None
+        start = time.perf_counter() if stats is not None else None
+        old_size = self.size
+        keys, values, hashes = self.keys, self.values, self.hashes
+        self._reset_slots(size)
+        for i, (key, value) in enumerate(zip(keys, values)):
+            if key is not None and key is not TOMBSTONE:
+                full_hash = hashes[i] if hashes is not None else self._full_hash(key)
+                self._set(full_hash, key, value)
+        self._stats = stats
+        if stats is not None:
+            stats.record_resize(old_size, self.size, len(self), time.perf_counter() - start)
+        return
+
+    def _reset_slots(self, size):
+        """
+        Replaces the slot arrays with empty arrays of the given size
+        """
+        self.size = self._table_size(size)
         self.empty_slots = self.size
+        self.tombstones = 0
+        self._shrink_armed = False
+        self._version += 1
         self.keys = [None] * self.size
         self.values = [None] * self.size
-        for pair in kv_pairs:
-            self.set(*pair)
-        return
+        if self.typed:
+            self.hashes = [None] * self.size
+        if self.robin_hood:
+            self.distances = [0] * self.size
+        if self.bloom is not None:
+            self.bloom = self._new_bloom_filter()
+
+    def _start_rehash(self, resize_factor):
+        """
+        Starts an incremental resize (progressive rehash).
+        The current slot arrays are handed to a detached table that
+        only serves lookups and removals, and empty larger arrays take their place.
+        Every following operation migrates rehash_step old slots into the new arrays.
+
+        Takes O(new size) time to allocate the new arrays
+        """
+        # a resize can only start once the previous one has finished
+        while self._rehash_source is not None:
+            self._finish_rehash()
+        start = time.perf_counter() if self._stats is not None else None
+        old = object.__new__(type(self))
+        old.__dict__.update(self.__dict__)
+        # rehashing or shrinking the old table in place would move entries behind the migration index
+        old.tombstone_ratio = None
+        old.shrink_threshold = None
+        # lookups in the old table are not recorded
+        old._stats = None
+        self._reset_slots(self._grown_size(resize_factor))
+        self._rehash_source = old
+        self._rehash_index = 0
+        if self._stats is not None:
+            self._stats.record_resize(
+                old.size, self.size, len(self), time.perf_counter() - start, incremental=True
+            )
+
+    def _rehash(self):
+        """
+        Migrates the entries of the next rehash_step slots of the old table
+        into the new arrays. The resize is finished after the last old slot.
+
+        Takes O(rehash_step) time on average
+        """
+        if self._stats is not None:
+            # moved entries are not recorded as sets
+            stats, self._stats = self._stats, None
+            start = time.perf_counter()
+            try:
+                self._rehash()
+            finally:
+                self._stats = stats
+            stats.record_migration(time.perf_counter() - start)
+            return
+        old = self._rehash_source
+        for _ in range(self.rehash_step):
+            i = self._rehash_index
+            # backward-shift deletion can move the next entry into slot i, so repeat
+            while old.keys[i] is not None and old.keys[i] is not TOMBSTONE:
+                key, value, full_hash = old.keys[i], old.values[i], old._entry_hash(i)
+                old._delete_slot(i, full_hash)
+                self._set(full_hash, key, value)
+                # migrating may have filled the new arrays and started another resize
+                if self._rehash_source is not old:
+                    return
+            self._rehash_index += 1
+            if self._rehash_index == old.size:
+                self._rehash_source = None
+                return
+
+    def _finish_rehash(self):
+        """
+        Migrates all remaining entries of the old table at once.
+
+        Takes O(n) time
+        """
+        old = self._rehash_source
+        self._rehash_source = None
+        stats, self._stats = self._stats, None
+        start = time.perf_counter() if stats is not None else None
+        for i in range(self._rehash_index, old.size):
+            key = old.keys[i]
+            if key is not None and key is not TOMBSTONE:
+                self._set(old._entry_hash(i), key, old.values[i])
+        self._stats = stats
+        if stats is not None:
+            stats.record_migration(time.perf_counter() - start)
 
     def _check_capacity(self):
         """
@@ -221,10 +1221,13 @@ class HashTableLinearProbe:
         is less than the maximum capacity.
         If maximum capacity is exceeded, the hash table is resized
         """
+        self._arm_shrink()
         current_capacity = 1 - self.empty_slots / self.size
         if current_capacity >= self.max_capacity:
-            print("Capacity exceeded. Increasing Hash Table size by factor of 10")
-            self._increase_size(10)
+            print(
+                f"Capacity exceeded. Increasing Hash Table size by factor of {self.growth_factor}"
+            )
+            self._increase_size(self.growth_factor)
 
 
 if __name__ == "__main__":
@@ -246,3 +1249,8 @@ if __name__ == "__main__":
     h.remove("purple goatee")
     print(h.get_keys())
     print(h.get_values())
+
+    t = HashTableLinearProbe(10, typed=True)
+    t.set((1, 2), b"point")
+    t.set(3, None)
+    print(t.get((1, 2)), t.get_keys(), t.get_values())
@@ -0,0 +1,319 @@
+"""
+Static Hash Table Using a Minimal Perfect Hash (CHD)
+
+Some tables are built once and then only read, for example configuration keys or a symbol dictionary.
+Open addressing keeps a quarter of its slots empty for such a table and a lookup may still probe several
+slots. When the key set is known in advance a minimal perfect hash function can be built instead: a
+function that maps the n keys to the n positions 0 .. n-1 without any collision. The keys and values are
+then stored in dense arrays of exactly n entries and a lookup inspects exactly one slot.
+
+The function is built with the CHD algorithm (Belazzougui, Botelho and Dietzfelbinger, "Hash, displace,
+and compress"). Every key is hashed once and the 64-bit hash, mixed with fmix64 and a seed, is split into
+a bucket and two numbers f1 and f2 below n. There are about n / `bucket_size` buckets. Every bucket gets
+a displacement (d0, d1) and a key of the bucket lives at position
+    (f1 + d0 * f2 + d1) mod n
+The buckets are placed one by one, largest first, while the table is still empty: the displacements are
+tried in order until every key of the bucket lands on a distinct free position. Buckets with a single key
+are placed last and simply take the remaining free positions one by one (d0 = 0 and d1 = the free position
+- f1). If a bucket cannot be placed (two of its keys always collide) the build starts again with another
+seed.
+
+A lookup therefore costs one hash of the key, one index into the displacement array and one key
+comparison, which rejects keys that are not in the table. The displacements are kept as (d0 * n + d1)
+in an array of 32-bit integers, about 2 bytes per key with the default bucket size of 2.
+
+dump() writes the keys, the values and the displacements as a binary snapshot (see hash_table_snapshot.py)
+and load() reads it back without building again, as long as the hash function places keys the same way.
+Keys are hashed with `stable_hash` by default so a snapshot can be loaded by any process; a table built
+with another hash function is built again on load if its fingerprint differs.
+
+Keys and values are stored as given, they are not converted to strings. There is no set or remove: build
+a new table when the key set changes.
+
+Key Operations:
+- `from_iterable(pairs)`: Builds the table from (key, value) pairs.
+- `get(key)`: Retrieves the value associated with a given key.
+- `get_keys()`: Returns a list of all keys in the hash table.
+- `get_values()`: Returns a list of all values in the hash table.
+- `dump(path)`, `load(path)`: Writes the table to a snapshot file and reads it back.
+- `occupancy()`: Returns the number of slots, buckets and bytes per key of the displacements.
+"""
+
+from array import array
+
+from .hash_functions import MASK_64, fmix64, resolve_hash_function, stable_hash
+from .hash_table_snapshot import gc_paused, hash_fingerprint, read_snapshot, write_snapshot
+
+# builds with new seeds before giving up on a key set
+MAX_BUILDS = 32
+# values of d0 tried for a bucket before the build starts again with a new seed
+MAX_ROUNDS = 256
+# largest displacement index (d0 * n + d1) that fits the array
+MAX_DISPLACEMENT = (1 << 32) - 1
+
+
+class HashTablePerfect:
+    def __init__(self, pairs=(), bucket_size=2, hash_function=stable_hash, seed=0):
+        if bucket_size < 1:
+            raise ValueError("bucket_size must be at least 1")
+        self.bucket_size = bucket_size
+        # any callable key -> int, the low 64 bits of the result are used
+        self.hash_function = resolve_hash_function(hash_function)
+        # later pairs replace earlier pairs with the same key, as in a dict
+        entries = dict(pairs)
+        self.keys = list(entries)
+        self.values = list(entries.values())
+        self.count = len(self.keys)
+        self.buckets = max(-(-self.count // bucket_size), 1)
+        self._build(seed)
+
+    @classmethod
+    def from_iterable(cls, pairs, **options):
+        """
+        Builds a table from an iterable of (key, value) pairs
+
+        Takes O(n) time on average for n pairs
+        """
+        return cls(pairs, **options)
+
+    def _split(self, full_hash):
+        """
+        Returns the bucket, f1 and f2 of a hash
+
+        Takes O(1)
+        """
+        rest, bucket = divmod(fmix64((full_hash ^ self._seed_mix) & MASK_64), self.buckets)
+        f2, f1 = divmod(rest, self.count)
+        return bucket, f1, f2
+
+    def _build(self, seed):
+        """
+        Finds a displacement for every bucket, trying new seeds until one works,
+        and moves every key and value to its position.
+        Raises ValueError if no seed works.
+
+        Takes O(n) time on average
+        """
+        with gc_paused():
+            hashes = [self.hash_function(key) for key in self.keys]
+            for attempt in range(MAX_BUILDS):
+                self.seed = seed + attempt
+                self._seed_mix = fmix64(self.seed)
+                positions = self._place(hashes)
+                if positions is not None:
+                    break
+            else:
+                raise ValueError("could not build a perfect hash, the keys may have equal hashes")
+            keys, values = [None] * self.count, [None] * self.count
+            for key, value, position in zip(self.keys, self.values, positions):
+                keys[position] = key
+                values[position] = value
+        self.keys, self.values = keys, values
+
+    def _place(self, hashes):
+        """
+        Places the buckets largest first and returns the position of every key,
+        or None if a bucket could not be placed with the current seed
+
+        Takes O(n) time on average
+        """
+        n = self.count
+        self.displacements = array("I", bytes(4 * self.buckets))
+        if n == 0:
+            return []
+        members = [[] for _ in range(self.buckets)]
+        for index, full_hash in enumerate(hashes):
+            bucket, f1, f2 = self._split(full_hash)
+            members[bucket].append((f1, f2, index))
+        order = sorted(range(self.buckets), key=lambda bucket: len(members[bucket]), reverse=True)
+        taken = bytearray(n)
+        positions = [0] * n
+        rounds = min(MAX_ROUNDS, MAX_DISPLACEMENT // n)
+        singles = 0
+        for singles, bucket in enumerate(order):
+            entries = members[bucket]
+            if len(entries) < 2:
+                break
+            displacement = self._displace(entries, taken, rounds)
+            if displacement is None:
+                return None
+            d0, d1 = divmod(displacement, n)
+            for f1, f2, index in entries:
+                position = (f1 + d0 * f2 + d1) % n
+                taken[position] = 1
+                positions[index] = position
+            self.displacements[bucket] = displacement
+        else:
+            return positions
+        # single keys take the free positions that are left, with d0 = 0
+        free = (position for position in range(n) if not taken[position])
+        for bucket in order[singles:]:
+            if not members[bucket]:
+                break
+            f1, _, index = members[bucket][0]
+            position = next(free)
+            positions[index] = position
+            self.displacements[bucket] = (position - f1) % n
+        return positions
+
+    def _displace(self, entries, taken, rounds):
+        """
+        Returns the first displacement index d0 * n + d1 that moves every key
+        of a bucket to a distinct free position, or None
+
+        Takes O(rounds * n) time in the worst case, a few steps for most buckets
+        """
+        n = self.count
+        for d0 in range(rounds):
+            base = [(f1 + d0 * f2) % n for f1, f2, _ in entries]
+            if len(set(base)) < len(base):
+                continue
+            for d1 in range(n):
+                for position in base:
+                    if taken[(position + d1) % n]:
+                        break
+                else:
+                    return d0 * n + d1
+        return None
+
+    def _find(self, key):
+        """
+        Returns the position of key, or None if key is not in the table
+
+        Takes O(1)
+        """
+        n = self.count
+        if n == 0:
+            return None
+        full_hash = self.hash_function(key)
+        rest, bucket = divmod(fmix64((full_hash ^ self._seed_mix) & MASK_64), self.buckets)
+        f2, f1 = divmod(rest, n)
+        d0, d1 = divmod(self.displacements[bucket], n)
+        i = (f1 + d0 * f2 + d1) % n
+        if self.keys[i] == key:
+            return i
+        return None
+
+    def get(self, key):
+        """
+        Gets the value corresponding to the specified key.
+        If the key is not present in the hash table, null is returned.
+
+        Takes O(1) in the worst case: one hash, one displacement and one key comparison
+        """
+        i = self._find(key)
+        if i is None:
+            print("Key is not present in Hash Table")
+            return
+        return self.values[i], i
+
+    def __contains__(self, key):
+        """
+        Returns whether key is present in the hash table
+
+        Takes O(1) in the worst case
+        """
+        return self._find(key) is not None
+
+    def __len__(self):
+        """
+        Returns the number of keys in the hash table
+
+        Takes O(1)
+        """
+        return self.count
+
+    def __iter__(self):
+        """
+        Returns an iterator over the keys in slot order
+
+        Takes O(n) time in total
+        """
+        return iter(self.keys)
+
+    def items(self):
+        """
+        Returns an iterator over the key, value pairs in slot order
+
+        Takes O(n) time in total
+        """
+        return zip(self.keys, self.values)
+
+    def get_keys(self):
+        """
+        Returns all keys in the hash table
+
+        Takes O(n) time
+        """
+        return list(self.keys)
+
+    def get_values(self):
+        """
+        Returns all values in the hash table
+
+        Takes O(n) time
+        """
+        return list(self.values)
+
+    def occupancy(self):
+        """
+        Returns the number of slots and buckets and the bytes per key
+        of the displacement array
+
+        Takes O(1)
+        """
+        return {
+            "slots": self.count,
+            "live_entries": self.count,
+            "buckets": self.buckets,
+            "load_factor": 1.0 if self.count else 0.0,
+            "displacement_bytes_per_key": len(self.displacements) * 4 / max(self.count, 1),
+        }
+
+    def dump(self, path):
+        """
+        Writes the table to a binary snapshot: the options, the seed and columns
+        with the keys, the values and the displacements
+
+        Takes O(n) time
+        """
+        header = {
+            "kind": type(self).__name__,
+            "fingerprint": hash_fingerprint(self.hash_function),
+            "seed": self.seed,
+            "options": {"bucket_size": self.bucket_size},
+        }
+        with gc_paused():
+            write_snapshot(path, header, [self.keys, self.values, self.displacements.tolist()])
+
+    @classmethod
+    def load(cls, path, hash_function=stable_hash):
+        """
+        Restores a table written by dump(). Hash functions are not stored, so a table
+        that did not use stable_hash needs the same one again. If hash_function places
+        keys like the dumped table did, the arrays are used as they are, otherwise
+        the table is built again.
+
+        Takes O(n) time
+        """
+        with gc_paused():
+            header, (keys, values, displacements) = read_snapshot(path, cls.__name__)
+        options = header["options"]
+        if header["fingerprint"] is None or header["fingerprint"] != hash_fingerprint(
+            resolve_hash_function(hash_function)
+        ):
+            return cls(zip(keys, values), hash_function=hash_function, **options)
+        table = cls(hash_function=hash_function, **options)
+        table.keys, table.values = keys, values
+        table.count = len(keys)
+        table.buckets = len(displacements)
+        table.seed = header["seed"]
+        table._seed_mix = fmix64(table.seed)
+        table.displacements = array("I", displacements)
+        return table
+
+
+if __name__ == "__main__":
+    settings = HashTablePerfect.from_iterable((f"option.{i}", i * i) for i in range(1000))
+    print(settings.get("option.12"), "option.1000" in settings, settings.occupancy())
+    settings.get("missing")
@@ -20,17 +20,124 @@ Key Operations:
 - `remove(key)`: Removes a key-value pair from the hash table.
 - `keys()`: Returns a list of all keys in the hash table.
 - `values()`: Returns a list of all values in the hash table.
-- `_increase_size(resize_factor)`: Increases the size of the hash table.
+- `__iter__()`, `items()`: Lazily yield the keys / (key, value) pairs without building a list.
+- `__len__()`: Returns the number of entries in O(1).
+- `__contains__(key)`: Returns whether key is present, without reporting a missing key.
+- `get_entry(key)`, `pop_entry(key)`: Return (and remove) the {"key", "value"} entry of key, None without a message if missing.
+- `set_many(pairs)`, `get_many(keys)`, `remove_many(keys)`: Batch versions of set, get and remove.
+- `reserve(n)`: Grows the table once so that n entries fit without another resize.
+- `fits(n)`: Returns whether n entries fit without a resize.
+- `occupancy()`: Returns the number of allocated buckets against the number of live entries.
+- `stats()`: Returns chain length histograms, resize counters and load metrics (with `stats=True`).
+- `from_iterable(pairs)`: Builds a table sized for an iterable of (key, value) pairs.
+- `dump(path)`, `load(path)`: Writes the table to a binary snapshot file and restores it (see hash_table_snapshot.py).
+- `bucket_histogram()`: Returns a histogram of the chain lengths of all buckets.
+- `_increase_size(resize_factor)`: Increases the size of the hash table by resize_factor.
 - `_check_capacity()`: Checks if the current capacity exceeds the maximum capacity and resizes if necessary.
+
+Resizing normally rebuilds the whole table inside the set() that crossed the maximum capacity. With
+`incremental_resize=True` the table resizes progressively (like the rehash of Redis dictionaries): the old
+and the new bucket arrays coexist, every set/get/remove migrates `rehash_step` old buckets into the new
+array and lookups check both arrays until the migration is finished. The table grows by `growth_factor`
+(10 by default) each time.
+
+Shrinking is opt-in with `shrink_threshold`. Once removals bring the number of entries below
+`shrink_threshold * size`, the table is rebuilt with the number of buckets that puts its load factor at
+half of `max_capacity` (never below its initial size). The threshold has to be lower than the load factor
+right after a growth. A table can still land below the threshold after a resize, for example after
+`reserve()` for entries that have not arrived yet, so a table only shrinks once its load factor has
+reached the threshold since the last resize. Alternating inserts and removals therefore cannot resize it
+back and forth (hysteresis).
+
+Iterating with `for key in table` or `table.items()` walks the buckets lazily. Adding or removing an
+entry, resizing and every migration step of an incremental resize change the table's version, and an
+iterator raises RuntimeError on its next step if the version changed since it started. While an iterator
+is live, lookups do not run migration steps, so reading the table during an iteration is allowed.
+
+With `bloom_filter="standard"` or `bloom_filter="counting"` the table keeps a Bloom filter of the hashes
+of its keys (see bloom_filter.py) sized for the entries at which the table grows and `bloom_error_rate`
+false positives, and a lookup whose hash is not in the filter skips its bucket. A standard filter cannot
+forget removed keys, so it is rebuilt from the live entries on every resize and once it has seen more
+adds than its capacity; a counting filter removes keys as well. get() and remove() return None without
+the message for a missing key when the filter rules it out; `__contains__` tests for a key without any
+message.
+
+With `stats=True` the table records a histogram of the chain entries inspected by every lookup and
+insert, the number of resizes and the time spent resizing (see hash_table_stats.py); `on_resize` is
+called with every resize and turns stats on as well. Without them nothing is recorded.
+
+The hash function is pluggable (see hash_functions.py). By default keys are hashed with the native
+hash() followed by a 64-bit finalizer.
 """
 
+import math
+import time
+
+from .bloom_filter import BLOOM_FILTERS
+from .hash_functions import histogram, resolve_hash_function
+from .hash_table_snapshot import (
+    gc_paused,
+    hash_fingerprint,
+    read_snapshot,
+    write_snapshot,
+)
+from .hash_table_stats import TableStats
+
 
 class HashTableSeparateChaining:
-    def __init__(self, size, max_capacity=0.75):
+    def __init__(
+        self,
+        size,
+        max_capacity=0.75,
+        hash_function=None,
+        growth_factor=10,
+        incremental_resize=False,
+        rehash_step=4,
+        shrink_threshold=None,
+        bloom_filter=None,
+        bloom_error_rate=0.01,
+        stats=False,
+        on_resize=None,
+    ):
+        if growth_factor <= 1:
+            raise ValueError("growth_factor must be greater than 1")
+        if bloom_filter is not None and bloom_filter not in BLOOM_FILTERS:
+            raise ValueError(f"bloom_filter must be None or one of {tuple(BLOOM_FILTERS)}")
+        if shrink_threshold is not None and shrink_threshold >= min(
+            max_capacity / growth_factor, max_capacity / 2
+        ):
+            raise ValueError(
+                "shrink_threshold must be below max_capacity / growth_factor and max_capacity / 2"
+            )
         self.size = size
         self.empty_slots = self.size
         self.data = [None] * self.size
+        # number of entries (not buckets) in the data array
+        self.count = 0
         self.max_capacity = max_capacity
+        self.growth_factor = growth_factor
+        # load factor that triggers a shrink, None disables shrinking
+        self.shrink_threshold = shrink_threshold
+        # set once the load factor reached shrink_threshold after the last resize
+        self._shrink_armed = False
+        self.min_size = self.size
+        # any callable key -> int, defaults to native hash() + finalizer
+        self.hash_function = resolve_hash_function(hash_function)
+        # incremental resize: old table being migrated into this one and the next old bucket to migrate
+        self.incremental_resize = incremental_resize
+        self.rehash_step = rehash_step
+        self._rehash_source = None
+        self._rehash_index = 0
+        # incremented whenever entries are added, removed or moved, checked by iterators
+        self._version = 0
+        # number of live iterators, lookups do not migrate buckets while it is not 0
+        self._iterators = 0
+        # Bloom filter of the hashes of the keys in the data array, None if disabled
+        self.bloom_filter = bloom_filter
+        self.bloom_error_rate = bloom_error_rate
+        self.bloom = self._new_bloom_filter() if bloom_filter is not None else None
+        # recorded chain lengths and resizes, None unless stats are enabled
+        self._stats = TableStats(on_resize) if stats or on_resize is not None else None
 
     def _hash(self, key):
         """
@@ -38,11 +145,7 @@ class HashTableSeparateChaining:
         Uses self.size which is adjusted in _increase_size()
         function to dynamically increase the hash table capacity.
         """
-        key = str(key)
-        char_sum = 0
-        for char in key:
-            char_sum += ord(char)
-        return char_sum % self.size
+        return self.hash_function(key) % self.size
 
     def set(self, key, value):
         """
@@ -54,23 +157,53 @@ class HashTableSeparateChaining:
         Takes O(1) on average and O(n) for worst case.
         Note: average case only true if you have a good uniform hash function.
         """
+        full_hash = self.hash_function(key)
+        if self._rehash_source is not None:
+            self._rehash()
+            # the key moves to the new table so the copy in the old table is dropped
+            if self._rehash_source is not None:
+                self._rehash_source._pop(key, full_hash)
+        self._set(full_hash, key, value)
+
+    def _set(self, full_hash, key, value):
+        """
+        Inserts or updates key in the bucket of its full hash in the current data array.
+        The full hash is also what the Bloom filter gets, so the key is hashed once.
+        Shared by set(), set_many() and the migration of entries during a resize.
+
+        Takes O(1) on average and O(n) for worst case.
+        """
+        hash = full_hash % self.size
         new_entry = {"key": key, "value": value}
-        hash = self._hash(key)
-        print(f"{key}, {hash}")
         if self.data[hash]:
-            for entry in self.data[hash]:
+            for i, entry in enumerate(self.data[hash]):
                 # check if key is already in table
                 if entry["key"] == key:
+                    if self._stats is not None:
+                        self._stats.record_probe("set", i + 1)
                     # update value if already in table
                     entry["value"] = value
                     return
+            if self._stats is not None:
+                self._stats.record_probe("set", len(self.data[hash]))
             # if key not in table create new entry and append to array
             self.data[hash].append(new_entry)
+            self.count += 1
+            self._version += 1
+            if self.bloom is not None:
+                self._bloom_add(full_hash)
+            self._arm_shrink()
         # case when hash is None
         else:
+            if self._stats is not None:
+                self._stats.record_probe("set", 0)
             # initialize array to store and entries and add entry
             self.data[hash] = [new_entry]
+            self.count += 1
+            self._version += 1
             self.empty_slots -= 1
+            if self.bloom is not None:
+                self._bloom_add(full_hash)
             # checks max capacity not exceed and resizes if necessary
             self._check_capacity()
 
@@ -78,37 +211,453 @@ class HashTableSeparateChaining:
         """
         Gets the value corresponding to the specified key.
         If the key is not present in the hash table, null is returned.
+        While an incremental resize is in progress the old table is checked as well.
+        A key ruled out by the Bloom filter returns None without a message.
+        No migration step is taken while an iterator is live.
 
         Takes O(1) on average and O(n) for worst case.
         Note: average case only true if you have a good uniform hash function.
         """
-        hash = self._hash(key)
+        if self._rehash_source is not None and not self._iterators:
+            self._rehash()
+        full_hash = self.hash_function(key)
+        if self._bloom_rejects(full_hash):
+            return
+        entry = self._get_entry(key, full_hash, bloom_checked=True)
+        if entry is not None:
+            return entry["value"]
+        print(f"Key: {key} not found in hash table")
+        return
+
+    def get_entry(self, key):
+        """
+        Returns the entry {"key": key, "value": value} of key, or None without
+        reporting it if the key is not present. The value can be updated in place
+        through the entry, without a second lookup.
+        No migration step is taken while an iterator is live.
+        Takes O(1) on average and O(n) for worst case.
+        """
+        if self._rehash_source is not None and not self._iterators:
+            self._rehash()
+        return self._get_entry(key)
+
+    def _get_entry(self, key, full_hash=None, bloom_checked=False):
+        """
+        Returns the entry of key from this table or, during an incremental
+        resize, from the old table. Returns None if the key is not present.
+        Takes O(1) on average and O(n) for worst case.
+        """
+        if full_hash is None:
+            full_hash = self.hash_function(key)
+        entry = self._find(key, full_hash, bloom_checked)
+        if entry is None and self._rehash_source is not None:
+            entry = self._rehash_source._find(key, full_hash, bloom_checked)
+        return entry
+
+    def _find(self, key, full_hash=None, bloom_checked=False):
+        """
+        Returns the entry of key or None if the key is not present.
+        Returns None without scanning a bucket if the Bloom filter rules the key out,
+        unless the caller already asked the filter (bloom_checked).
+
+        Takes O(1) on average and O(n) for worst case.
+        """
+        if full_hash is None:
+            full_hash = self.hash_function(key)
+        if (
+            not bloom_checked
+            and self.bloom is not None
+            and not self.bloom.contains_hash(full_hash)
+        ):
+            if self._stats is not None:
+                self._stats.record_probe("miss", 0)
+            return
+        hash = full_hash % self.size
         if self.data[hash]:
-            for entry in self.data[hash]:
+            for i, entry in enumerate(self.data[hash]):
                 # check if key is already in table
                 if entry["key"] == key:
-                    return entry["value"]
-        print(f"Key: {key} not found in hash table")
+                    if self._stats is not None:
+                        self._stats.record_probe("hit", i + 1)
+                    return entry
+        if self._stats is not None:
+            self._stats.record_probe("miss", len(self.data[hash] or ()))
         return
 
     def remove(self, key):
         """
-        Removes and returns the specified key if present
+        Removes and returns the specified key if present.
+        A key ruled out by the Bloom filter returns None without a message.
         Takes O(1) on average and O(n) for worst case.
         Note: average case only true if you have a good uniform hash function.
         """
-        hash = self._hash(key)
+        if self._rehash_source is not None:
+            self._rehash()
+        full_hash = self.hash_function(key)
+        if self._bloom_rejects(full_hash):
+            return
+        entry = self._remove_entry(key, full_hash, bloom_checked=True)
+        if entry is not None:
+            return entry
+        print(f"Key: {key} not found in hash table")
+        return
+
+    def pop_entry(self, key):
+        """
+        Removes and returns the entry of key, or None without reporting it
+        if the key is not present
+        Takes O(1) on average and O(n) for worst case.
+        """
+        if self._rehash_source is not None:
+            self._rehash()
+        return self._remove_entry(key)
+
+    def _remove_entry(self, key, full_hash=None, bloom_checked=False):
+        """
+        Removes and returns the entry of key from this table or, during an
+        incremental resize, from the old table. Returns None if the key is not present.
+        Takes O(1) on average and O(n) for worst case.
+        """
+        if full_hash is None:
+            full_hash = self.hash_function(key)
+        entry = self._pop(key, full_hash, bloom_checked)
+        if entry is None and self._rehash_source is not None:
+            entry = self._rehash_source._pop(key, full_hash, bloom_checked)
+        return entry
+
+    def _pop(self, key, full_hash=None, bloom_checked=False):
+        """
+        Removes and returns the entry of key without reporting a missing key.
+        The Bloom filter is skipped if the caller already asked it (bloom_checked).
+        Takes O(1) on average and O(n) for worst case.
+        """
+        if full_hash is None:
+            full_hash = self.hash_function(key)
+        if (
+            not bloom_checked
+            and self.bloom is not None
+            and not self.bloom.contains_hash(full_hash)
+        ):
+            if self._stats is not None:
+                self._stats.record_probe("miss", 0)
+            return
+        hash = full_hash % self.size
         if self.data[hash]:
             for i, entry in enumerate(self.data[hash]):
                 # check if key is already in table
                 if entry["key"] == key:
-                    # increase empty slots if array contains one entry
-                    if i == 0:
+                    if self._stats is not None:
+                        self._stats.record_probe("hit", i + 1)
+                    entry = self.data[hash].pop(i)
+                    self.count -= 1
+                    self._version += 1
+                    if self.bloom_filter == "counting":
+                        self.bloom.remove_hash(full_hash)
+                    # increase empty slots if the array is now empty
+                    if not self.data[hash]:
                         self.empty_slots += 1
-                    return self.data[hash].pop(i)
-        print(f"Key: {key} not found in hash table")
+                    self._check_shrink()
+                    return entry
+        if self._stats is not None:
+            self._stats.record_probe("miss", len(self.data[hash] or ()))
         return
 
+    def _check_shrink(self):
+        """
+        Shrinks the table once the entries fall below shrink_threshold of the buckets.
+        The new size puts the load factor at half of max_capacity, away from
+        both the growth and the shrink threshold.
+        Not done while an incremental resize is in progress, nor before the
+        load factor reached shrink_threshold since the last resize.
+        Takes O(size) time when triggered, amortized O(1) per removal
+        """
+        if (
+            self.shrink_threshold is None
+            or self._rehash_source is not None
+            or not self._shrink_armed
+        ):
+            return
+        if self.size > self.min_size and self.count < self.shrink_threshold * self.size:
+            target_size = int(self.count / (self.max_capacity / 2)) + 1
+            self._rebuild(max(target_size, self.min_size))
+
+    def _arm_shrink(self):
+        """
+        Allows shrinking once the load factor reaches shrink_threshold.
+        A resize disarms it, so a table that lands below the threshold after a
+        resize is not shrunk by the next removal.
+        Takes O(1)
+        """
+        if self.shrink_threshold is not None and not self._shrink_armed:
+            self._shrink_armed = self.count >= self.shrink_threshold * self.size
+
+    def occupancy(self):
+        """
+        Returns the number of allocated buckets against the number of live entries.
+        During an incremental resize both the old and the new buckets are counted.
+        Takes O(1)
+        """
+        slots = self.size
+        if self._rehash_source is not None:
+            slots += self._rehash_source.size
+        live_entries = len(self)
+        return {
+            "slots": slots,
+            "live_entries": live_entries,
+            "used_buckets": self.size - self.empty_slots,
+            "load_factor": live_entries / slots,
+        }
+
+    def stats(self):
+        """
+        Returns the recorded chain length histograms and resize counters
+        together with the occupancy of the table and its longest chain.
+        Separate chaining has no tombstones, so their count is always 0.
+        Raises ValueError if the table was created without stats.
+        Takes O(size) time to find the longest chain
+        """
+        if self._stats is None:
+            raise ValueError("stats are disabled, create the table with stats=True")
+        return {
+            **self._stats.snapshot(),
+            **self.occupancy(),
+            "tombstones": 0,
+            "max_chain": max(self.bucket_histogram()),
+        }
+
+    def set_many(self, pairs):
+        """
+        Sets all (key, value) pairs of an iterable. The table is resized at most
+        once, before the first pair is inserted, and all keys are hashed in one pass.
+        Takes O(n) time on average for n pairs
+        """
+        pairs = list(pairs)
+        # every new key can take up at most one more bucket
+        self.reserve(self.size - self.empty_slots + len(pairs))
+        # full hashes do not depend on the table size, so they stay valid across a resize
+        hashes = [self.hash_function(key) for key, _ in pairs]
+        for full_hash, (key, value) in zip(hashes, pairs):
+            self._set(full_hash, key, value)
+
+    def get_many(self, keys):
+        """
+        Returns a list with the value of every key of an iterable.
+        Keys that are not present give None.
+        Takes O(n) time on average for n keys
+        """
+        values = []
+        for key in keys:
+            entry = self._get_entry(key)
+            values.append(None if entry is None else entry["value"])
+        return values
+
+    def remove_many(self, keys):
+        """
+        Removes every key of an iterable and returns a list of the removed entries.
+        Keys that are not present give None.
+        Takes O(n) time on average for n keys
+        """
+        return [self._remove_entry(key) for key in keys]
+
+    def reserve(self, n):
+        """
+        Grows the table once so that n entries fit without another resize.
+        An incremental resize in progress is finished first.
+        Takes O(n) time if the table has to grow and O(1) otherwise
+        """
+        while self._rehash_source is not None:
+            self._finish_rehash()
+        required_size = int(n / self.max_capacity) + 1
+        if required_size > self.size:
+            self._rebuild(required_size)
+
+    def fits(self, n):
+        """
+        Returns whether n entries fit without a resize, however they are spread
+        over the buckets (the buckets in use never outnumber the entries)
+        Takes O(1)
+        """
+        return n < self.max_capacity * self.size
+
+    @classmethod
+    def from_iterable(cls, pairs, max_capacity=0.75, **options):
+        """
+        Builds a hash table from an iterable of (key, value) pairs.
+        The table is allocated once with room for all pairs.
+        Takes O(n) time on average for n pairs
+        """
+        pairs = list(pairs)
+        table = cls(int(len(pairs) / max_capacity) + 1, max_capacity, **options)
+        table.set_many(pairs)
+        return table
+
+    def dump(self, path):
+        """
+        Writes the table to a binary snapshot: the options and counters of the table
+        and columns with the bucket, key and value of every entry.
+        An incremental resize in progress is finished first.
+        Takes O(n) time
+        """
+        while self._rehash_source is not None:
+            self._finish_rehash()
+        with gc_paused():
+            entries = [entry for bucket in self.data if bucket for entry in bucket]
+            buckets = [i for i, bucket in enumerate(self.data) if bucket for _ in bucket]
+            keys = [entry["key"] for entry in entries]
+            values = [entry["value"] for entry in entries]
+        header = {
+            "kind": type(self).__name__,
+            "fingerprint": hash_fingerprint(self.hash_function),
+            "min_size": self.min_size,
+            "options": {
+                "size": self.size,
+                "max_capacity": self.max_capacity,
+                "growth_factor": self.growth_factor,
+                "incremental_resize": self.incremental_resize,
+                "rehash_step": self.rehash_step,
+                "shrink_threshold": self.shrink_threshold,
+                "bloom_filter": self.bloom_filter,
+                "bloom_error_rate": self.bloom_error_rate,
+            },
+        }
+        with gc_paused():
+            write_snapshot(path, header, [buckets, keys, values])
+
+    @classmethod
+    def load(cls, path, hash_function=None):
+        """
+        Restores a table written by dump(). Hash functions are not stored,
+        so a table that did not use the default hash needs the same one again.
+        If hash_function places keys like the dumped table did, the buckets are
+        rebuilt directly from the bucket column. Otherwise (for example str keys in
+        a process with another PYTHONHASHSEED) the entries are placed again.
+        Takes O(n) time
+        """
+        with gc_paused():
+            header, (buckets, keys, values) = read_snapshot(path, cls.__name__)
+            table = cls(hash_function=hash_function, **header["options"])
+            table.min_size = header["min_size"]
+            if header["fingerprint"] is None or header[
+                "fingerprint"
+            ] != hash_fingerprint(table.hash_function):
+                for key, value in zip(keys, values):
+                    table._set(table.hash_function(key), key, value)
+                return table
+            data = table.data
+            for i, key, value in zip(buckets, keys, values):
+                if data[i] is None:
+                    data[i] = [{"key": key, "value": value}]
+                    table.empty_slots -= 1
+                else:
+                    data[i].append({"key": key, "value": value})
+            table.count = len(keys)
+            if table.bloom is not None:
+                table._rebuild_bloom_filter()
+        return table
+
+    def __contains__(self, key):
+        """
+        Returns True if key is present. Unlike get(), a missing key is not reported.
+        Takes O(1) on average and O(n) for worst case.
+        """
+        return self._get_entry(key) is not None
+
+    def _new_bloom_filter(self, entries=0):
+        """
+        Returns an empty Bloom filter with room for the entries at which the buckets
+        in use reach max_capacity, about -ln(1 - max_capacity) * size for uniform
+        hashing, or for entries if there are more
+        Takes O(size) time
+        """
+        bucket_share = min(self.max_capacity, 0.99)
+        capacity = int(-math.log(1 - bucket_share) * self.size) + 1
+        return BLOOM_FILTERS[self.bloom_filter](max(capacity, entries), self.bloom_error_rate)
+
+    def _bloom_rejects(self, full_hash):
+        """
+        Returns True if the Bloom filter, and during an incremental resize the
+        filter of the old table as well, rules out a key with this hash
+        Takes O(k)
+        """
+        if self.bloom is None or self.bloom.contains_hash(full_hash):
+            return False
+        old = self._rehash_source
+        if old is not None and old.bloom.contains_hash(full_hash):
+            return False
+        if self._stats is not None:
+            self._stats.record_probe("miss", 0)
+        return True
+
+    def _bloom_add(self, full_hash):
+        """
+        Adds the hash of a new key to the Bloom filter.
+        Once the filter has seen more adds than its capacity (removed keys
+        stay in a standard filter) it is rebuilt from the live entries.
+        Takes O(k), plus O(n) when the filter is rebuilt
+        """
+        self.bloom.add_hash(full_hash)
+        if self.bloom.count > self.bloom.capacity:
+            self._rebuild_bloom_filter()
+
+    def _rebuild_bloom_filter(self):
+        """
+        Replaces the Bloom filter with a new one that holds the entries of the data array.
+        The entries of the old table of an incremental resize are in the filter of the old table.
+        Takes O(n) time
+        """
+        self.bloom = self._new_bloom_filter(2 * self.count)
+        for bucket in self.data:
+            if bucket:
+                for entry in bucket:
+                    self.bloom.add_hash(self.hash_function(entry["key"]))
+
+    def __len__(self):
+        """
+        Returns the number of entries, including the entries of the old table
+        during an incremental resize
+        Takes O(1)
+        """
+        if self._rehash_source is not None:
+            return self.count + self._rehash_source.count
+        return self.count
+
+    def _modification_state(self):
+        """
+        Returns the versions of this table and of the old table of an incremental resize
+        """
+        old = self._rehash_source
+        return self._version, old, None if old is None else old._version
+
+    def items(self):
+        """
+        Yields every (key, value) pair without building a list, the pairs
+        of the old table last during an incremental resize.
+        Raises RuntimeError if the table is modified during the iteration.
+        Takes O(n) time in total and O(1) memory
+        """
+        state = self._modification_state()
+        tables = [self] if self._rehash_source is None else [self, self._rehash_source]
+        self._iterators += 1
+        try:
+            for table in tables:
+                for bucket in table.data:
+                    if bucket:
+                        for entry in bucket:
+                            yield entry["key"], entry["value"]
+                            if self._modification_state() != state:
+                                raise RuntimeError("hash table changed during iteration")
+        finally:
+            self._iterators -= 1
+
+    def __iter__(self):
+        """
+        Yields every key without building a list.
+        Raises RuntimeError if the table is modified during the iteration.
+        Takes O(n) time in total and O(1) memory
+        """
+        for key, _ in self.items():
+            yield key
+
     def keys(self):
         """
         Returns all keys in the hash table
@@ -119,6 +668,8 @@ class HashTableSeparateChaining:
             if self.data[i]:
                 for entry in self.data[i]:
                     keys_array.append(entry["key"])
+        if self._rehash_source is not None:
+            keys_array.extend(self._rehash_source.keys())
         return keys_array
 
     def values(self):
@@ -131,8 +682,18 @@ class HashTableSeparateChaining:
             if self.data[i]:
                 for entry in self.data[i]:
                     values_array.append(entry["value"])
+        if self._rehash_source is not None:
+            values_array.extend(self._rehash_source.values())
         return values_array
 
+    def bucket_histogram(self):
+        """
+        Returns a histogram {chain length: number of buckets}.
+        A uniform hash function keeps almost all chains at length 0, 1 or 2.
+        Takes O(n) time
+        """
+        return histogram(len(bucket) if bucket else 0 for bucket in self.data)
+
     def _get_entries(self):
         """
         Private function to pull all entries from the hash table for resize
@@ -143,6 +704,8 @@ class HashTableSeparateChaining:
             if self.data[i]:
                 for entry in self.data[i]:
                     entries_array.append(entry)
+        if self._rehash_source is not None:
+            entries_array.extend(self._rehash_source._get_entries())
         return entries_array
 
     def _increase_size(self, resize_factor):
@@ -150,15 +713,133 @@ class HashTableSeparateChaining:
         Increases the size of the hash table by extracting all entries,
         creates a new empty hash table and resets global variables, then
         sets the entries into the new hash table.
+        With incremental_resize the entries are migrated by later operations instead.
+        Takes O(n) time, O(1) with incremental_resize
+        """
+        if self.incremental_resize:
+            self._start_rehash(resize_factor)
+            return
+        self._rebuild(self._grown_size(resize_factor))
+
+    def _grown_size(self, resize_factor):
+        """
+        Returns the size of the table after growing by resize_factor
+        """
+        return max(int(self.size * resize_factor), self.size + 1)
+
+    def _rebuild(self, size):
+        """
+        Creates a new empty data array of the given size and resets global variables,
+        then walks the buckets of the old data array and sets their entries into the
+        new hash table, without collecting the entries into a list first.
+        An incremental resize in progress is finished first.
         Takes O(n) time
         """
-        entries = self._get_entries()
-        self.size *= resize_factor
+        while self._rehash_source is not None:
+            self._finish_rehash()
+        # moved entries are not recorded as sets
+        stats, self._stats = self._stats, None
+        start = time.perf_counter() if stats is not None else None
+        old_size = self.size
+        data = self.data
+        self._reset_buckets(size)
+        for bucket in data:
+            if bucket:
+                for entry in bucket:
+                    self._set(self.hash_function(entry["key"]), entry["key"], entry["value"])
+        self._stats = stats
+        if stats is not None:
+            stats.record_resize(old_size, self.size, len(self), time.perf_counter() - start)
+        return
+
+    def _reset_buckets(self, size):
+        """
+        Replaces the data array with an empty array of the given size
+        """
+        self.size = size
         self.empty_slots = self.size
+        self.count = 0
+        self._shrink_armed = False
+        self._version += 1
         self.data = [None] * self.size
-        for entry in entries:
-            self.set(**entry)
-        return
+        if self.bloom is not None:
+            self.bloom = self._new_bloom_filter()
+
+    def _start_rehash(self, resize_factor):
+        """
+        Starts an incremental resize (progressive rehash).
+        The current data array is handed to a detached table that only serves
+        lookups and removals, and an empty larger array takes its place.
+        Every following operation migrates rehash_step old buckets into the new array.
+        Takes O(new size) time to allocate the new array
+        """
+        # a resize can only start once the previous one has finished
+        while self._rehash_source is not None:
+            self._finish_rehash()
+        start = time.perf_counter() if self._stats is not None else None
+        old = object.__new__(type(self))
+        old.__dict__.update(self.__dict__)
+        # shrinking the old table in place would move entries behind the migration index
+        old.shrink_threshold = None
+        # lookups in the old table are not recorded
+        old._stats = None
+        self._reset_buckets(self._grown_size(resize_factor))
+        self._rehash_source = old
+        self._rehash_index = 0
+        if self._stats is not None:
+            self._stats.record_resize(
+                old.size, self.size, len(self), time.perf_counter() - start, incremental=True
+            )
+
+    def _rehash(self):
+        """
+        Migrates the entries of the next rehash_step buckets of the old table
+        into the new array. The resize is finished after the last old bucket.
+        Takes O(rehash_step) time on average
+        """
+        if self._stats is not None:
+            # moved entries are not recorded as sets
+            stats, self._stats = self._stats, None
+            start = time.perf_counter()
+            try:
+                self._rehash()
+            finally:
+                self._stats = stats
+            stats.record_migration(time.perf_counter() - start)
+            return
+        old = self._rehash_source
+        for _ in range(self.rehash_step):
+            bucket = old.data[self._rehash_index]
+            while bucket:
+                entry = bucket.pop()
+                old.count -= 1
+                old._version += 1
+                self._set(self.hash_function(entry["key"]), entry["key"], entry["value"])
+                # migrating may have filled the new array and started another resize
+                if self._rehash_source is not old:
+                    return
+            old.data[self._rehash_index] = None
+            self._rehash_index += 1
+            if self._rehash_index == old.size:
+                self._rehash_source = None
+                return
+
+    def _finish_rehash(self):
+        """
+        Migrates all remaining entries of the old table at once.
+        Takes O(n) time
+        """
+        old = self._rehash_source
+        self._rehash_source = None
+        stats, self._stats = self._stats, None
+        start = time.perf_counter() if stats is not None else None
+        for i in range(self._rehash_index, old.size):
+            if old.data[i]:
+                for entry in old.data[i]:
+                    self._set(self.hash_function(entry["key"]), entry["key"], entry["value"])
+        self._stats = stats
+        if stats is not None:
+            stats.record_migration(time.perf_counter() - start)
 
     def _check_capacity(self):
         """
@@ -166,10 +847,13 @@ class HashTableSeparateChaining:
         is less than the maximum capacity.
         If maximum capacity is exceeded, the hash table is resized
         """
+        self._arm_shrink()
         current_capacity = 1 - self.empty_slots / self.size
         if current_capacity >= self.max_capacity:
-            print("Capacity exceeded. Increasing Hash Table size by factor of 10")
-            self._increase_size(10)
+            print(
+                f"Capacity exceeded. Increasing Hash Table size by factor of {self.growth_factor}"
+            )
+            self._increase_size(self.growth_factor)
 
 
 if __name__ == "__main__":
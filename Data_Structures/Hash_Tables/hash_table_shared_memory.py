@@ -0,0 +1,535 @@
+"""
+Sharded Hash Table in Shared Memory for Multiple Processes
+
+Python threads cannot run lookups in parallel while they hold the GIL, and a table in the memory of one
+process can only be read by other processes through pickling (a Manager or a Queue). This table keeps its
+entries in `multiprocessing.shared_memory` blocks instead. Every process that attaches to the table maps
+the same blocks, so a worker process reads keys and values straight from shared memory without any
+message to the owner.
+
+The table is divided into shards, each a linear probing table in its own shared memory block with the
+layout of HashTableMmap:
+- Shard header (64 bytes): a sequence number, the number of slots, entries and tombstones and the end of
+  the value heap.
+- Slots: fixed-width records of `1 + key_size + 8 + 4` bytes: a state byte (empty, full or tombstone),
+  the key, and the offset and length of the value in the value heap.
+- Value heap: the value bytes.
+
+Keys are bytes (or str, encoded as utf-8) of exactly `key_size` bytes and values are bytes, as in
+HashTableMmap. Every process has to place a key in the same shard and slot, so keys are hashed with
+`stable_hash` (the native hash() of str and bytes differs between processes). The shard is picked from
+a second mix of the hash (fmix64), like in ConcurrentHashTable.
+
+A directory block holds the options of the table and the generation of every shard. Shared memory blocks
+cannot grow, so a shard that is full (or whose value heap is full) is rebuilt into a new block named after
+its next generation, which is then published in the directory. A full shard gets `growth_factor` times the
+slots, unless tombstones make up at least half of its used slots: then it keeps the same number of slots,
+so inserts and removals of a stable number of keys do not grow it. Processes look up the generation before
+every operation and attach to the new block when it changed.
+
+Writes to a shard are serialized by one multiprocessing lock per shard. Reads take no lock: the shard
+sequence number works as a seqlock. A writer makes it odd before changing the shard and even again
+afterwards, and a reader retries if the number was odd or changed while it read. A rebuilt shard keeps
+an odd sequence number forever, so readers still mapping it move on to the new generation.
+
+The locks are created by the process that creates the table and can only be passed to other processes
+when they start: hand the table to workers as an argument of multiprocessing.Process or as initargs of a
+Pool. The blocks are not registered with the resource tracker (any process may create a new generation of
+a shard, and the tracker would remove it when that process exits), so the creating process has to call
+`unlink()` (or use the table as a context manager) once the table is no longer needed.
+
+Key Operations:
+- `set(key, value)`: Inserts or updates a key-value pair in the hash table.
+- `get(key)`: Retrieves the value associated with a given key, without taking a lock.
+- `remove(key)`: Removes a key-value pair from the hash table.
+- `get_keys()`: Returns a list of all keys.
+- `get_values()`: Returns a list of all values.
+- `occupancy()`: Returns the number of allocated slots against the number of live entries.
+- `close()`: Detaches this process from the shared memory blocks.
+- `unlink()`: Detaches and destroys the shared memory blocks.
+- `_rebuild(shard, slots, heap_size)`: Copies the entries of a shard into the block of its next generation.
+"""
+
+import contextlib
+import multiprocessing
+import secrets
+import struct
+import sys
+import threading
+import time
+from multiprocessing import resource_tracker, shared_memory
+
+from .hash_functions import fmix64, resolve_hash_function, stable_hash
+
+MAGIC = b"HTSM"
+VERSION = 1
+# magic, version, shards, key size, max capacity, growth factor
+DIRECTORY_HEADER = struct.Struct("<4sIIIdd")
+DIRECTORY_HEADER_SIZE = 64
+GENERATION = struct.Struct("<Q")
+# sequence number, slots, entries, tombstones, heap end
+SHARD_HEADER = struct.Struct("<QQQQQ")
+SHARD_HEADER_SIZE = 64
+# offset and length of the value of a slot
+VALUE_REF = struct.Struct("<QI")
+
+EMPTY = 0
+FULL = 1
+TOMBSTONE = 2
+
+# errors a reader can hit while it reads a shard in the middle of a write (or attaches to
+# a generation that was just replaced and unlinked), before it retries
+_TORN_READ_ERRORS = (IndexError, ValueError, ZeroDivisionError, struct.error, FileNotFoundError)
+
+# serializes the patching of the resource tracker functions by _untracked()
+_TRACKER_LOCK = threading.Lock()
+
+
+@contextlib.contextmanager
+def _untracked():
+    """
+    Keeps SharedMemory from registering blocks with the resource tracker (and from
+    unregistering them on unlink) before python 3.13, which added track=False.
+    The functions are patched for the whole process, so threads creating blocks at
+    the same time take turns; otherwise one could save and restore the other's patch.
+    """
+    with _TRACKER_LOCK:
+        register, unregister = resource_tracker.register, resource_tracker.unregister
+        resource_tracker.register = resource_tracker.unregister = lambda name, rtype: None
+        try:
+            yield
+        finally:
+            resource_tracker.register, resource_tracker.unregister = register, unregister
+
+
+def _shared_memory(name, create=False, size=0):
+    """
+    Creates or attaches a shared memory block that the resource tracker does not know about
+    """
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name, create, size, track=False)
+    with _untracked():
+        return shared_memory.SharedMemory(name, create, size)
+
+
+def _unlink(block):
+    """
+    Destroys a shared memory block created or attached by _shared_memory()
+    """
+    if sys.version_info >= (3, 13):
+        block.unlink()
+        return
+    with _untracked():
+        block.unlink()
+
+
+class HashTableSharedMemory:
+    def __init__(
+        self,
+        key_size,
+        shards=8,
+        size=1024,
+        max_capacity=0.75,
+        growth_factor=2,
+        heap_size=65536,
+        hash_function=stable_hash,
+        context=None,
+    ):
+        if growth_factor <= 1:
+            raise ValueError("growth_factor must be greater than 1")
+        self.name = "ht" + secrets.token_hex(6)
+        self.hash_function = resolve_hash_function(hash_function)
+        self.directory = _shared_memory(
+            self.name, create=True, size=DIRECTORY_HEADER_SIZE + shards * GENERATION.size
+        )
+        DIRECTORY_HEADER.pack_into(
+            self.directory.buf, 0, MAGIC, VERSION, shards, key_size, max_capacity, growth_factor
+        )
+        self._read_directory()
+        for shard in range(shards):
+            self._create_shard(shard, 0, max(size // shards, 1), heap_size)
+        # one lock per shard serializes its writers
+        self.locks = [(context or multiprocessing).Lock() for _ in range(shards)]
+
+    def __getstate__(self):
+        # another process attaches to the blocks by name
+        return {"name": self.name, "hash_function": self.hash_function, "locks": self.locks}
+
+    def __setstate__(self, state):
+        self.name = state["name"]
+        self.hash_function = state["hash_function"]
+        self.locks = state["locks"]
+        self.directory = _shared_memory(self.name)
+        self._read_directory()
+
+    def _read_directory(self):
+        """
+        Reads the options of the table from the directory block
+        """
+        magic, version, shards, key_size, max_capacity, growth_factor = (
+            DIRECTORY_HEADER.unpack_from(self.directory.buf)
+        )
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{self.name} is not a shared memory hash table")
+        self.shards = shards
+        self.key_size = key_size
+        self.slot_size = 1 + key_size + VALUE_REF.size
+        self.max_capacity = max_capacity
+        self.growth_factor = growth_factor
+        # shard -> (generation, attached block)
+        self.blocks = [None] * shards
+
+    def _shard_name(self, shard, generation):
+        return f"{self.name}_{shard}_{generation}"
+
+    def _generation(self, shard):
+        offset = DIRECTORY_HEADER_SIZE + shard * GENERATION.size
+        return GENERATION.unpack_from(self.directory.buf, offset)[0]
+
+    def _create_shard(self, shard, generation, slots, heap_size):
+        """
+        Creates the empty block of a shard generation. Shared memory starts zeroed,
+        so every slot is already empty. Returns the block without publishing it.
+        """
+        heap_start = SHARD_HEADER_SIZE + slots * self.slot_size
+        block = _shared_memory(
+            self._shard_name(shard, generation), create=True, size=heap_start + heap_size
+        )
+        SHARD_HEADER.pack_into(block.buf, 0, 0, slots, 0, 0, heap_start)
+        self.blocks[shard] = (generation, block)
+        return block
+
+    def _block(self, shard):
+        """
+        Returns the block of the current generation of a shard, attaching to it
+        if the shard was rebuilt since this process last used it
+
+        Takes O(1)
+        """
+        generation = self._generation(shard)
+        attached = self.blocks[shard]
+        if attached is not None and attached[0] == generation:
+            return attached[1]
+        block = _shared_memory(self._shard_name(shard, generation))
+        if attached is not None:
+            attached[1].close()
+        self.blocks[shard] = (generation, block)
+        return block
+
+    def _route(self, key):
+        """
+        Returns the encoded key, its hash and the shard it belongs to
+        """
+        if isinstance(key, str):
+            key = key.encode()
+        key = bytes(key)
+        if len(key) != self.key_size:
+            raise ValueError(f"keys must be {self.key_size} bytes, got {len(key)}")
+        full_hash = self.hash_function(key)
+        return key, full_hash, fmix64(full_hash) % self.shards
+
+    def _find(self, buf, key, full_hash):
+        """
+        Returns (slot, first tombstone slot) of key in a shard. The slot is None if the key
+        is not present, the tombstone slot is None if no tombstone preceded it.
+
+        Takes O(1) on average and O(n) for worst case.
+        """
+        _, slots, _, _, _ = SHARD_HEADER.unpack_from(buf)
+        i = full_hash % slots
+        first_tombstone = None
+        for _ in range(slots):
+            offset = SHARD_HEADER_SIZE + i * self.slot_size
+            state = buf[offset]
+            if state == EMPTY:
+                return None, first_tombstone
+            if state == TOMBSTONE:
+                if first_tombstone is None:
+                    first_tombstone = i
+            elif buf[offset + 1 : offset + 1 + self.key_size] == key:
+                return i, first_tombstone
+            i = (i + 1) % slots
+        return None, first_tombstone
+
+    def _value_ref(self, buf, i):
+        return VALUE_REF.unpack_from(buf, SHARD_HEADER_SIZE + i * self.slot_size + 1 + self.key_size)
+
+    def _read_value(self, buf, i):
+        value_offset, length = self._value_ref(buf, i)
+        return bytes(buf[value_offset : value_offset + length])
+
+    def get(self, key):
+        """
+        Gets the value corresponding to the specified key and its slot in its shard.
+        If the key is not present in the hash table, null is returned.
+        Takes no lock: the read is retried if a writer changed the shard meanwhile.
+
+        Takes O(1) on average and O(n) for worst case.
+        """
+        key, full_hash, shard = self._route(key)
+        while True:
+            try:
+                buf = self._block(shard).buf
+                sequence = SHARD_HEADER.unpack_from(buf)[0]
+                if sequence & 1:
+                    # a write is in progress or the shard was rebuilt into a new block
+                    time.sleep(0)
+                    continue
+                i, _ = self._find(buf, key, full_hash)
+                value = None if i is None else self._read_value(buf, i)
+            except _TORN_READ_ERRORS:
+                continue
+            if SHARD_HEADER.unpack_from(buf)[0] == sequence:
+                break
+        if i is None:
+            print("Key is not present in Hash Table")
+            return
+        return value, i
+
+    def _begin_write(self, buf):
+        """
+        Makes the sequence number of a shard odd so that readers retry
+        """
+        SHARD_HEADER.pack_into(buf, 0, SHARD_HEADER.unpack_from(buf)[0] + 1, *self._counters(buf))
+
+    def _end_write(self, buf, count, tombstones, heap_end):
+        """
+        Stores the counters of a shard and makes its sequence number even again
+        """
+        sequence, slots = SHARD_HEADER.unpack_from(buf)[:2]
+        SHARD_HEADER.pack_into(buf, 0, sequence + 1, slots, count, tombstones, heap_end)
+
+    @staticmethod
+    def _counters(buf):
+        return SHARD_HEADER.unpack_from(buf)[1:]
+
+    def set(self, key, value):
+        """
+        Sets a new key value pair into the hash table or updates the value of an existing key.
+        Keys are bytes or str of key_size bytes, values are bytes.
+        The shard is rebuilt into a larger block first if it is full, or into
+        a block of the same size if tombstones make up most of it.
+
+        Takes O(1) on average and O(n) for worst case.
+        """
+        key, full_hash, shard = self._route(key)
+        value = bytes(value)
+        with self.locks[shard]:
+            buf = self._block(shard).buf
+            slots, count, tombstones, heap_end = self._counters(buf)
+            i, first_tombstone = self._find(buf, key, full_hash)
+            # an update whose value fits in the space of the old value needs no heap space
+            fits_in_place = i is not None and len(value) <= self._value_ref(buf, i)[1]
+            if i is None and count + tombstones + 1 >= self.max_capacity * slots:
+                if tombstones >= count:
+                    # clearing the tombstones is enough, the live entries fill at most half of max_capacity
+                    buf = self._rebuild(shard, slots, len(value))
+                else:
+                    print(
+                        f"Capacity exceeded. Increasing Hash Table size by factor of {self.growth_factor}"
+                    )
+                    buf = self._rebuild(shard, int(slots * self.growth_factor), len(value))
+                slots, count, tombstones, heap_end = self._counters(buf)
+                i, first_tombstone = None, None
+            elif not fits_in_place and heap_end + len(value) > len(buf):
+                # the value heap is full, rebuilding drops the space of old values
+                buf = self._rebuild(shard, slots, len(value))
+                slots, count, tombstones, heap_end = self._counters(buf)
+                i, first_tombstone = self._find(buf, key, full_hash)
+            self._begin_write(buf)
+            if i is not None:
+                value_offset, length = self._value_ref(buf, i)
+                if len(value) > length:
+                    value_offset = heap_end
+                    heap_end += len(value)
+                buf[value_offset : value_offset + len(value)] = value
+                ref_offset = SHARD_HEADER_SIZE + i * self.slot_size + 1 + self.key_size
+                VALUE_REF.pack_into(buf, ref_offset, value_offset, len(value))
+            else:
+                if first_tombstone is not None:
+                    i = first_tombstone
+                    tombstones -= 1
+                else:
+                    i = full_hash % slots
+                    while buf[SHARD_HEADER_SIZE + i * self.slot_size] != EMPTY:
+                        i = (i + 1) % slots
+                self._write_entry(buf, i, key, value, heap_end)
+                heap_end += len(value)
+                count += 1
+            self._end_write(buf, count, tombstones, heap_end)
+
+    def _write_entry(self, buf, i, key, value, value_offset):
+        """
+        Writes key into slot i and value into the heap at value_offset
+        """
+        buf[value_offset : value_offset + len(value)] = value
+        offset = SHARD_HEADER_SIZE + i * self.slot_size
+        buf[offset + 1 : offset + 1 + self.key_size] = key
+        VALUE_REF.pack_into(buf, offset + 1 + self.key_size, value_offset, len(value))
+        buf[offset] = FULL
+
+    def remove(self, key):
+        """
+        Removes key, value pair and returns the corresponding value if present.
+        The slot becomes a tombstone.
+
+        Takes O(1) on average and O(n) for worst case.
+        """
+        key, full_hash, shard = self._route(key)
+        with self.locks[shard]:
+            buf = self._block(shard).buf
+            i, _ = self._find(buf, key, full_hash)
+            if i is None:
+                print("Key is not present in Hash Table")
+                return
+            deleted_value = self._read_value(buf, i)
+            _, count, tombstones, heap_end = self._counters(buf)
+            self._begin_write(buf)
+            buf[SHARD_HEADER_SIZE + i * self.slot_size] = TOMBSTONE
+            self._end_write(buf, count - 1, tombstones + 1, heap_end)
+            return deleted_value
+
+    def _entries(self, buf):
+        """
+        Returns the (key, value) pairs of a shard
+
+        Takes O(slots) time
+        """
+        slots = self._counters(buf)[0]
+        entries = []
+        for i in range(slots):
+            offset = SHARD_HEADER_SIZE + i * self.slot_size
+            if buf[offset] == FULL:
+                key = bytes(buf[offset + 1 : offset + 1 + self.key_size])
+                entries.append((key, self._read_value(buf, i)))
+        return entries
+
+    def _rebuild(self, shard, slots, extra_heap):
+        """
+        Copies the entries of a shard into a new block of its next generation with
+        the given number of slots and room for extra_heap more value bytes, publishes
+        the new generation and retires the old block. Tombstones and the space of
+        overwritten and removed values are dropped. Called with the lock of the shard held.
+
+        Takes O(n) time for the n entries of the shard
+        """
+        generation = self._generation(shard)
+        old_block = self._block(shard)
+        old = old_block.buf
+        entries = self._entries(old)
+        live_bytes = sum(len(value) for _, value in entries)
+        heap_size = max(2 * (live_bytes + extra_heap), 4096)
+        block = self._create_shard(shard, generation + 1, slots, heap_size)
+        buf = block.buf
+        heap_end = SHARD_HEADER_SIZE + slots * self.slot_size
+        for key, value in entries:
+            i = self.hash_function(key) % slots
+            while buf[SHARD_HEADER_SIZE + i * self.slot_size] != EMPTY:
+                i = (i + 1) % slots
+            self._write_entry(buf, i, key, value, heap_end)
+            heap_end += len(value)
+        SHARD_HEADER.pack_into(buf, 0, 0, slots, len(entries), 0, heap_end)
+        GENERATION.pack_into(
+            self.directory.buf, DIRECTORY_HEADER_SIZE + shard * GENERATION.size, generation + 1
+        )
+        # an odd sequence number that never becomes even sends readers to the new generation
+        self._begin_write(old)
+        del old
+        old_block.close()
+        _unlink(old_block)
+        return buf
+
+    def get_keys(self):
+        """
+        Returns all keys in the hash table. Each shard is read under its lock.
+
+        Takes O(n) time
+        """
+        keys = []
+        for shard in range(self.shards):
+            with self.locks[shard]:
+                keys.extend(key for key, _ in self._entries(self._block(shard).buf))
+        return keys
+
+    def get_values(self):
+        """
+        Returns all values in the hash table. Each shard is read under its lock.
+
+        Takes O(n) time
+        """
+        values = []
+        for shard in range(self.shards):
+            with self.locks[shard]:
+                values.extend(value for _, value in self._entries(self._block(shard).buf))
+        return values
+
+    def __len__(self):
+        return sum(self._counters(self._block(shard).buf)[1] for shard in range(self.shards))
+
+    def occupancy(self):
+        """
+        Returns the number of allocated slots against the number of live entries,
+        summed over all shards.
+
+        Takes O(shards)
+        """
+        slots = live_entries = tombstones = 0
+        for shard in range(self.shards):
+            shard_slots, count, shard_tombstones, _ = self._counters(self._block(shard).buf)
+            slots += shard_slots
+            live_entries += count
+            tombstones += shard_tombstones
+        return {
+            "shards": self.shards,
+            "slots": slots,
+            "live_entries": live_entries,
+            "tombstones": tombstones,
+            "load_factor": live_entries / slots,
+        }
+
+    def close(self):
+        """
+        Detaches this process from the shared memory blocks. The table cannot be used afterwards.
+        """
+        for attached in self.blocks:
+            if attached is not None:
+                attached[1].close()
+        self.blocks = [None] * self.shards
+        self.directory.close()
+
+    def unlink(self):
+        """
+        Destroys the shared memory blocks of the current generation of every shard
+        and the directory, then detaches. Call it from one process once every process is done.
+        """
+        for shard in range(self.shards):
+            _unlink(self._block(shard))
+        _unlink(self.directory)
+        self.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.unlink()
+
+
+def _set_range(table, start, stop):
+    """
+    Sets the keys start to stop - 1 (as 8-byte integers), run by the worker processes of the demo
+    """
+    for i in range(start, stop):
+        table.set(i.to_bytes(8, "little"), f"value {i}".encode())
+
+
+if __name__ == "__main__":
+    with HashTableSharedMemory(key_size=8, shards=4, size=16) as h:
+        workers = [
+            multiprocessing.Process(target=_set_range, args=(h, start, start + 50))
+            for start in (0, 50)
+        ]
+        for process in workers:
+            process.start()
+        for process in workers:
+            process.join()
+        print(h.get((77).to_bytes(8, "little")), h.occupancy())
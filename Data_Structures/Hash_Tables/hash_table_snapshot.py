@@ -0,0 +1,167 @@
+"""
+Binary Snapshots of Hash Tables
+
+Pickling a hash table serializes every python object in it one by one. For HashTableSeparateChaining that
+includes one {"key": ..., "value": ...} dict per entry. This module writes a table as a few columns
+instead (the keys, the values and the slot or bucket of every entry), each encoded in bulk.
+
+File layout:
+- `MAGIC` (8 bytes).
+- The header: a length-prefixed JSON object with the table class, its options and its counters.
+- The columns, in the order given by the header. A column is a type tag (1 byte), the number of items
+  (8 bytes), the payload length (8 bytes) and the payload.
+
+Column encodings, picked from the types of the items:
+- `s` (all str): the strings joined by NUL characters, utf-8 encoded. Used when no string contains a NUL.
+- `q` / `Q` (all int): an array of signed / unsigned 64-bit integers.
+- `d` (all float): an array of doubles.
+- `b` (all bytes): an array of 64-bit lengths followed by the concatenated bytes.
+- `p` (anything else): the list pickled as a whole.
+
+Slots and buckets are positions computed with the hash function of the table, and the native hash() of
+str and bytes changes from one process to the next (PYTHONHASHSEED). A snapshot therefore stores the
+hash of a fixed string (`hash_fingerprint`). If the table that loads the snapshot hashes it the same
+way, the entries are written straight back to their slots; otherwise they are placed again with the new
+hash values.
+
+Functions:
+- `write_snapshot(path, header, columns)`: Writes a header and a list of columns to a file.
+- `read_snapshot(path, kind)`: Reads a snapshot written for the table class `kind`.
+- `hash_fingerprint(hash_function)`: Returns the hash of a fixed string, or None.
+- `gc_paused()`: Context manager that pauses the cyclic garbage collector.
+"""
+
+import contextlib
+import gc
+import json
+import pickle
+import struct
+from array import array
+
+MAGIC = b"HTSNAP1\n"
+LENGTH = struct.Struct("<Q")
+COLUMN = struct.Struct("<cQQ")
+
+_FINGERPRINT_KEY = "hash table snapshot"
+
+
+def hash_fingerprint(hash_function):
+    """
+    Returns the hash of a fixed string, or None if the hash function cannot hash strings.
+    Two tables place keys identically only if their fingerprints are equal.
+    """
+    try:
+        return hash_function(_FINGERPRINT_KEY)
+    except Exception:
+        return None
+
+
+@contextlib.contextmanager
+def gc_paused():
+    """
+    Pauses the cyclic garbage collector. Building millions of containers
+    (lists, entry dicts) otherwise triggers many full collections that
+    each traverse every object of the table.
+    """
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def _encode_column(items):
+    """
+    Returns the type tag and the payload of a column
+
+    Takes O(n) time for n items
+    """
+    types = set(map(type, items))
+    if types == {str}:
+        joined = "\0".join(items)
+        if joined.count("\0") == len(items) - 1:
+            return b"s", joined.encode("utf-8", "surrogatepass")
+    elif types == {int}:
+        # a signed array first, an unsigned one for 64-bit hashes
+        for typecode in ("q", "Q"):
+            try:
+                return typecode.encode(), array(typecode, items).tobytes()
+            except OverflowError:
+                pass
+    elif types == {float}:
+        return b"d", array("d", items).tobytes()
+    elif types == {bytes}:
+        lengths = array("Q", map(len, items))
+        return b"b", lengths.tobytes() + b"".join(items)
+    # also taken for an empty column
+    return b"p", pickle.dumps(list(items), protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def _decode_column(tag, count, payload):
+    """
+    Returns the list of items of a column
+
+    Takes O(n) time for n items
+    """
+    if tag == b"s":
+        return payload.decode("utf-8", "surrogatepass").split("\0")
+    if tag in (b"q", b"Q", b"d"):
+        column = array(tag.decode())
+        column.frombytes(payload)
+        return column.tolist()
+    if tag == b"b":
+        lengths = array("Q")
+        lengths.frombytes(payload[: 8 * count])
+        items = []
+        offset = 8 * count
+        for length in lengths:
+            items.append(payload[offset : offset + length])
+            offset += length
+        return items
+    return pickle.loads(payload)
+
+
+def write_snapshot(path, header, columns):
+    """
+    Writes the header dict and every column (a list of items) to path
+
+    Takes O(n) time
+    """
+    with open(path, "wb") as file:
+        file.write(MAGIC)
+        encoded_header = json.dumps(header).encode()
+        file.write(LENGTH.pack(len(encoded_header)))
+        file.write(encoded_header)
+        for items in columns:
+            tag, payload = _encode_column(items)
+            file.write(COLUMN.pack(tag, len(items), len(payload)))
+            file.write(payload)
+
+
+def read_snapshot(path, kind):
+    """
+    Reads a snapshot and returns its header and its list of columns.
+    Raises ValueError if the file is not a snapshot of the table class kind.
+
+    Takes O(n) time
+    """
+    with open(path, "rb") as file:
+        data = file.read()
+    if data[: len(MAGIC)] != MAGIC:
+        raise ValueError(f"{path} is not a hash table snapshot")
+    offset = len(MAGIC)
+    (header_length,) = LENGTH.unpack_from(data, offset)
+    offset += LENGTH.size
+    header = json.loads(data[offset : offset + header_length])
+    offset += header_length
+    if header["kind"] != kind:
+        raise ValueError(f"{path} is a snapshot of {header['kind']}, not {kind}")
+    columns = []
+    while offset < len(data):
+        tag, count, length = COLUMN.unpack_from(data, offset)
+        offset += COLUMN.size
+        columns.append(_decode_column(tag, count, data[offset : offset + length]))
+        offset += length
+    return header, columns
@@ -0,0 +1,95 @@
+"""
+Instrumentation for the Hash Tables
+
+HashTableLinearProbe and HashTableSeparateChaining record what their operations cost when they are
+created with `stats=True` (or with an `on_resize` callback). Without it the table keeps no TableStats
+and every recording site is a single `is not None` test, so disabled instrumentation costs next to
+nothing.
+
+Recorded per operation, as histograms {length: number of operations}:
+- `hit`: slots (linear probing) or chain entries (separate chaining) inspected by a lookup that found its key.
+- `miss`: the same for a lookup that did not find its key, 0 if the Bloom filter ruled the key out.
+- `set`: the same for an insert or update.
+Removals are lookups and are counted as hits or misses.
+
+Resizes (growing, shrinking and rehashing in place) are counted with the time they took. An incremental
+resize counts when it starts, and the time of every migration step is added to the resize time as it
+happens. Entries moved by a resize are not counted as sets, and lookups in the old table of an
+incremental resize are not counted.
+
+`on_resize(event)` is called after every resize (at the start of an incremental one) with a dict of the
+old and new size, the number of entries, the time taken and whether the resize is incremental, for
+example to export the event to a metrics system.
+
+Key Operations:
+- `record_probe(operation, length)`: Counts one operation that inspected length slots or entries.
+- `record_resize(old_size, new_size, entries, seconds, incremental)`: Counts a resize and calls on_resize.
+- `record_migration(seconds)`: Adds the time of an incremental resize step.
+- `snapshot()`: Returns copies of the histograms and the resize counters.
+"""
+
+OPERATIONS = ("hit", "miss", "set")
+
+
+class TableStats:
+    def __init__(self, on_resize=None):
+        self.on_resize = on_resize
+        # operation -> {probe or chain length: number of operations}
+        self.probe_lengths = {operation: {} for operation in OPERATIONS}
+        self.max_probe_length = 0
+        self.resizes = 0
+        self.resize_seconds = 0.0
+
+    def record_probe(self, operation, length):
+        """
+        Counts one operation that inspected length slots or entries
+
+        Takes O(1)
+        """
+        histogram = self.probe_lengths[operation]
+        histogram[length] = histogram.get(length, 0) + 1
+        if length > self.max_probe_length:
+            self.max_probe_length = length
+
+    def record_resize(self, old_size, new_size, entries, seconds, incremental=False):
+        """
+        Counts a resize and passes it to the on_resize callback
+
+        Takes O(1) plus the time of the callback
+        """
+        self.resizes += 1
+        self.resize_seconds += seconds
+        if self.on_resize is not None:
+            self.on_resize(
+                {
+                    "old_size": old_size,
+                    "new_size": new_size,
+                    "entries": entries,
+                    "seconds": seconds,
+                    "incremental": incremental,
+                }
+            )
+
+    def record_migration(self, seconds):
+        """
+        Adds the time of one migration step of an incremental resize
+
+        Takes O(1)
+        """
+        self.resize_seconds += seconds
+
+    def snapshot(self):
+        """
+        Returns copies of the probe length histograms and the resize counters
+
+        Takes O(number of distinct lengths)
+        """
+        return {
+            "probe_lengths": {
+                operation: dict(sorted(histogram.items()))
+                for operation, histogram in self.probe_lengths.items()
+            },
+            "max_probe_length": self.max_probe_length,
+            "resizes": self.resizes,
+            "resize_seconds": self.resize_seconds,
+        }
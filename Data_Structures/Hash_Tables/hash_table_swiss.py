@@ -0,0 +1,260 @@
+"""
+Hash Table Implementation Using SwissTable Style Group Probing
+
+HashTableLinearProbe inspects one slot per probe step and compares the key of every occupied slot it
+passes, so an unsuccessful lookup at a high load factor performs a full key comparison for every slot of
+a long cluster. This table follows the design of Abseil's SwissTable (and of hashbrown in Rust) instead.
+
+Every slot has a one byte control value, kept in a NumPy uint8 array `ctrl`:
+- `EMPTY` (0x80): the slot was never used since the last rebuild.
+- `DELETED` (0xFE): the slot held a removed entry (tombstone).
+- 0x00 - 0x7F: the slot is full, the byte is the low 7 bits of the hash of its key (H2).
+
+The slots are divided into aligned groups of 16. The remaining bits of the hash (H1) pick the first group
+and the groups are probed quadratically (triangular numbers, which visit every group of a power of two
+number of groups). A lookup compares the H2 of the key against the 16 control bytes of a group in one
+vectorized comparison and only compares full keys on the slots whose byte matched. Only 1 in 128 occupied
+slots has a matching byte by chance, so an unsuccessful lookup almost never compares a key. The lookup
+stops at the first group that contains an EMPTY slot.
+
+The full hash of every key is cached, so a resize never hashes a key again and a byte match is confirmed
+against the cached hash before the keys are compared.
+
+Removal marks the slot EMPTY when its group still contains an EMPTY slot (no probe sequence can have
+passed a group that was never full) and DELETED otherwise. Tombstones count as used slots. When the used
+slots reach `max_capacity` (0.875 by default) the table is rebuilt in place if at least half of them are
+tombstones and grown by `growth_factor` otherwise.
+
+Keys and values are stored as given, they are not converted to strings. Requires NumPy.
+
+Key Operations:
+- `set(key, value)`: Inserts or updates a key-value pair in the hash table.
+- `get(key)`: Retrieves the value associated with a given key.
+- `remove(key)`: Removes a key-value pair from the hash table.
+- `get_keys()`: Returns a list of all keys in the hash table.
+- `get_values()`: Returns a list of all values in the hash table.
+- `occupancy()`: Returns the number of allocated slots against the number of live entries.
+- `_rebuild(size)`: Reinserts every entry into new arrays of the given size.
+- `_check_capacity()`: Checks if the current capacity exceeds the maximum capacity and resizes if necessary.
+"""
+
+import numpy as np
+
+from .hash_functions import MASK_64, resolve_hash_function
+from .hash_table_open_adressing import _next_power_of_two
+
+GROUP_WIDTH = 16
+EMPTY = 0x80
+DELETED = 0xFE
+_EMPTY = np.uint8(EMPTY)
+
+
+class HashTableSwiss:
+    def __init__(self, size, max_capacity=0.875, hash_function=None, growth_factor=2):
+        if growth_factor <= 1:
+            raise ValueError("growth_factor must be greater than 1")
+        self.max_capacity = max_capacity
+        self.growth_factor = growth_factor
+        # any callable key -> int, defaults to native hash() + finalizer
+        self.hash_function = resolve_hash_function(hash_function)
+        self.count = 0
+        self._reset_slots(size)
+
+    def _reset_slots(self, size):
+        """
+        Replaces the control bytes and the slot arrays with empty ones.
+        The number of groups is a power of two so that triangular probing reaches every group.
+        """
+        self.groups = _next_power_of_two(max(-(-size // GROUP_WIDTH), 1))
+        self.size = self.groups * GROUP_WIDTH
+        self.ctrl = np.full(self.size, EMPTY, dtype=np.uint8)
+        self.keys = [None] * self.size
+        self.values = [None] * self.size
+        # cached 64-bit hash of the key in every full slot
+        self.hashes = [None] * self.size
+        # empty slots include EMPTY slots only and do not include tombstones
+        self.empty_slots = self.size
+        self.tombstones = 0
+
+    def _hash(self, key):
+        """
+        Returns the 64-bit hash of key.
+        The low 7 bits are the control byte (H2), the other bits pick the first group (H1).
+
+        Takes O(1)
+        """
+        return self.hash_function(key) & MASK_64
+
+    def _groups(self, full_hash):
+        """
+        Yields the first slot of every group of the probe sequence of a hash
+
+        Takes O(1) per group
+        """
+        mask = self.groups - 1
+        g = (full_hash >> 7) & mask
+        for x in range(1, self.groups + 1):
+            yield g * GROUP_WIDTH
+            g = (g + x) & mask
+
+    def set(self, key, value):
+        """
+        Sets a new key value pair into the hash table or updates the value of an existing key.
+        After a new entry is added, the capacity is checked and resized if necessary.
+
+        Takes O(1) on average and O(n) for worst case.
+        """
+        full_hash = self._hash(key)
+        i = self._find(full_hash, key)
+        if i is not None:
+            self.values[i] = value
+            return
+        self._insert(full_hash, key, value)
+        self._check_capacity()
+
+    def _insert(self, full_hash, key, value):
+        """
+        Places a key that is not in the table into the first EMPTY or DELETED
+        slot of its probe sequence. Both have the high bit of the control byte set.
+
+        Takes O(1) on average
+        """
+        for start in self._groups(full_hash):
+            free = (self.ctrl[start : start + GROUP_WIDTH] >= _EMPTY).nonzero()[0]
+            if len(free):
+                i = start + int(free[0])
+                if self.ctrl[i] == EMPTY:
+                    self.empty_slots -= 1
+                else:
+                    self.tombstones -= 1
+                self.ctrl[i] = full_hash & 0x7F
+                self.keys[i] = key
+                self.values[i] = value
+                self.hashes[i] = full_hash
+                self.count += 1
+                return
+
+    def get(self, key):
+        """
+        Gets the value corresponding to the specified key and its slot.
+        If the key is not present in the hash table, null is returned.
+
+        Takes O(1) on average and O(n) for worst case.
+        """
+        i = self._find(self._hash(key), key)
+        if i is None:
+            print("Key is not present in Hash Table")
+            return
+        return self.values[i], i
+
+    def _find(self, full_hash, key):
+        """
+        Returns the slot holding key or None if the key is not present.
+        Every group is matched against the control byte of the key at once and
+        keys are only compared on the slots whose control byte and cached hash match.
+
+        Takes O(1) on average and O(n) for worst case.
+        """
+        # comparing against a uint8 scalar avoids a dtype promotion on every group
+        h2 = np.uint8(full_hash & 0x7F)
+        for start in self._groups(full_hash):
+            group = self.ctrl[start : start + GROUP_WIDTH]
+            for offset in (group == h2).nonzero()[0]:
+                i = start + int(offset)
+                if self.hashes[i] == full_hash and self.keys[i] == key:
+                    return i
+            if _EMPTY in group:
+                return
+        return
+
+    def remove(self, key):
+        """
+        Removes key, value pair and returns the corresponding value if present.
+
+        Takes O(1) on average and O(n) for worst case.
+        """
+        i = self._find(self._hash(key), key)
+        if i is None:
+            print("Key is not present in Hash Table")
+            return
+        deleted_value = self.values[i]
+        start = i - i % GROUP_WIDTH
+        # a group that still has an EMPTY slot was never full, so no probe sequence continues past it
+        if _EMPTY in self.ctrl[start : start + GROUP_WIDTH]:
+            self.ctrl[i] = EMPTY
+            self.empty_slots += 1
+        else:
+            self.ctrl[i] = DELETED
+            self.tombstones += 1
+        self.keys[i] = None
+        self.values[i] = None
+        self.hashes[i] = None
+        self.count -= 1
+        return deleted_value
+
+    def get_keys(self):
+        """
+        Returns all keys in the hash table
+
+        Takes O(n) time
+        """
+        return [self.keys[i] for i in np.flatnonzero(self.ctrl < 0x80)]
+
+    def get_values(self):
+        """
+        Returns all values in the hash table
+
+        Takes O(n) time
+        """
+        return [self.values[i] for i in np.flatnonzero(self.ctrl < 0x80)]
+
+    def occupancy(self):
+        """
+        Returns the number of allocated slots against the number of live entries.
+
+        Takes O(1)
+        """
+        return {
+            "slots": self.size,
+            "live_entries": self.count,
+            "tombstones": self.tombstones,
+            "load_factor": self.count / self.size,
+        }
+
+    def _rebuild(self, size):
+        """
+        Reinserts every entry into empty arrays of the given size using the cached hashes.
+        Tombstones are dropped. Also used to rehash in place at the same size.
+
+        Takes O(n) time
+        """
+        full = np.flatnonzero(self.ctrl < 0x80)
+        keys, values, hashes = self.keys, self.values, self.hashes
+        self._reset_slots(size)
+        self.count = 0
+        for i in full:
+            self._insert(hashes[i], keys[i], values[i])
+
+    def _check_capacity(self):
+        """
+        Checks that the used slots (entries and tombstones) are less than the maximum capacity.
+        If maximum capacity is exceeded, the table is rehashed in place when
+        tombstones make up half of the used slots and grown otherwise.
+        """
+        used = self.size - self.empty_slots
+        if used < self.max_capacity * self.size:
+            return
+        if self.tombstones * 2 >= used:
+            self._rebuild(self.size)
+            return
+        print(f"Capacity exceeded. Increasing Hash Table size by factor of {self.growth_factor}")
+        self._rebuild(int(self.size * self.growth_factor))
+
+
+if __name__ == "__main__":
+    h = HashTableSwiss(16)
+    for i in range(100):
+        h.set(f"key-{i}", i)
+    h.remove("key-3")
+    print(h.get("key-7"), h.get("key-3"))
+    print(h.occupancy(), h.ctrl[:16])
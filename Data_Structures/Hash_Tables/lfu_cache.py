@@ -0,0 +1,233 @@
+"""
+Least Frequently Used (LFU) Cache With O(1) Operations
+
+An LFU cache evicts the entry that was used the fewest times. Unlike an LRU cache, a burst of keys that
+are used once (a scan) cannot push out a stable set of hot keys, because the scanned keys never get a
+higher use count than the hot ones.
+
+Every operation is O(1) (the design of Shah, Mitra and Matani, "An O(1) algorithm for implementing the
+LFU cache eviction scheme"):
+- A HashTableSeparateChaining maps every key to its entry node.
+- A DoublyLinkedList of frequency buckets ordered by increasing use count. Each bucket holds its count
+  and a DoublyLinkedList of the entries with that count, ordered from least to most recently used.
+- Every entry node holds [key, value, bucket node].
+
+A hit moves the entry from its bucket into the bucket of the next count, which is either the next
+bucket or a new bucket linked right after the current one. Eviction removes the least recently used
+entry of the first bucket. Empty buckets are unlinked.
+
+Use counts never decrease, so keys that were hot long ago stay in the cache even when they are no
+longer used. With `decay_interval` every count is halved after that many operations, merging the
+buckets whose counts become equal, so stale counts decay and new hot keys can overtake them. Halving
+takes O(n) time once per decay_interval operations.
+
+Key Operations:
+- `get(key, default)`: Returns the value of key and increments its use count.
+- `put(key, value)`: Inserts or updates an entry and evicts the least frequently used entry if needed.
+- `remove(key)`: Removes an entry and returns its value.
+- `frequency(key)`: Returns the use count of key.
+- `stats()`: Returns the hit, miss and eviction counters.
+"""
+
+from ..Singly_and_Doubly_LinkedLists.doubly_linked_list import DoublyLinkedList, Node
+from .hash_table_separate_chaining import HashTableSeparateChaining
+
+
+class LFUCache:
+    def __init__(self, max_entries, decay_interval=None):
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+        self.max_entries = max_entries
+        # operations between two halvings of every use count, None disables aging
+        self.decay_interval = decay_interval
+        self._operations = 0
+        # key -> entry node, sized once for max_entries keys (put() evicts before it inserts)
+        self.table = HashTableSeparateChaining(16)
+        self.table.reserve(max_entries)
+        # bucket nodes hold [use count, DoublyLinkedList of entry nodes]
+        self.buckets = DoublyLinkedList()
+        self.count = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return self.count
+
+    def get(self, key, default=None):
+        """
+        Returns the value of key and increments its use count.
+        Missing keys return default.
+
+        Takes O(1) on average
+        """
+        self._tick()
+        entry = self.table.get_entry(key)
+        if entry is None:
+            self.misses += 1
+            return default
+        node = entry["value"]
+        self._increment(node)
+        self.hits += 1
+        return node.data[1]
+
+    def put(self, key, value):
+        """
+        Inserts or updates key with value. An update counts as a use.
+        A new key starts with a use count of 1 and evicts the least
+        frequently used entry (least recently used among ties) if the cache is full.
+
+        Takes O(1) on average
+        """
+        self._tick()
+        entry = self.table.get_entry(key)
+        if entry is not None:
+            node = entry["value"]
+            node.data[1] = value
+            self._increment(node)
+            return
+        if self.count == self.max_entries:
+            self._evict()
+        first = self.buckets.head
+        if first is None or first.data[0] != 1:
+            first = self.buckets.prepend([1, DoublyLinkedList()])
+        node = first.data[1].append_node(Node([key, value, first]))
+        self.table.set(key, node)
+        self.count += 1
+
+    def _increment(self, node):
+        """
+        Moves an entry node into the bucket of the next use count
+
+        Takes O(1)
+        """
+        bucket = node.data[2]
+        count = bucket.data[0]
+        next_bucket = bucket.next_node
+        if next_bucket is None or next_bucket.data[0] != count + 1:
+            next_bucket = self.buckets.insert_node_after(
+                bucket, Node([count + 1, DoublyLinkedList()])
+            )
+        self._move(node, next_bucket)
+
+    def _move(self, node, bucket):
+        """
+        Moves an entry node to the most recently used end of bucket,
+        unlinking its old bucket if that becomes empty
+
+        Takes O(1)
+        """
+        old_bucket = node.data[2]
+        old_bucket.data[1].remove_node(node)
+        if old_bucket.data[1].is_empty():
+            self.buckets.remove_node(old_bucket)
+        bucket.data[1].append_node(node)
+        node.data[2] = bucket
+
+    def _unlink(self, node):
+        """
+        Removes an entry node from its bucket and the hash table
+
+        Takes O(1) on average
+        """
+        bucket = node.data[2]
+        bucket.data[1].remove_node(node)
+        if bucket.data[1].is_empty():
+            self.buckets.remove_node(bucket)
+        self.table.pop_entry(node.data[0])
+        self.count -= 1
+
+    def _evict(self):
+        """
+        Evicts the least recently used entry of the lowest use count
+
+        Takes O(1) on average
+        """
+        self._unlink(self.buckets.head.data[1].head)
+        self.evictions += 1
+
+    def remove(self, key):
+        """
+        Removes key and returns its value, or None if the key is not cached
+
+        Takes O(1) on average
+        """
+        entry = self.table.get_entry(key)
+        if entry is None:
+            return
+        node = entry["value"]
+        self._unlink(node)
+        return node.data[1]
+
+    def frequency(self, key):
+        """
+        Returns the use count of key, 0 if the key is not cached
+
+        Takes O(1) on average
+        """
+        entry = self.table.get_entry(key)
+        if entry is None:
+            return 0
+        return entry["value"].data[2].data[0]
+
+    def _tick(self):
+        """
+        Counts an operation and halves every use count once decay_interval operations passed
+
+        Takes O(1), plus O(n) once per decay_interval operations
+        """
+        if self.decay_interval is None:
+            return
+        self._operations += 1
+        if self._operations >= self.decay_interval:
+            self._operations = 0
+            self._decay()
+
+    def _decay(self):
+        """
+        Halves the use count of every bucket (keeping it at least 1).
+        Halving keeps the order of the buckets, so only neighbouring buckets
+        can end up with the same count; their entries are merged into one bucket.
+
+        Takes O(n) time
+        """
+        bucket = self.buckets.head
+        previous = None
+        while bucket is not None:
+            next_bucket = bucket.next_node
+            count = max(bucket.data[0] // 2, 1)
+            if previous is not None and previous.data[0] == count:
+                # the merged entries had the higher count, so they go to the recently used end
+                node = bucket.data[1].head
+                while node is not None:
+                    next_node = node.next_node
+                    self._move(node, previous)
+                    node = next_node
+            else:
+                bucket.data[0] = count
+                previous = bucket
+            bucket = next_bucket
+
+    def stats(self):
+        """
+        Returns the counters of the cache and its hit rate
+
+        Takes O(1)
+        """
+        lookups = self.hits + self.misses
+        return {
+            "entries": self.count,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+if __name__ == "__main__":
+    cache = LFUCache(2)
+    cache.put("hot", 1)
+    cache.get("hot")
+    cache.put("scan-1", 2)
+    cache.put("scan-2", 3)
+    print(cache.get("hot"), cache.get("scan-1"), cache.frequency("hot"), cache.stats())
@@ -0,0 +1,234 @@
+"""
+Least Recently Used (LRU) Cache With Optional Time To Live
+
+An LRU cache keeps a bounded number of entries and, when it is full, evicts the entry that was used
+least recently. It combines two of the structures of this repository:
+- A HashTableSeparateChaining that maps every key to its node in the recency list, so an entry is
+  found in O(1).
+- A DoublyLinkedList ordered by recency: the head is the least recently used entry and the tail the
+  most recently used one. A used node is unlinked with `remove_node()` and relinked at the tail with
+  `append_node()`, both O(1) because the node knows its neighbours, and evicting is unlinking the head.
+
+Every node holds the tuple (key, value, expiry time, size in bytes).
+
+The cache is bounded by `max_entries`, by `max_bytes` (the sum of `size_function(value)`, sys.getsizeof
+by default) or by both. Entries can expire: `ttl` sets a default time to live in seconds and put() can
+override it per entry. Expired entries are dropped lazily when they are looked up, and `expire()` drops
+all of them at once.
+
+The cache counts hits, misses, evictions (entries dropped to respect the bounds) and expirations.
+
+Key Operations:
+- `get(key, default)`: Returns the value of key and marks it as most recently used.
+- `put(key, value, ttl)`: Inserts or updates an entry and evicts least recently used entries if needed.
+- `remove(key)`: Removes an entry and returns its value.
+- `expire()`: Removes every expired entry.
+- `stats()`: Returns the hit, miss, eviction and expiration counters.
+- `lru_cache(max_entries, max_bytes, ttl)`: Decorator that memoizes a function in an LRUCache.
+"""
+
+import functools
+import sys
+import time
+
+from ..Singly_and_Doubly_LinkedLists.doubly_linked_list import DoublyLinkedList, Node
+from .hash_table_separate_chaining import HashTableSeparateChaining
+
+
+class LRUCache:
+    def __init__(
+        self,
+        max_entries=None,
+        max_bytes=None,
+        ttl=None,
+        size_function=sys.getsizeof,
+        clock=time.monotonic,
+    ):
+        if max_entries is None and max_bytes is None:
+            raise ValueError("an LRU cache needs max_entries, max_bytes or both")
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        # default time to live of an entry in seconds, None keeps entries until they are evicted
+        self.ttl = ttl
+        self.size_function = size_function
+        self.clock = clock
+        # key -> node of the recency list. put() inserts before it evicts, so the table holds up to
+        # max_entries + 1 keys; it is sized for them once and grown with reserve() for a byte bound only
+        self.table = HashTableSeparateChaining(16)
+        if max_entries is not None:
+            self.table.reserve(max_entries + 1)
+        # head: least recently used, tail: most recently used
+        self.order = DoublyLinkedList()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self):
+        return self.order.length
+
+    def get(self, key, default=None):
+        """
+        Returns the value of key and marks the entry as most recently used.
+        Missing and expired keys return default.
+
+        Takes O(1) on average
+        """
+        entry = self.table.get_entry(key)
+        if entry is None:
+            self.misses += 1
+            return default
+        node = entry["value"]
+        expires_at = node.data[2]
+        if expires_at is not None and self.clock() >= expires_at:
+            self._unlink(node)
+            self.expirations += 1
+            self.misses += 1
+            return default
+        self.order.remove_node(node)
+        self.order.append_node(node)
+        self.hits += 1
+        return node.data[1]
+
+    def put(self, key, value, ttl=None):
+        """
+        Inserts or updates key with value as the most recently used entry.
+        ttl overrides the default time to live of the cache for this entry.
+        Least recently used entries are evicted until the cache is within its bounds.
+
+        Takes O(1) on average, plus O(1) per evicted entry
+        """
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = None if ttl is None else self.clock() + ttl
+        size = self.size_function(value) if self.max_bytes is not None else 0
+        table = self.table
+        entry = table.get_entry(key)
+        if entry is not None:
+            node = entry["value"]
+            self.bytes -= node.data[3]
+            node.data = (key, value, expires_at, size)
+            self.order.remove_node(node)
+            self.order.append_node(node)
+        else:
+            # doubling keeps the growth of a byte bounded cache amortized O(1) per entry
+            if not table.fits(len(table) + 1):
+                table.reserve(2 * (len(table) + 1))
+            node = self.order.append_node(Node((key, value, expires_at, size)))
+            table.set(key, node)
+        self.bytes += size
+        self._evict()
+
+    def _evict(self):
+        """
+        Evicts least recently used entries while the cache exceeds a bound
+
+        Takes O(1) per evicted entry
+        """
+        while self.order.head is not None and (
+            (self.max_entries is not None and self.order.length > self.max_entries)
+            or (self.max_bytes is not None and self.bytes > self.max_bytes)
+        ):
+            self._unlink(self.order.head)
+            self.evictions += 1
+
+    def _unlink(self, node):
+        """
+        Removes the entry of node from the recency list and the hash table
+
+        Takes O(1) on average
+        """
+        self.order.remove_node(node)
+        self.table.pop_entry(node.data[0])
+        self.bytes -= node.data[3]
+
+    def remove(self, key):
+        """
+        Removes key and returns its value, or None if the key is not cached
+
+        Takes O(1) on average
+        """
+        entry = self.table.get_entry(key)
+        if entry is None:
+            return
+        node = entry["value"]
+        self._unlink(node)
+        return node.data[1]
+
+    def expire(self):
+        """
+        Removes every expired entry
+
+        Takes O(n) time
+        """
+        now = self.clock()
+        node = self.order.head
+        while node is not None:
+            next_node = node.next_node
+            expires_at = node.data[2]
+            if expires_at is not None and now >= expires_at:
+                self._unlink(node)
+                self.expirations += 1
+            node = next_node
+
+    def stats(self):
+        """
+        Returns the counters of the cache and its hit rate
+
+        Takes O(1)
+        """
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self),
+            "bytes": self.bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+# marks a missing entry, as cached functions may return None, and separates keyword arguments
+_MISSING = object()
+
+
+def lru_cache(max_entries=128, max_bytes=None, ttl=None):
+    """
+    Decorator that memoizes a function in an LRUCache.
+    The positional and keyword arguments form the key, so they must be hashable.
+    The cache is available as the cache attribute of the decorated function.
+    """
+
+    def decorator(function):
+        cache = LRUCache(max_entries, max_bytes, ttl)
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            # the marker keeps positional arguments apart from keyword arguments
+            key = args + (_MISSING,) + tuple(sorted(kwargs.items())) if kwargs else args
+            value = cache.get(key, _MISSING)
+            if value is _MISSING:
+                value = function(*args, **kwargs)
+                cache.put(key, value)
+            return value
+
+        wrapper.cache = cache
+        return wrapper
+
+    return decorator
+
+
+if __name__ == "__main__":
+    cache = LRUCache(max_entries=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")
+    cache.put("c", 3)
+    print(cache.get("b"), cache.get("a"), cache.stats())
+
+    @lru_cache(max_entries=100)
+    def fibonacci(n):
+        return n if n < 2 else fibonacci(n - 1) + fibonacci(n - 2)
+
+    print(fibonacci(80), fibonacci.cache.stats())
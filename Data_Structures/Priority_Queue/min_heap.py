@@ -84,26 +84,16 @@ class MinHeap:
         Takes O(log n)
         """
         if not self._is_leaf(pos):
-            # check if current element is larger than children
-            if (
-                self.heap[pos] > self.heap[self._left_child(pos)]
-                or self.heap[pos] > self.heap[self._right_child(pos)]
-            ):
-                # use try statement to account for case when only 1 left child node.
-                # the right node does not exist and will return index error when attempting comparison
-                try:
-                    # find which child is smaller and _swap with that element before calling bubble_down again
-                    if (
-                        self.heap[self._left_child(pos)]
-                        < self.heap[self._right_child(pos)]
-                    ):
-                        self._swap(pos, self._left_child(pos))
-                        self._bubble_down(self._left_child(pos))
-                    else:
-                        self._swap(pos, self._right_child(pos))
-                        self._bubble_down(self._right_child(pos))
-                except IndexError:
-                    self._swap(pos, self._left_child(pos))
+            # find the smaller child. The right child does not exist
+            # when the node only has a left child
+            child = self._left_child(pos)
+            right = self._right_child(pos)
+            if right < self.size and self.heap[right] < self.heap[child]:
+                child = right
+            # swap with the smaller child if it is smaller than the current element
+            if self.heap[child] < self.heap[pos]:
+                self._swap(pos, child)
+                self._bubble_down(child)
 
     def _bubble_up(self, pos):
         """
@@ -150,7 +140,9 @@ class MinHeap:
                     self._swap(pos, self.size - 1)
                 element = self.heap.pop()
                 self.size -= 1
-                self._maintain_heap_invariant(pos)
+                # nothing to reorder if the removed element was the last one
+                if pos < self.size:
+                    self._maintain_heap_invariant(pos)
                 return element
 
         print("Element not found in heap")
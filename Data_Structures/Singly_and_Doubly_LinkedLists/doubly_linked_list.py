@@ -8,8 +8,11 @@ This implementation has references to the head and the tail which allows for con
 and prepending.
 
 Key Operations:
-- `append(data)`: Adds an element to the end of the list.
-- `prepend(data)`: Adds an element to the beginning of the list.
+- `append(data)`: Adds an element to the end of the list and returns its node.
+- `prepend(data)`: Adds an element to the beginning of the list and returns its node.
+- `append_node(node)`: Links an existing (unlinked) node at the end of the list.
+- `insert_node_after(node, new_node)`: Links an existing (unlinked) node right after a node of the list.
+- `remove_node(node)`: Unlinks a node of the list in constant time.
 - `insert(position, data)`: Inserts an element at the specified position.
 - `delete_by_value(data)`: Deletes the first occurrence of the specified value.
 - `delete_by_position(position)`: Deletes the element at the specified position.
@@ -56,24 +59,33 @@ class DoublyLinkedList:
     def append(self, data):
         """
         Appends a new node with the given data to the end of the list.
+        Returns the new node so that it can later be removed with remove_node().
+        Takes O(1).
+        """
+        return self.append_node(Node(data))
+
+    def append_node(self, new_node):
+        """
+        Links a node that is not part of any list at the end of the list.
+        Together with remove_node() this moves a known node to the end in O(1).
         Takes O(1).
         """
-        new_node = Node(data)
         if self.head is None:
             self.head = new_node
             self.tail = self.head
             self.length += 1
-            return
+            return new_node
         else:
             new_node.previous_node = self.tail
             self.tail.next_node = new_node
             self.tail = new_node
             self.length += 1
-            return
+            return new_node
 
     def prepend(self, data):
         """
         Prepends a new node with the given data to the beginning of the list.
+        Returns the new node.
         Takes O(1).
         """
         new_node = Node(data)
@@ -81,13 +93,13 @@ class DoublyLinkedList:
             self.head = new_node
             self.tail = self.head
             self.length += 1
-            return
+            return new_node
         else:
             new_node.next_node = self.head
             self.head.previous_node = new_node
             self.head = new_node
             self.length += 1
-            return
+            return new_node
 
     def insert(self, position, data):
         """
@@ -152,6 +164,42 @@ class DoublyLinkedList:
             print("Given value not found")
             return
 
+    def insert_node_after(self, node, new_node):
+        """
+        Links a node that is not part of any list right after node,
+        which must belong to this list.
+        Takes O(1).
+        """
+        new_node.previous_node = node
+        new_node.next_node = node.next_node
+        if node.next_node is None:
+            self.tail = new_node
+        else:
+            node.next_node.previous_node = new_node
+        node.next_node = new_node
+        self.length += 1
+        return new_node
+
+    def remove_node(self, node):
+        """
+        Unlinks the given node, which must belong to this list.
+        Unlike delete_by_value() no search is needed because the node
+        knows its neighbours. The node can be linked again with append_node().
+        Takes O(1).
+        """
+        if node.previous_node is None:
+            self.head = node.next_node
+        else:
+            node.previous_node.next_node = node.next_node
+        if node.next_node is None:
+            self.tail = node.previous_node
+        else:
+            node.next_node.previous_node = node.previous_node
+        node.previous_node = None
+        node.next_node = None
+        self.length -= 1
+        return node
+
     def delete_by_position(self, position):
         """
         Deletes the node at the specified position.
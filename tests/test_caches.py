@@ -0,0 +1,218 @@
+import pytest
+
+from ..Data_Structures.Hash_Tables.lfu_cache import LFUCache
+from ..Data_Structures.Hash_Tables.lru_cache import LRUCache, lru_cache
+from ..Data_Structures.Singly_and_Doubly_LinkedLists.doubly_linked_list import (
+    DoublyLinkedList,
+)
+
+
+class FakeClock:
+    """
+    Clock that only moves when the test advances it
+    """
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture(scope="function")
+def lru_fixture():
+    """
+    LRU cache with room for 3 entries for testing
+    """
+    c = LRUCache(max_entries=3)
+    yield c
+
+
+class Test_Doubly_Linked_List_Remove_Node:
+    def test_remove_node(self):
+        d = DoublyLinkedList()
+        nodes = [d.append(i) for i in range(4)]
+        d.remove_node(nodes[0])
+        d.remove_node(nodes[3])
+        d.remove_node(nodes[1])
+        assert d.head is nodes[2] and d.tail is nodes[2]
+        assert d.length == 1
+        d.append_node(nodes[1])
+        assert d.tail is nodes[1] and nodes[1].previous_node is nodes[2]
+        d.remove_node(nodes[2])
+        d.remove_node(nodes[1])
+        assert d.is_empty() and d.tail is None and d.length == 0
+
+    def test_insert_node_after(self):
+        d = DoublyLinkedList()
+        first = d.append(1)
+        last = d.insert_node_after(first, type(first)(3))
+        middle = d.insert_node_after(first, type(first)(2))
+        assert d.tail is last
+        assert (first.next_node, middle.next_node, last.previous_node) == (middle, last, middle)
+        assert d.length == 3
+
+
+class Test_LRU_Cache:
+    def test_evicts_least_recently_used(self, lru_fixture):
+        for key in "abc":
+            lru_fixture.put(key, key.upper())
+        assert lru_fixture.get("a") == "A"
+        lru_fixture.put("d", "D")
+        assert lru_fixture.get("b") is None
+        assert [lru_fixture.get(key) for key in "acd"] == ["A", "C", "D"]
+        assert lru_fixture.stats()["evictions"] == 1
+        assert len(lru_fixture) == 3
+
+    def test_update_moves_to_most_recent(self, lru_fixture):
+        for key in "abc":
+            lru_fixture.put(key, 1)
+        lru_fixture.put("a", 2)
+        lru_fixture.put("d", 1)
+        assert lru_fixture.get("a") == 2
+        assert lru_fixture.get("b") is None
+
+    def test_counters(self, lru_fixture):
+        lru_fixture.put("a", 1)
+        lru_fixture.get("a")
+        lru_fixture.get("x")
+        stats = lru_fixture.stats()
+        assert (stats["hits"], stats["misses"], stats["hit_rate"]) == (1, 1, 0.5)
+
+    def test_remove(self, lru_fixture):
+        lru_fixture.put("a", 1)
+        assert lru_fixture.remove("a") == 1
+        assert lru_fixture.remove("a") is None
+        assert len(lru_fixture) == 0
+
+    def test_max_bytes(self):
+        c = LRUCache(max_bytes=10, size_function=len)
+        c.put("a", "xxxx")
+        c.put("b", "xxxx")
+        c.put("c", "xxxx")
+        assert c.get("a") is None
+        assert c.bytes == 8
+        # an entry larger than the cache is evicted right away
+        c.put("d", "x" * 11)
+        assert len(c) == 0 and c.bytes == 0
+
+    @pytest.mark.parametrize("max_entries", [1, 3, 100])
+    def test_table_never_grows(self, max_entries, capsys):
+        c = LRUCache(max_entries=max_entries)
+        size = c.table.size
+        for i in range(5 * max_entries):
+            c.put(i, i)
+        assert c.table.size == size and len(c) == max_entries
+        assert capsys.readouterr().out == ""
+
+    def test_byte_bounded_table_grows_quietly(self, capsys):
+        c = LRUCache(max_bytes=10_000, size_function=lambda value: 1)
+        for i in range(5_000):
+            c.put(i, i)
+        assert len(c) == 5_000 and c.get(0) == 0
+        assert capsys.readouterr().out == ""
+
+    def test_ttl(self):
+        clock = FakeClock()
+        c = LRUCache(max_entries=10, ttl=5, clock=clock)
+        c.put("a", 1)
+        c.put("b", 2, ttl=20)
+        clock.now = 6
+        assert c.get("a") is None
+        assert c.get("b") == 2
+        c.put("c", 3)
+        clock.now = 12
+        c.expire()
+        assert len(c) == 1
+        assert c.stats()["expirations"] == 2
+
+    def test_requires_bound(self):
+        with pytest.raises(ValueError):
+            LRUCache()
+
+    def test_decorator(self):
+        calls = []
+
+        @lru_cache(max_entries=2)
+        def square(x, offset=0):
+            calls.append(x)
+            return x * x + offset
+
+        assert square(3) == 9
+        assert square(3) == 9
+        assert square(3, offset=1) == 10
+        assert calls == [3, 3]
+        square(4)
+        square(5)
+        square(3)
+        assert calls == [3, 3, 4, 5, 3]
+        assert square.cache.stats()["hits"] == 1
+
+
+def _bucket_counts(cache):
+    counts = []
+    bucket = cache.buckets.head
+    while bucket is not None:
+        counts.append(bucket.data[0])
+        bucket = bucket.next_node
+    return counts
+
+
+class Test_LFU_Cache:
+    def test_evicts_least_frequently_used(self):
+        c = LFUCache(2)
+        c.put("hot", 1)
+        c.get("hot")
+        c.put("a", 2)
+        c.put("b", 3)
+        assert c.get("a") is None
+        assert c.get("hot") == 1
+        assert c.get("b") == 3
+        assert c.stats()["evictions"] == 1
+
+    def test_ties_evict_least_recently_used(self):
+        c = LFUCache(2)
+        c.put("a", 1)
+        c.put("b", 2)
+        c.put("c", 3)
+        assert c.get("a") is None
+        assert c.get("b") == 2
+
+    def test_frequency_buckets(self):
+        c = LFUCache(10)
+        for key, uses in (("a", 1), ("b", 3), ("c", 3)):
+            c.put(key, key)
+            for _ in range(uses - 1):
+                c.get(key)
+        assert [c.frequency(key) for key in "abcx"] == [1, 3, 3, 0]
+        assert _bucket_counts(c) == [1, 3]
+        c.remove("a")
+        assert _bucket_counts(c) == [3]
+        assert len(c) == 2
+
+    def test_scan_keeps_hot_keys(self):
+        c = LFUCache(10)
+        for _ in range(3):
+            for key in range(5):
+                if c.get(key) is None:
+                    c.put(key, key)
+        for key in range(100, 200):
+            c.put(key, key)
+        assert all(c.get(key) == key for key in range(5))
+
+    def test_decay(self):
+        c = LFUCache(10, decay_interval=100)
+        c.put("old", 1)
+        for _ in range(40):
+            c.get("old")
+        c.put("new", 2)
+        for _ in range(57):
+            c.get("new")
+        # the 100th operation halves every count before it is counted: 41 -> 20, 58 -> 29 + 1
+        c.get("new")
+        assert (c.frequency("old"), c.frequency("new")) == (20, 30)
+        c.put("x", 0)
+        for _ in range(99):
+            c.get("x")
+        assert _bucket_counts(c) == sorted(set(_bucket_counts(c)))
+        assert c.frequency("old") == 10
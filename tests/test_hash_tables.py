@@ -0,0 +1,1680 @@
+import collections
+import io
+import multiprocessing
+import os
+import random
+import threading
+from multiprocessing import resource_tracker
+
+import pytest
+
+from ..Data_Structures.Hash_Tables.bloom_filter import (
+    BloomFilter,
+    CountingBloomFilter,
+    optimal_size,
+)
+from ..Data_Structures.Hash_Tables.frequency_counter import FrequencyCounter
+from ..Data_Structures.Hash_Tables.hash_functions import (
+    SeededHash,
+    char_sum_hash,
+    default_hash,
+    histogram,
+    stable_hash,
+)
+from ..Data_Structures.Hash_Tables.hash_table_compact_chaining import (
+    HashTableCompactChaining,
+)
+from ..Data_Structures.Hash_Tables.hash_table_concurrent import ConcurrentHashTable
+from ..Data_Structures.Hash_Tables.hash_table_cuckoo import HashTableCuckoo
+from ..Data_Structures.Hash_Tables.hash_table_mmap import HashTableMmap
+from ..Data_Structures.Hash_Tables.hash_table_open_adressing import (
+    TOMBSTONE,
+    HashTableLinearProbe,
+)
+from ..Data_Structures.Hash_Tables.hash_table_perfect import HashTablePerfect
+from ..Data_Structures.Hash_Tables.hash_table_separate_chaining import (
+    HashTableSeparateChaining,
+)
+from ..Data_Structures.Hash_Tables.hash_table_shared_memory import (
+    HashTableSharedMemory,
+)
+from ..Data_Structures.Hash_Tables.hash_table_snapshot import (
+    read_snapshot,
+    write_snapshot,
+)
+from ..Data_Structures.Hash_Tables.hyperloglog import HyperLogLog
+
+# tables built on NumPy are only tested when NumPy is installed
+try:
+    import numpy as np
+
+    from ..Data_Structures.Hash_Tables.count_min_sketch import (
+        CountMinSketch,
+        HeavyHitters,
+        optimal_dimensions,
+    )
+    from ..Data_Structures.Hash_Tables.hash_table_int import EMPTY as INT_EMPTY
+    from ..Data_Structures.Hash_Tables.hash_table_int import IntHashMap
+    from ..Data_Structures.Hash_Tables.hash_table_swiss import (
+        DELETED,
+        EMPTY,
+        HashTableSwiss,
+    )
+except ImportError:
+    np = None
+
+requires_numpy = pytest.mark.skipif(np is None, reason="requires numpy")
+
+
+@pytest.fixture(scope="function")
+def linear_probe_fixture():
+    """
+    Linear probing hash table with 10 slots for testing
+    """
+    h = HashTableLinearProbe(10)
+    yield h
+
+
+@pytest.fixture(scope="function")
+def separate_chaining_fixture():
+    """
+    Separate chaining hash table with 10 slots for testing
+    """
+    h = HashTableSeparateChaining(10)
+    yield h
+
+
+class Test_Hash_Functions:
+    def test_default_hash_separates_anagrams(self):
+        """
+        Anagrams always collide with the character sum hash but
+        should not collide with the default hash
+        """
+        assert char_sum_hash("abc") == char_sum_hash("cab")
+        assert default_hash("abc") != default_hash("cab")
+
+    def test_seeded_hash(self):
+        """
+        The same seed gives the same hash, different seeds give different hashes
+        """
+        assert SeededHash(1)("apple") == SeededHash(1)("apple")
+        assert SeededHash(1)("apple") != SeededHash(2)("apple")
+
+    def test_histogram(self):
+        assert histogram([0, 2, 1, 0, 0]) == {0: 3, 1: 1, 2: 1}
+
+    def test_custom_hash_function(self, separate_chaining_fixture):
+        """
+        A user supplied callable decides the bucket of every key
+        """
+        h = HashTableSeparateChaining(10, hash_function=lambda key: 3)
+        h.set("a", 1)
+        h.set("b", 2)
+        assert len(h.data[3]) == 2
+        assert h.bucket_histogram() == {0: 9, 2: 1}
+
+    def test_rejects_non_callable(self):
+        with pytest.raises(TypeError):
+            HashTableLinearProbe(10, hash_function=5)
+
+
+class Test_Linear_Probe:
+    def test_set_get_remove(self, linear_probe_fixture):
+        linear_probe_fixture.set("apple", "big")
+        linear_probe_fixture.set("apple", "small")
+        linear_probe_fixture.set("pear", "green")
+        assert linear_probe_fixture.get("apple")[0] == "small"
+        assert linear_probe_fixture.remove("pear") == "green"
+        assert linear_probe_fixture.get("pear") is None
+        assert linear_probe_fixture.get_keys() == ["apple"]
+
+    def test_histograms(self, linear_probe_fixture):
+        """
+        Every key is counted once in both histograms
+        """
+        for i in range(50):
+            linear_probe_fixture.set(i, i)
+        bucket_histogram = linear_probe_fixture.bucket_histogram()
+        probe_histogram = linear_probe_fixture.probe_length_histogram()
+        assert sum(bucket_histogram.values()) == linear_probe_fixture.size
+        assert sum(k * v for k, v in bucket_histogram.items()) == 50
+        assert sum(probe_histogram.values()) == 50
+
+
+class Test_Separate_Chaining:
+    def test_set_get_remove(self, separate_chaining_fixture):
+        separate_chaining_fixture.set("apple", "big")
+        separate_chaining_fixture.set("apple", "small")
+        separate_chaining_fixture.set(55, "numbers")
+        assert separate_chaining_fixture.get("apple") == "small"
+        assert separate_chaining_fixture.get(55) == "numbers"
+        separate_chaining_fixture.remove(55)
+        assert separate_chaining_fixture.get(55) is None
+
+    def test_resize_keeps_entries(self, separate_chaining_fixture):
+        for i in range(100):
+            separate_chaining_fixture.set(i, str(i))
+        assert separate_chaining_fixture.size > 10
+        assert sorted(separate_chaining_fixture.keys()) == list(range(100))
+        assert sum(separate_chaining_fixture.bucket_histogram().values()) == (
+            separate_chaining_fixture.size
+        )
+
+    def test_quiet_entry_api(self, separate_chaining_fixture, capsys):
+        h = separate_chaining_fixture
+        h.set("apple", 1)
+        h.get_entry("apple")["value"] += 1
+        assert h.get("apple") == 2
+        assert h.get_entry("pear") is None and h.pop_entry("pear") is None
+        assert h.pop_entry("apple") == {"key": "apple", "value": 2}
+        assert len(h) == 0
+        assert capsys.readouterr().out == ""
+        h.reserve(100)
+        assert h.fits(100) and not h.fits(h.size)
+
+
+@pytest.fixture(scope="function")
+def robin_hood_fixture():
+    """
+    Robin Hood hash table with 16 slots for testing
+    """
+    h = HashTableLinearProbe(16, robin_hood=True)
+    yield h
+
+
+class Test_Robin_Hood:
+    def _assert_invariants(self, table):
+        """
+        Every stored distance matches the distance from the home slot and
+        no entry is further from home than the entry before it plus one
+        """
+        for i, key in enumerate(table.keys):
+            if key is None:
+                continue
+            assert table.distances[i] == (i - table._hash(key)) % table.size
+            previous = (i - 1) % table.size
+            if table.distances[i] > 0:
+                assert table.keys[previous] is not None
+                assert table.distances[previous] >= table.distances[i] - 1
+
+    def test_set_get_remove(self, robin_hood_fixture):
+        for i in range(10):
+            robin_hood_fixture.set(str(i), i * 2)
+        self._assert_invariants(robin_hood_fixture)
+        assert robin_hood_fixture.get("4")[0] == "8"
+        assert robin_hood_fixture.remove("4") == "8"
+        assert robin_hood_fixture.get("4") is None
+        self._assert_invariants(robin_hood_fixture)
+
+    def test_backward_shift_leaves_no_tombstones(self, robin_hood_fixture):
+        """
+        Removal under churn shifts entries back instead of writing tombstones
+        """
+        for round in range(20):
+            for i in range(8):
+                robin_hood_fixture.set(f"{round}-{i}", i)
+            for i in range(8):
+                robin_hood_fixture.remove(f"{round}-{i}")
+            self._assert_invariants(robin_hood_fixture)
+        assert robin_hood_fixture.size == 16
+        assert robin_hood_fixture.get_keys() == []
+        assert robin_hood_fixture.empty_slots == 16
+
+    def test_resize(self, robin_hood_fixture):
+        for i in range(100):
+            robin_hood_fixture.set(i, i)
+        self._assert_invariants(robin_hood_fixture)
+        assert sorted(robin_hood_fixture.get_keys(), key=int) == [
+            str(i) for i in range(100)
+        ]
+
+
+class Test_Probing_Strategies:
+    @pytest.mark.parametrize("probing", ["quadratic", "double"])
+    def test_power_of_two_size(self, probing):
+        h = HashTableLinearProbe(10, probing=probing)
+        assert h.size == 16
+        for i in range(20):
+            h.set(str(i), i)
+        assert h.size == 256
+
+    @pytest.mark.parametrize("probing", ["linear", "quadratic", "double"])
+    def test_set_get_remove(self, probing):
+        h = HashTableLinearProbe(16, probing=probing)
+        for i in range(100):
+            h.set(str(i), i)
+        for i in range(0, 100, 2):
+            assert h.remove(str(i)) == str(i)
+        for i in range(100):
+            if i % 2:
+                assert h.get(str(i))[0] == str(i)
+            else:
+                assert h.get(str(i)) is None
+        assert sum(h.probe_length_histogram().values()) == 50
+
+    def test_invalid_options(self):
+        with pytest.raises(ValueError):
+            HashTableLinearProbe(16, probing="cubic")
+        with pytest.raises(ValueError):
+            HashTableLinearProbe(16, probing="double", robin_hood=True)
+
+
+class Test_Incremental_Resize:
+    @pytest.mark.parametrize("growth_factor", [1.5, 2, 10])
+    @pytest.mark.parametrize(
+        "options",
+        [{}, {"robin_hood": True}, {"probing": "quadratic"}, {"probing": "double"}],
+    )
+    def test_linear_probe_matches_dict(self, growth_factor, options):
+        """
+        Random operations give the same results as a dict while resizes
+        are spread over many operations
+        """
+        rng = random.Random(0)
+        h = HashTableLinearProbe(
+            8, growth_factor=growth_factor, incremental_resize=True, **options
+        )
+        expected = {}
+        saw_rehash = False
+        for _ in range(3000):
+            key = str(rng.randrange(500))
+            op = rng.random()
+            if op < 0.5:
+                h.set(key, key + "!")
+                expected[key] = key + "!"
+            elif op < 0.8:
+                lookup = h.get(key)
+                assert (lookup[0] if lookup else None) == expected.get(key)
+            else:
+                assert h.remove(key) == expected.pop(key, None)
+            saw_rehash = saw_rehash or h._rehash_source is not None
+            assert len(h) == len(expected)
+        assert saw_rehash
+        assert sorted(h.get_keys()) == sorted(expected)
+        assert dict(h.items()) == expected
+
+    @pytest.mark.parametrize("growth_factor", [1.5, 2, 10])
+    def test_separate_chaining_matches_dict(self, growth_factor):
+        rng = random.Random(0)
+        h = HashTableSeparateChaining(
+            8, growth_factor=growth_factor, incremental_resize=True, rehash_step=1
+        )
+        expected = {}
+        saw_rehash = False
+        for _ in range(3000):
+            key = rng.randrange(500)
+            op = rng.random()
+            if op < 0.5:
+                h.set(key, -key)
+                expected[key] = -key
+            elif op < 0.8:
+                assert h.get(key) == expected.get(key)
+            else:
+                entry = h.remove(key)
+                assert (entry["value"] if entry else None) == expected.pop(key, None)
+            saw_rehash = saw_rehash or h._rehash_source is not None
+            assert len(h) == len(expected)
+        assert saw_rehash
+        assert sorted(h.keys()) == sorted(expected)
+        assert dict(h.items()) == expected
+
+    def test_growth_factor(self):
+        h = HashTableSeparateChaining(10, growth_factor=2)
+        for i in range(20):
+            h.set(i, i)
+        assert h.size in (20, 40, 80)
+        with pytest.raises(ValueError):
+            HashTableLinearProbe(10, growth_factor=1)
+
+
+class Test_Compact_Chaining:
+    def test_set_get_remove(self):
+        h = HashTableCompactChaining(4)
+        h.set("apple", "big")
+        h.set("apple", "small")
+        h.set(55, None)
+        assert h.get("apple") == "small"
+        assert h.get(55) is None
+        assert h.remove("apple") == {"key": "apple", "value": "small"}
+        assert h.get("apple") is None
+        assert h.keys() == [55]
+        assert h.values() == [None]
+
+    def test_hashed_key_api(self, capsys):
+        h = HashTableCompactChaining(4)
+        hash = h.hash_key("apple")
+        h.set_hashed(hash, "apple", "big")
+        assert h.get("apple") == "big"
+        assert h.get_hashed(hash, "apple") == "big"
+        missing = object()
+        assert h.get_hashed(h.hash_key("pear"), "pear", missing) is missing
+        assert h.pop_hashed(hash, "apple") == {"key": "apple", "value": "big"}
+        assert h.pop_hashed(hash, "apple") is None
+        assert capsys.readouterr().out == ""
+
+    def test_insertion_order_and_resize(self):
+        """
+        Entries stay in insertion order across resizes, removals and compaction
+        and the index widens once entries no longer fit in one byte
+        """
+        h = HashTableCompactChaining(4, growth_factor=2)
+        for i in range(1000):
+            h.set(i, -i)
+        for i in range(0, 1000, 3):
+            h.remove(i)
+        expected = [i for i in range(1000) if i % 3]
+        assert h.keys() == expected
+        assert h.values() == [-i for i in expected]
+        assert h.index.typecode != "b"
+        assert sum(h.bucket_histogram().values()) == h.size
+
+    def test_resize_does_not_rehash(self):
+        calls = []
+
+        def counting_hash(key):
+            calls.append(key)
+            return hash(key)
+
+        h = HashTableCompactChaining(4, hash_function=counting_hash)
+        for i in range(100):
+            h.set(i, i)
+        assert len(calls) == 100
+
+    def test_compaction(self):
+        h = HashTableCompactChaining(64)
+        for i in range(40):
+            h.set(i, i)
+        for i in range(30):
+            h.remove(i)
+        assert h.dummies < h.count + 1
+        assert len(h.entry_keys) < 40
+        assert [h.get(i) for i in range(30, 40)] == list(range(30, 40))
+
+
+class Test_Batch_Operations:
+    @pytest.mark.parametrize(
+        "table_class",
+        [HashTableLinearProbe, HashTableSeparateChaining, HashTableCompactChaining],
+    )
+    def test_set_many_resizes_once(self, table_class):
+        """
+        A batch grows the table before inserting and never in the middle of the batch
+        """
+        h = table_class(8)
+        resizes = []
+        original_check = h._check_capacity
+
+        def check_capacity():
+            size = h.size
+            original_check()
+            if h.size != size:
+                resizes.append(h.size)
+
+        h._check_capacity = check_capacity
+        pairs = [(str(i), str(i * 2)) for i in range(1000)]
+        h.set_many(pairs)
+        assert resizes == []
+        assert h.get_many(["10", "999", "missing"]) == ["20", "1998", None]
+
+    def test_linear_probe_batch(self):
+        h = HashTableLinearProbe.from_iterable(
+            [(i, i) for i in range(100)], probing="double"
+        )
+        assert h.probing == "double"
+        assert h.get_many(["5", "50"]) == ["5", "50"]
+        assert h.remove_many(["5", "missing"]) == ["5", None]
+        assert len(h.get_keys()) == 99
+
+    def test_separate_chaining_batch(self):
+        h = HashTableSeparateChaining.from_iterable((i, -i) for i in range(100))
+        assert h.size > 100
+        assert h.remove_many([3, 1000]) == [{"key": 3, "value": -3}, None]
+        assert sorted(h.keys()) == [i for i in range(100) if i != 3]
+
+    def test_reserve(self):
+        h = HashTableLinearProbe(8, incremental_resize=True)
+        for i in range(20):
+            h.set(str(i), i)
+        h.reserve(1000)
+        assert h._rehash_source is None
+        assert h.size > 1000 / 0.75
+        assert sorted(h.get_keys(), key=int) == [str(i) for i in range(20)]
+        c = HashTableCompactChaining(8)
+        c.reserve(1000)
+        assert c.size > 1000 / 0.75
+
+
+class Test_Concurrent_Hash_Table:
+    def test_set_get_remove(self):
+        h = ConcurrentHashTable(16, segments=4)
+        h.set("apple", "big")
+        h.set("apple", "small")
+        assert h.get("apple") == "small"
+        assert h.remove("apple") == {"key": "apple", "value": "small"}
+        assert h.get("apple") is None
+
+    def test_parallel_writers(self):
+        """
+        Writers on many threads with segments resizing independently lose no update
+        """
+        h = ConcurrentHashTable(8, segments=4, growth_factor=2)
+
+        def writer(t):
+            for i in range(500):
+                h.set((t, i), i)
+            for i in range(0, 500, 2):
+                h.remove((t, i))
+
+        threads = [threading.Thread(target=writer, args=(t,)) for t in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert sorted(h.keys()) == sorted(
+            (t, i) for t in range(8) for i in range(1, 500, 2)
+        )
+        assert all(segment.size > 2 for segment in h.segments)
+
+
+class Test_Tombstones:
+    def _assert_accounting(self, table):
+        """
+        Every slot is either empty, a tombstone or a live entry
+        """
+        assert table.empty_slots == table.keys.count(None)
+        assert table.tombstones == sum(key is TOMBSTONE for key in table.keys)
+        assert table.empty_slots + table.tombstones + len(table.get_keys()) == (
+            table.size
+        )
+
+    @pytest.mark.parametrize("probing", ["linear", "quadratic", "double"])
+    def test_churn_does_not_grow_table(self, probing):
+        """
+        Insert/delete churn with a bounded number of live keys is absorbed by
+        in-place rehashes instead of growing the table
+        """
+        h = HashTableLinearProbe(64, probing=probing)
+        for i in range(2000):
+            h.set(f"key{i}", i)
+            if i >= 20:
+                assert h.remove(f"key{i - 20}") == str(i - 20)
+            self._assert_accounting(h)
+            assert h.tombstones < 0.25 * h.size
+        assert h.size == 64
+        assert sorted(h.get_keys()) == sorted(f"key{i}" for i in range(1980, 2000))
+
+    def test_shared_sentinel(self):
+        h = HashTableLinearProbe(16, tombstone_ratio=None)
+        for key in "abcd":
+            h.set(key, key)
+        for key in "abcd":
+            h.remove(key)
+        assert h.tombstones == 4
+        assert all(key is TOMBSTONE for key in h.keys if key is not None)
+        self._assert_accounting(h)
+
+    def test_reinsert_reuses_tombstone(self):
+        h = HashTableLinearProbe(16, tombstone_ratio=None)
+        h.set("a", 1)
+        h.remove("a")
+        h.set("a", 2)
+        assert h.tombstones == 0
+        assert h.empty_slots == 15
+        self._assert_accounting(h)
+
+
+class Test_Shrink:
+    @pytest.mark.parametrize(
+        "table_class",
+        [HashTableLinearProbe, HashTableSeparateChaining, HashTableCompactChaining],
+    )
+    def test_shrinks_after_drain(self, table_class):
+        h = table_class(8, growth_factor=2, shrink_threshold=0.1)
+        for i in range(1000):
+            h.set(str(i), i)
+        grown_size = h.size
+        for i in range(990):
+            h.remove(str(i))
+        occupancy = h.occupancy()
+        assert occupancy["live_entries"] == 10
+        assert h.size < grown_size / 10
+        assert h.size >= 8
+        assert sorted(h.get_keys() if hasattr(h, "get_keys") else h.keys()) == sorted(
+            str(i) for i in range(990, 1000)
+        )
+
+    @pytest.mark.parametrize(
+        "table_class",
+        [HashTableLinearProbe, HashTableSeparateChaining, HashTableCompactChaining],
+    )
+    def test_no_thrashing(self, table_class):
+        """
+        Alternating inserts and removals around a resize do not resize back and forth
+        """
+        # separate chaining grows on occupied buckets, which depend on the hash seed of str
+        h = table_class(8, growth_factor=2, shrink_threshold=0.1, hash_function=stable_hash)
+        for i in range(100):
+            h.set(str(i), i)
+        sizes = set()
+        for i in range(100, 300):
+            h.set(str(i), i)
+            h.remove(str(i))
+            sizes.add(h.size)
+        assert len(sizes) == 1
+        # a table reserved for entries that have not arrived yet is not shrunk by a removal
+        h = table_class(8, growth_factor=2, shrink_threshold=0.05)
+        h.reserve(1000)
+        reserved_size = h.size
+        for i in range(10):
+            h.set(str(i), i)
+        h.remove("0")
+        assert h.size == reserved_size
+
+    def test_power_of_two_growth_does_not_shrink_back(self):
+        """
+        Quadratic probing rounds 16 * 10 up to 256 and 2560 up to 4096, so the
+        table lands at a load factor of 192 / 4096 (below the threshold) after growing
+        """
+        h = HashTableLinearProbe(16, probing="quadratic", shrink_threshold=0.07)
+        for i in range(192):
+            h.set(str(i), i)
+        assert h.size == 4096
+        for i in range(100):
+            h.remove(str(i))
+        assert h.size == 4096
+        # once the load factor reached the threshold again, draining shrinks the table
+        for i in range(300):
+            h.set(str(i), i)
+        for i in range(290):
+            h.remove(str(i))
+        assert h.size < 4096
+        assert sorted(h.get_keys()) == sorted(str(i) for i in range(290, 300))
+
+    def test_invalid_threshold(self):
+        with pytest.raises(ValueError):
+            HashTableSeparateChaining(8, growth_factor=10, shrink_threshold=0.1)
+
+    def test_occupancy_during_incremental_resize(self):
+        h = HashTableSeparateChaining(8, incremental_resize=True, rehash_step=1)
+        for i in range(7):
+            h.set(i, i)
+        assert h._rehash_source is not None
+        occupancy = h.occupancy()
+        assert occupancy["live_entries"] == 7
+        assert occupancy["slots"] == h.size + h._rehash_source.size
+
+
+class Test_Typed_Mode:
+    @pytest.mark.parametrize(
+        "options",
+        [{}, {"robin_hood": True}, {"probing": "quadratic"}, {"probing": "double"}],
+    )
+    def test_native_keys_and_values(self, options):
+        h = HashTableLinearProbe(8, typed=True, **options)
+        keys = [1, (1, 2), b"1", "1", 2.5, frozenset({1})]
+        for i, key in enumerate(keys):
+            h.set(key, [i])
+        for i, key in enumerate(keys):
+            assert h.get(key)[0] == [i]
+        # the int 1 and the string "1" are different keys
+        assert len(h.get_keys()) == len(keys)
+        assert h.remove((1, 2)) == [1]
+        assert h.get_many([(1, 2), b"1"]) == [None, [2]]
+
+    def test_none_values(self):
+        h = HashTableLinearProbe(8, typed=True)
+        h.set("a", None)
+        h.set("b", 0)
+        assert h.get("a")[0] is None
+        assert sorted(zip(h.get_keys(), h.get_values())) == [("a", None), ("b", 0)]
+
+    def test_hashes_are_cached(self):
+        """
+        Resizes move entries by their cached hash, keys are never hashed again
+        """
+        calls = []
+
+        def counting_hash(key):
+            calls.append(key)
+            return hash(key)
+
+        h = HashTableLinearProbe(4, hash_function=counting_hash, typed=True)
+        for i in range(500):
+            h.set(i, i)
+        assert len(calls) == 500
+        assert all(h.hashes[i] == hash(key) for i, key in enumerate(h.keys) if key is not None)
+
+    def test_equal_hashes_compared_by_equality(self):
+        h = HashTableLinearProbe(8, hash_function=lambda key: 0, typed=True)
+        for i in range(5):
+            h.set((i,), i)
+        h.remove((2,))
+        assert h.get((4,))[0] == 4
+        assert h.get((2,)) is None
+
+    @pytest.mark.parametrize("incremental_resize", [False, True])
+    def test_growth_and_churn(self, incremental_resize):
+        h = HashTableLinearProbe(
+            8, growth_factor=2, incremental_resize=incremental_resize, typed=True
+        )
+        rng = random.Random(3)
+        reference = {}
+        for n in range(3000):
+            key = (rng.randrange(300), b"k")
+            if n % 3 == 0:
+                h._remove_entry(key)
+                reference.pop(key, None)
+            else:
+                h.set(key, n)
+                reference[key] = n
+        assert dict(zip(h.get_keys(), h.get_values())) == reference
+
+
+class Test_Cuckoo:
+    def test_set_get_remove(self):
+        h = HashTableCuckoo(10, seed=0)
+        h.set("apple", "big")
+        h.set("apple", "small")
+        h.set(55, (1, 2))
+        assert h.get("apple")[0] == "small"
+        assert h.get(55)[0] == (1, 2)
+        assert h.remove("apple") == "small"
+        assert h.get("apple") is None
+        assert h.remove("apple") is None
+        assert h.occupancy()["live_entries"] == 1
+
+    @pytest.mark.parametrize("ways", [2, 3, 4])
+    def test_growth(self, ways):
+        h = HashTableCuckoo(8, ways=ways, max_capacity=0.4 + 0.15 * ways, seed=ways)
+        for i in range(5000):
+            h.set(i, str(i))
+        assert all(h.get(i)[0] == str(i) for i in range(5000))
+        assert len(h.get_keys()) == 5000
+        assert h.occupancy()["load_factor"] < h.max_capacity
+
+    def test_lookup_inspects_bounded_slots(self):
+        h = HashTableCuckoo(64, ways=3, seed=0)
+        for i in range(20):
+            h.set(i, i)
+        for i in range(20):
+            value, slot = h.get(i)
+            assert slot in h._slots(i) or slot >= h.size
+
+    def test_stash(self):
+        """
+        Keys with the same hash share their candidate slots, the stash takes the rest
+        """
+        h = HashTableCuckoo(64, hash_function=lambda key: 7, seed=0)
+        for i in range(6):
+            h.set(i, i)
+        assert len(h.stash_keys) == 4
+        assert all(h.get(i)[0] == i for i in range(6))
+        # removing a key from the sub-tables moves a stash entry into its slot
+        h.remove(h.keys[h._slots(0)[0]])
+        assert len(h.stash_keys) == 3
+        assert len(h.get_keys()) == 5
+        h.remove(h.stash_keys[0])
+        assert len(h.get_keys()) == 4
+
+    def test_unplaceable_keys(self):
+        h = HashTableCuckoo(64, hash_function=lambda key: 7, seed=0)
+        with pytest.raises(RuntimeError):
+            for i in range(7):
+                h.set(i, i)
+
+    def test_churn(self):
+        h = HashTableCuckoo(8, seed=5)
+        rng = random.Random(5)
+        reference = {}
+        for n in range(5000):
+            key = rng.randrange(500)
+            if n % 3 == 0:
+                if h._find(key) is not None:
+                    assert h.remove(key) == reference.pop(key)
+            else:
+                h.set(key, n)
+                reference[key] = n
+        assert dict(zip(h.get_keys(), h.get_values())) == reference
+        assert h.count == len(reference)
+
+    def test_invalid_ways(self):
+        with pytest.raises(ValueError):
+            HashTableCuckoo(8, ways=1)
+
+
+@requires_numpy
+class Test_Swiss:
+    def test_set_get_remove(self):
+        h = HashTableSwiss(16)
+        h.set("apple", "big")
+        h.set("apple", "small")
+        h.set((5, 5), None)
+        assert h.get("apple")[0] == "small"
+        assert h.get((5, 5))[0] is None
+        assert h.remove("apple") == "small"
+        assert h.get("apple") is None
+        assert h.remove("apple") is None
+        assert h.get_keys() == [(5, 5)]
+
+    def test_control_bytes(self):
+        h = HashTableSwiss(16)
+        h.set("a", 1)
+        i = h.get("a")[1]
+        assert h.ctrl[i] == h._hash("a") & 0x7F
+        # the group still has EMPTY slots, so the slot becomes EMPTY again
+        h.remove("a")
+        assert h.ctrl[i] == EMPTY
+        assert h.tombstones == 0
+
+    def test_tombstones_in_full_group(self):
+        """
+        Keys with the same hash fill a group and continue in the next one
+        """
+        h = HashTableSwiss(64, hash_function=lambda key: 0)
+        for i in range(20):
+            h.set(i, i)
+        h.remove(3)
+        assert h.ctrl[h.keys.index(4) - 1] == DELETED
+        assert h.get(19)[0] == 19
+        h.set(3, "back")
+        assert h.tombstones == 0
+        assert h.get(3)[0] == "back"
+
+    def test_growth_and_churn(self):
+        h = HashTableSwiss(16)
+        rng = random.Random(7)
+        reference = {}
+        for n in range(20000):
+            key = rng.randrange(2000)
+            if n % 3 == 0:
+                if key in reference:
+                    assert h.remove(key) == reference.pop(key)
+            else:
+                h.set(key, n)
+                reference[key] = n
+        assert dict(zip(h.get_keys(), h.get_values())) == reference
+        assert h.count == len(reference)
+        assert h.size - h.empty_slots < h.max_capacity * h.size
+
+    def test_miss_compares_few_keys(self):
+        compared = []
+
+        class Key(str):
+            def __eq__(self, other):
+                compared.append(self)
+                return str.__eq__(self, other)
+
+            __hash__ = str.__hash__
+
+        h = HashTableSwiss(1024)
+        for i in range(800):
+            h.set(Key(i), i)
+        for i in range(800, 1800):
+            h._find(h._hash(Key(i)), Key(i))
+        assert len(compared) < 20
+
+
+def _key(i):
+    return i.to_bytes(8, "little")
+
+
+class Test_Mmap:
+    def test_set_get_remove(self, tmp_path):
+        with HashTableMmap(str(tmp_path / "t"), key_size=8, size=16) as h:
+            h.set(_key(1), b"one")
+            h.set(_key(2), b"two")
+            assert h.get(_key(1))[0] == b"one"
+            assert h.remove(_key(1)) == b"one"
+            assert h.get(_key(1)) is None
+            assert h.remove(_key(1)) is None
+            assert h.get_keys() == [_key(2)]
+            assert h.occupancy()["tombstones"] == 1
+
+    def test_update_in_place_and_appended(self, tmp_path):
+        with HashTableMmap(str(tmp_path / "t"), key_size=8, size=16) as h:
+            h.set(_key(1), b"long value")
+            heap_bytes = h.occupancy()["heap_bytes"]
+            h.set(_key(1), b"short")
+            assert h.occupancy()["heap_bytes"] == heap_bytes
+            assert h.get(_key(1))[0] == b"short"
+            h.set(_key(1), b"x" * 10000)
+            assert h.get(_key(1))[0] == b"x" * 10000
+
+    def test_reopen(self, tmp_path):
+        path = str(tmp_path / "t")
+        with HashTableMmap(path, key_size=8, size=4) as h:
+            for i in range(1000):
+                h.set(_key(i), str(i).encode())
+            for i in range(0, 1000, 2):
+                h.remove(_key(i))
+        with HashTableMmap(path) as h:
+            assert h.count == 500
+            assert h.key_size == 8
+            assert all(h.get(_key(i))[0] == str(i).encode() for i in range(1, 1000, 2))
+            assert h.get(_key(0)) is None
+
+    def test_churn_keeps_file_size_bounded(self, tmp_path, capsys):
+        path = str(tmp_path / "t")
+        with HashTableMmap(path, key_size=8, size=64) as h:
+            for i in range(20):
+                h.set(_key(i), b"value")
+            file_sizes = set()
+            for i in range(20, 5000):
+                h.set(_key(i), b"value")
+                h.remove(_key(i - 20))
+                file_sizes.add(os.path.getsize(path))
+            assert h.size == 64 and h.count == 20
+            assert max(file_sizes) <= 2 * min(file_sizes)
+            assert all(h.get(_key(i))[0] == b"value" for i in range(4980, 5000))
+        assert "Capacity exceeded" not in capsys.readouterr().out
+
+    def test_read_only(self, tmp_path):
+        path = str(tmp_path / "t")
+        with HashTableMmap(path, key_size=3) as h:
+            h.set("abc", b"value")
+        readers = [HashTableMmap(path, read_only=True) for _ in range(2)]
+        assert [reader.get("abc")[0] for reader in readers] == [b"value", b"value"]
+        with pytest.raises(io.UnsupportedOperation):
+            readers[0].set("abc", b"other")
+        with pytest.raises(io.UnsupportedOperation):
+            readers[0].remove("abc")
+        for reader in readers:
+            reader.close()
+
+    def test_invalid_keys_and_files(self, tmp_path):
+        path = str(tmp_path / "t")
+        with pytest.raises(ValueError):
+            HashTableMmap(path)
+        with pytest.raises(FileNotFoundError):
+            HashTableMmap(path, read_only=True)
+        with HashTableMmap(path, key_size=4) as h:
+            with pytest.raises(ValueError):
+                h.set(b"toolong", b"")
+        with pytest.raises(ValueError):
+            HashTableMmap(path, key_size=8)
+
+    def test_stable_hash(self):
+        assert stable_hash("abc") == stable_hash(b"abc")
+        # blake2b is independent of PYTHONHASHSEED
+        assert stable_hash(b"abc") == 0x5995D533D814BBD8
+
+
+class Test_Snapshot:
+    @pytest.mark.parametrize(
+        "items",
+        [
+            ["a", "b\u00e9", ""],
+            [1, -2, 3],
+            [2**63, 1],
+            [1.5, 2.0],
+            [b"ab", b"", b"\x00"],
+            ["a\x00b", 1, None, (1, 2)],
+            [True, False],
+            [],
+        ],
+    )
+    def test_columns(self, tmp_path, items):
+        path = str(tmp_path / "snapshot")
+        write_snapshot(path, {"kind": "test"}, [items, [1]])
+        header, columns = read_snapshot(path, "test")
+        assert columns == [items, [1]]
+        assert [type(item) for item in columns[0]] == [type(item) for item in items]
+        with pytest.raises(ValueError):
+            read_snapshot(path, "other")
+
+    @pytest.mark.parametrize(
+        "options",
+        [
+            {},
+            {"robin_hood": True},
+            {"probing": "quadratic"},
+            {"typed": True},
+            {"typed": True, "robin_hood": True},
+        ],
+    )
+    def test_linear_probe_round_trip(self, tmp_path, options):
+        path = str(tmp_path / "snapshot")
+        h = HashTableLinearProbe(8, growth_factor=2, **options)
+        for i in range(300):
+            h.set(str(i), i)
+        for i in range(0, 300, 7):
+            h.remove(str(i))
+        h.dump(path)
+        loaded = HashTableLinearProbe.load(path)
+        assert loaded.keys == h.keys
+        assert loaded.values == h.values
+        assert (loaded.size, loaded.empty_slots, loaded.tombstones) == (
+            h.size,
+            h.empty_slots,
+            h.tombstones,
+        )
+        assert loaded.distances == h.distances
+        assert loaded.hashes == h.hashes
+        assert loaded.get("299")[0] == h.get("299")[0]
+        loaded.set("new", "value")
+        assert loaded.get("new")[0] == "value"
+
+    def test_separate_chaining_round_trip(self, tmp_path):
+        path = str(tmp_path / "snapshot")
+        h = HashTableSeparateChaining(8, incremental_resize=True)
+        for i in range(300):
+            h.set((i, "key"), [i])
+        h.dump(path)
+        loaded = HashTableSeparateChaining.load(path)
+        assert loaded.data == h.data
+        assert (loaded.count, loaded.empty_slots) == (h.count, h.empty_slots)
+        assert loaded.get((5, "key")) == [5]
+
+    @pytest.mark.parametrize("table_class", [HashTableLinearProbe, HashTableSeparateChaining])
+    def test_load_with_other_hash_function(self, tmp_path, table_class):
+        """
+        Entries are placed again when the loading table hashes keys differently
+        """
+        path = str(tmp_path / "snapshot")
+        h = table_class(64, hash_function=SeededHash(1))
+        for i in range(40):
+            h.set(str(i), str(i))
+        h.dump(path)
+        loaded = table_class.load(path, hash_function=SeededHash(2))
+        keys = loaded.get_keys() if table_class is HashTableLinearProbe else loaded.keys()
+        assert sorted(keys) == sorted(str(i) for i in range(40))
+        assert loaded.get_many([str(i) for i in range(40)]) == [str(i) for i in range(40)]
+
+
+class Test_Iteration:
+    @pytest.mark.parametrize("table_class", [HashTableLinearProbe, HashTableSeparateChaining])
+    def test_iter_and_len(self, table_class):
+        h = table_class(8)
+        assert len(h) == 0 and list(h) == []
+        for i in range(50):
+            h.set(f"key-{i}", f"value-{i}")
+        h.remove("key-7")
+        assert len(h) == 49
+        assert sorted(h) == sorted(f"key-{i}" for i in range(50) if i != 7)
+        assert dict(h.items())["key-3"] == "value-3"
+
+    @pytest.mark.parametrize("table_class", [HashTableLinearProbe, HashTableSeparateChaining])
+    @pytest.mark.parametrize("incremental_resize", [False, True])
+    def test_modification_during_iteration_raises(self, table_class, incremental_resize):
+        h = table_class(64, incremental_resize=incremental_resize)
+        for i in range(10):
+            h.set(i, i)
+        with pytest.raises(RuntimeError):
+            for key in h:
+                h.set(f"new-{key}", key)
+        with pytest.raises(RuntimeError):
+            for key, _ in h.items():
+                h.remove(key)
+
+    @pytest.mark.parametrize("table_class", [HashTableLinearProbe, HashTableSeparateChaining])
+    def test_resize_during_iteration_raises(self, table_class):
+        h = table_class(8, incremental_resize=True, rehash_step=1)
+        iterator = iter(h)
+        h.set("first", 1)
+        with pytest.raises(RuntimeError):
+            for i in range(20):
+                h.set(i, i)
+                next(iterator)
+
+    @pytest.mark.parametrize("table_class", [HashTableLinearProbe, HashTableSeparateChaining])
+    def test_value_update_during_iteration(self, table_class):
+        h = table_class(64)
+        for i in range(10):
+            h.set(i, i)
+        for key in h:
+            h.set(key, "updated")
+        assert set(dict(h.items()).values()) == {"updated"}
+
+    @pytest.mark.parametrize("table_class", [HashTableLinearProbe, HashTableSeparateChaining])
+    def test_lookup_during_incremental_resize(self, table_class, capsys):
+        h = table_class(8, incremental_resize=True, rehash_step=1)
+        count = 0
+        while h._rehash_source is None:
+            h.set(f"key-{count}", "value")
+            count += 1
+        for key in h:
+            assert h.get(key) is not None and key in h
+        assert sorted(key for key in h if key in h) == sorted(f"key-{i}" for i in range(count))
+        assert "not" not in capsys.readouterr().out
+        # once the iteration is over lookups migrate again
+        while h._rehash_source is not None:
+            h.get("key-0")
+
+    def test_lookup_during_iteration_with_tombstones(self):
+        h = HashTableLinearProbe(64)
+        for i in range(40):
+            h.set(f"key-{i}", i)
+        for i in range(0, 40, 3):
+            h.remove(f"key-{i}")
+        for key in h:
+            assert h.get(key)[0] == key.split("-")[1]
+        assert sorted(k for k in h if k in h) == sorted(f"key-{i}" for i in range(40) if i % 3)
+        # once the iteration is over lookups move keys into earlier tombstones again
+        version = h._version
+        for i in range(40):
+            if i % 3:
+                h.get(f"key-{i}")
+        assert h._version != version
+
+
+class Test_Bloom_Filter:
+    def test_optimal_size(self):
+        # about 9.6 bits per key and 7 hashes for a 1% false positive rate
+        assert optimal_size(1000, 0.01) == (9586, 7)
+        with pytest.raises(ValueError):
+            optimal_size(1000, 1.5)
+
+    @pytest.mark.parametrize("filter_class", [BloomFilter, CountingBloomFilter])
+    def test_no_false_negatives_and_target_rate(self, filter_class):
+        bloom = filter_class(2000, error_rate=0.01)
+        for i in range(2000):
+            bloom.add(f"key-{i}")
+        assert all(f"key-{i}" in bloom for i in range(2000))
+        false_positives = sum(f"other-{i}" in bloom for i in range(20000))
+        assert false_positives / 20000 < 0.02
+        assert bloom.false_positive_rate() == pytest.approx(0.01, rel=0.1)
+
+    def test_counting_remove(self):
+        bloom = CountingBloomFilter(100)
+        for i in range(50):
+            bloom.add(i)
+        for i in range(0, 50, 2):
+            bloom.remove(i)
+        assert all(i in bloom for i in range(1, 50, 2))
+        assert sum(i in bloom for i in range(0, 50, 2)) < 3
+        assert bloom.count == 25
+
+    @pytest.mark.parametrize("bloom_filter", ["standard", "counting"])
+    @pytest.mark.parametrize(
+        "table_class, options",
+        [
+            (HashTableLinearProbe, {}),
+            (HashTableLinearProbe, {"robin_hood": True}),
+            (HashTableLinearProbe, {"incremental_resize": True, "typed": True}),
+            (HashTableSeparateChaining, {}),
+            (HashTableSeparateChaining, {"incremental_resize": True, "rehash_step": 1}),
+        ],
+    )
+    def test_tables_match_dict(self, bloom_filter, table_class, options):
+        """
+        Lookups that the filter rules out never miss a present key under insert/remove churn
+        """
+        rng = random.Random(0)
+        h = table_class(8, bloom_filter=bloom_filter, **options)
+        expected = {}
+        for _ in range(4000):
+            key = str(rng.randrange(400))
+            op = rng.random()
+            if op < 0.45:
+                h.set(key, key)
+                expected[key] = key
+            elif op < 0.7:
+                h.remove_many([key])
+                expected.pop(key, None)
+            else:
+                assert (key in h) == (key in expected)
+        assert h.get_many(list(expected)) == list(expected.values())
+        assert dict(h.items()) == expected
+
+    def test_table_skips_probing_for_misses(self):
+        h = HashTableLinearProbe(1000, bloom_filter="counting")
+        for i in range(700):
+            h.set(i, i)
+        rejected = sum(not h.bloom.contains_hash(h._full_hash(f"missing-{i}")) for i in range(1000))
+        assert rejected > 970
+        h.remove("5")
+        assert 5 not in h and not h.bloom.contains_hash(h._full_hash("5"))
+        with pytest.raises(ValueError):
+            HashTableSeparateChaining(8, bloom_filter="bits")
+
+    @pytest.mark.parametrize("table_class", [HashTableLinearProbe, HashTableSeparateChaining])
+    def test_keys_are_hashed_and_filtered_once(self, table_class, capsys):
+        hashed = []
+
+        def counting_hash(key):
+            hashed.append(key)
+            return stable_hash(key)
+
+        h = table_class(64, bloom_filter="counting", hash_function=counting_hash)
+        probes = []
+        contains_hash = h.bloom.contains_hash
+        h.bloom.contains_hash = lambda full_hash: probes.append(full_hash) or contains_hash(full_hash)
+        h.set("a", "1")
+        assert len(hashed) == 1
+        for operation, key in ((h.get, "a"), (h.get, "missing"), (h.remove, "a")):
+            hashed.clear()
+            probes.clear()
+            operation(key)
+            assert len(hashed) == 1 and len(probes) == 1
+
+    @pytest.mark.parametrize("table_class", [HashTableLinearProbe, HashTableSeparateChaining])
+    def test_rejected_misses_are_not_reported(self, table_class, capsys):
+        h = table_class(1000, bloom_filter="standard")
+        for i in range(500):
+            h.set(f"key-{i}", i)
+        capsys.readouterr()
+        missing = [f"missing-{i}" for i in range(1000)]
+        full_hash = getattr(h, "_full_hash", h.hash_function)
+        passed = sum(h.bloom.contains_hash(full_hash(key)) for key in missing)
+        for key in missing:
+            assert h.get(key) is None and h.remove(key) is None
+        assert len(capsys.readouterr().out.splitlines()) == 2 * passed < 100
+
+    @pytest.mark.parametrize("table_class", [HashTableLinearProbe, HashTableSeparateChaining])
+    def test_snapshot_rebuilds_filter(self, tmp_path, table_class):
+        path = str(tmp_path / "snapshot")
+        h = table_class(64, bloom_filter="standard")
+        for i in range(40):
+            h.set(str(i), str(i))
+        h.dump(path)
+        loaded = table_class.load(path)
+        assert loaded.bloom_filter == "standard"
+        assert all(str(i) in loaded for i in range(40))
+        assert "missing" not in loaded
+
+
+class Test_Stats:
+    @pytest.mark.parametrize("table_class", [HashTableLinearProbe, HashTableSeparateChaining])
+    def test_disabled(self, table_class):
+        h = table_class(8)
+        h.set("a", "b")
+        assert h._stats is None
+        with pytest.raises(ValueError):
+            h.stats()
+
+    @pytest.mark.parametrize(
+        "table_class, options",
+        [
+            (HashTableLinearProbe, {}),
+            (HashTableLinearProbe, {"robin_hood": True}),
+            (HashTableLinearProbe, {"incremental_resize": True}),
+            (HashTableSeparateChaining, {}),
+            (HashTableSeparateChaining, {"incremental_resize": True}),
+        ],
+    )
+    def test_operation_histograms(self, table_class, options):
+        """
+        Every set and lookup is counted once, entries moved by resizes are not
+        """
+        h = table_class(8, stats=True, **options)
+        for i in range(200):
+            h.set(str(i), str(i))
+        h.set("0", "updated")
+        for i in range(150):
+            h.get(str(i))
+        h.get_many(["missing-1", "missing-2"])
+        stats = h.stats()
+        probe_lengths = stats["probe_lengths"]
+        assert sum(probe_lengths["set"].values()) == 201
+        assert sum(probe_lengths["hit"].values()) == 150
+        assert sum(probe_lengths["miss"].values()) >= 2
+        assert stats["resizes"] >= 1 and stats["resize_seconds"] > 0
+        assert stats["max_probe_length"] == max(
+            length for histogram in probe_lengths.values() for length in histogram
+        )
+        assert stats["live_entries"] == 200
+        assert stats["max_chain"] >= 1
+
+    def test_resize_callback(self):
+        events = []
+        h = HashTableLinearProbe(8, growth_factor=2, on_resize=events.append)
+        for i in range(20):
+            h.set(str(i), str(i))
+        assert len(events) == h.stats()["resizes"] >= 2
+        assert all(event["new_size"] > event["old_size"] for event in events)
+        assert not events[0]["incremental"]
+        assert events[-1]["new_size"] == h.size
+
+        events = []
+        h = HashTableSeparateChaining(
+            8, growth_factor=2, incremental_resize=True, on_resize=events.append
+        )
+        for i in range(20):
+            h.set(i, i)
+        assert events and all(event["incremental"] for event in events)
+
+    def test_tombstones_and_in_place_rehash(self):
+        events = []
+        h = HashTableLinearProbe(64, on_resize=events.append, tombstone_ratio=0.25)
+        for i in range(40):
+            h.set(str(i), str(i))
+        for i in range(10):
+            h.remove(str(i))
+        assert h.stats()["tombstones"] == 10
+        for i in range(10, 16):
+            h.remove(str(i))
+        # tombstones reached a quarter of the slots and the table was rehashed at the same size
+        assert events[-1]["old_size"] == events[-1]["new_size"] == h.size
+        assert h.stats()["tombstones"] == 0
+
+
+def _shared_key(i):
+    return i.to_bytes(8, "little")
+
+
+def _shared_writer(table, start, stop):
+    for i in range(start, stop):
+        table.set(_shared_key(i), b"%d" % i)
+
+
+def _shared_reader(table, keys, results):
+    results.put([None if table.get(key) is None else table.get(key)[0] for key in keys])
+
+
+@pytest.fixture(scope="function")
+def shared_fixture():
+    table = HashTableSharedMemory(key_size=8, shards=4, size=32)
+    yield table
+    table.unlink()
+
+
+class Test_Shared_Memory:
+    def test_set_get_remove(self, shared_fixture):
+        h = shared_fixture
+        for i in range(200):
+            h.set(_shared_key(i), b"x" * i)
+        h.set(_shared_key(5), b"short")
+        h.set(_shared_key(6), b"a much longer value than before")
+        assert h.get(_shared_key(5))[0] == b"short"
+        assert h.get(_shared_key(6))[0] == b"a much longer value than before"
+        assert h.remove(_shared_key(7)) == b"x" * 7
+        assert h.get(_shared_key(7)) is None
+        assert len(h) == 199
+        assert sorted(h.get_keys()) == sorted(_shared_key(i) for i in range(200) if i != 7)
+        assert h.occupancy()["load_factor"] < 0.75
+        with pytest.raises(ValueError):
+            h.set(b"short", b"")
+
+    def test_heap_rebuild_reclaims_space(self):
+        with HashTableSharedMemory(key_size=8, shards=1, size=64, heap_size=4096) as h:
+            for round in range(50):
+                h.set(_shared_key(1), bytes(100 + round))
+            assert h.get(_shared_key(1))[0] == bytes(149)
+            assert h._generation(0) > 0
+
+    def test_churn_keeps_shards_bounded(self, capsys):
+        with HashTableSharedMemory(key_size=8, shards=1, size=16) as h:
+            for i in range(2000):
+                h.set(_shared_key(i), b"value")
+                h.remove(_shared_key(i))
+            occupancy = h.occupancy()
+            assert occupancy["slots"] == 16 and occupancy["live_entries"] == 0
+            assert h.get(_shared_key(1999)) is None
+        assert "Capacity exceeded" not in capsys.readouterr().out
+
+    def test_update_in_place_with_full_heap(self):
+        with HashTableSharedMemory(key_size=8, shards=1, size=64, heap_size=4096) as h:
+            h.set(_shared_key(1), bytes(100))
+            buf = h._block(0).buf
+            h.set(_shared_key(2), bytes(len(buf) - h._counters(buf)[3]))
+            h.set(_shared_key(1), b"fits in the old value")
+            assert h._generation(0) == 0
+            assert h.get(_shared_key(1))[0] == b"fits in the old value"
+
+    def test_concurrent_creation_restores_tracker(self):
+        register, unregister = resource_tracker.register, resource_tracker.unregister
+
+        def create_tables():
+            for _ in range(5):
+                HashTableSharedMemory(key_size=8, shards=2, size=8).unlink()
+
+        threads = [threading.Thread(target=create_tables) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert (resource_tracker.register, resource_tracker.unregister) == (register, unregister)
+
+    def test_other_processes_read_and_write(self, shared_fixture):
+        """
+        Writers in child processes grow shards into new blocks, and readers
+        in other processes and in this one follow them to the new generations
+        """
+        h = shared_fixture
+        writers = [
+            multiprocessing.Process(target=_shared_writer, args=(h, start, start + 150))
+            for start in (0, 150)
+        ]
+        for process in writers:
+            process.start()
+        for process in writers:
+            process.join()
+        assert all(process.exitcode == 0 for process in writers)
+        assert len(h) == 300
+        assert any(h._generation(shard) > 0 for shard in range(h.shards))
+
+        results = multiprocessing.Queue()
+        keys = [_shared_key(i) for i in (0, 149, 299, 300)]
+        reader = multiprocessing.Process(target=_shared_reader, args=(h, keys, results))
+        reader.start()
+        assert results.get(timeout=30) == [b"0", b"149", b"299", None]
+        reader.join()
+        assert h.get(_shared_key(42))[0] == b"42"
+
+
+class Test_HyperLogLog:
+    @pytest.mark.parametrize("n", [50, 3000, 100_000])
+    def test_estimate_error(self, n):
+        sketch = HyperLogLog(precision=14)
+        sketch.add_many(f"user-{i}" for i in range(n))
+        # four standard errors of 0.81%
+        assert abs(sketch.estimate() / n - 1) < 0.033
+
+    def test_duplicates_and_single_adds(self):
+        sketch = HyperLogLog(precision=10)
+        for _ in range(3):
+            for i in range(200):
+                sketch.add(i)
+        assert abs(len(sketch) - 200) <= 10
+
+    def test_sparse_to_dense(self):
+        sketch = HyperLogLog(precision=12)
+        sketch.add_many(range(20))
+        assert sketch.is_sparse()
+        assert sketch.memory_bytes() < 4096
+        estimate = sketch.estimate()
+        sketch._to_dense()
+        assert not sketch.is_sparse() and sketch.estimate() == estimate
+        sketch = HyperLogLog(precision=12)
+        sketch.add_many(range(5000))
+        assert not sketch.is_sparse() and sketch.memory_bytes() == 4096
+
+    @pytest.mark.parametrize("sizes", [(30, 40), (30, 20_000), (20_000, 30_000)])
+    def test_merge_is_union(self, sizes):
+        first, second, union = HyperLogLog(), HyperLogLog(), HyperLogLog()
+        first.add_many(range(sizes[0]))
+        second.add_many(range(sizes[0] // 2, sizes[0] // 2 + sizes[1]))
+        union.add_many(range(sizes[0] // 2 + sizes[1]))
+        merged = first.copy().merge(second)
+        assert merged.estimate() == pytest.approx(union.estimate())
+        assert first.estimate() == pytest.approx(HyperLogLog().merge(first).estimate())
+
+    def test_invalid(self):
+        with pytest.raises(ValueError):
+            HyperLogLog(precision=2)
+        with pytest.raises(ValueError):
+            HyperLogLog(precision=10).merge(HyperLogLog(precision=11))
+        with pytest.raises(ValueError):
+            HyperLogLog(hash_function=default_hash).merge(HyperLogLog())
+
+
+class Test_Perfect_Hash:
+    @pytest.mark.parametrize("n", [0, 1, 2, 3, 7, 100, 5000])
+    @pytest.mark.parametrize("bucket_size", [1, 2, 5])
+    def test_every_key_has_its_own_slot(self, n, bucket_size):
+        h = HashTablePerfect(((f"key-{i}", i) for i in range(n)), bucket_size=bucket_size)
+        assert len(h) == n and len(h.keys) == n
+        assert sorted(h.get(f"key-{i}")[1] for i in range(n)) == list(range(n))
+        assert all(h.get(f"key-{i}")[0] == i for i in range(n))
+        assert len(h.displacements) == max(-(-n // bucket_size), 1)
+
+    def test_misses_and_native_keys(self, capsys):
+        h = HashTablePerfect.from_iterable([(1, "a"), ((2, 3), "b"), (b"c", "c"), (1, "d")])
+        assert h.get(1) == ("d", h.keys.index(1))
+        assert (2, 3) in h and "1" not in h and b"x" not in h
+        assert sorted(h.get_values()) == ["b", "c", "d"]
+        assert dict(h.items()) == {1: "d", (2, 3): "b", b"c": "c"}
+        assert h.get("missing") is None
+        assert capsys.readouterr().out == "Key is not present in Hash Table\n"
+        assert HashTablePerfect().get("missing") is None
+
+    def test_invalid(self):
+        # keys with equal hashes always share a bucket and a position
+        with pytest.raises(ValueError):
+            HashTablePerfect([("a", 1), ("b", 2)], hash_function=lambda key: 0)
+        with pytest.raises(ValueError):
+            HashTablePerfect(bucket_size=0)
+
+    def test_dump_load(self, tmp_path):
+        path = str(tmp_path / "perfect")
+        h = HashTablePerfect((f"key-{i}", i) for i in range(1000))
+        h.dump(path)
+        loaded = HashTablePerfect.load(path)
+        assert loaded.keys == h.keys and loaded.values == h.values
+        assert loaded.displacements == h.displacements and loaded.seed == h.seed
+        assert all(loaded.get(f"key-{i}")[0] == i for i in range(1000))
+        rebuilt = HashTablePerfect.load(path, hash_function=SeededHash(3))
+        assert all(rebuilt.get(f"key-{i}")[0] == i for i in range(1000))
+
+
+@requires_numpy
+class Test_Count_Min_Sketch:
+    @pytest.mark.parametrize("conservative", [False, True])
+    def test_never_underestimates(self, conservative):
+        sketch = CountMinSketch(64, 4, conservative=conservative)
+        rng = random.Random(0)
+        stream = [rng.randrange(500) for _ in range(5000)]
+        for item in stream:
+            sketch.add(item)
+        counts = {item: stream.count(item) for item in set(stream)}
+        assert all(sketch.estimate(item) >= count for item, count in counts.items())
+        assert sketch.total == len(stream)
+
+    def test_conservative_update_overestimates_less(self):
+        plain, conservative = CountMinSketch(64, 4), CountMinSketch(64, 4, conservative=True)
+        for i in range(2000):
+            plain.add(i % 300)
+            conservative.add(i % 300)
+        errors = [sum(sketch.estimate(i) for i in range(300)) - 2000 for sketch in (plain, conservative)]
+        assert errors[1] < errors[0]
+
+    @pytest.mark.parametrize("conservative", [False, True])
+    def test_numpy_batch_matches_single_adds(self, conservative):
+        items = np.random.default_rng(1).integers(0, 1000, 10_000)
+        batch = CountMinSketch(256, 4, conservative=conservative)
+        batch.update_many(items)
+        single = CountMinSketch(256, 4, conservative=conservative)
+        single.update_many(items.tolist())
+        distinct, counts = np.unique(items, return_counts=True)
+        assert batch.total == single.total == 10_000
+        assert (batch.estimate_many(distinct) >= counts).all()
+        if not conservative:
+            assert np.array_equal(batch.table, single.table)
+        weighted = CountMinSketch(256, 4, conservative=conservative)
+        weighted.update_many(distinct, counts=counts)
+        assert np.array_equal(weighted.table, batch.table)
+
+    def test_weighted_counts_stay_exact(self):
+        sketch = CountMinSketch(128, 3)
+        sketch.update_many(np.array(["a", "a"]), counts=[2**53, 1])
+        assert sketch.estimate("a") == 2**53 + 1
+
+    def test_merge(self):
+        first, second, both = CountMinSketch(128, 3), CountMinSketch(128, 3), CountMinSketch(128, 3)
+        first.update_many(["a"] * 5 + ["b"])
+        second.update_many(["a"] * 2 + ["c"] * 3)
+        both.update_many(["a"] * 7 + ["b"] + ["c"] * 3)
+        merged = first.copy().merge(second)
+        assert np.array_equal(merged.table, both.table) and merged.total == 11
+        assert first.estimate("a") == 5
+
+    def test_invalid(self):
+        assert optimal_dimensions(0.001, 0.01) == (2719, 5)
+        with pytest.raises(ValueError):
+            optimal_dimensions(0, 0.01)
+        with pytest.raises(ValueError):
+            CountMinSketch(128, 3).merge(CountMinSketch(64, 3))
+        with pytest.raises(ValueError):
+            CountMinSketch(hash_function=default_hash).merge(CountMinSketch())
+        with pytest.raises(ValueError):
+            CountMinSketch().add("a", -1)
+
+
+@requires_numpy
+class Test_Heavy_Hitters:
+    def test_top_k_of_zipf_stream(self):
+        stream = np.random.default_rng(0).zipf(1.3, 50_000) % 5000
+        distinct, counts = np.unique(stream, return_counts=True)
+        expected = distinct[np.argsort(-counts, kind="stable")][:5].tolist()
+        for batch in (False, True):
+            hitters = HeavyHitters(5, width=512, depth=4)
+            hitters.update_many(stream if batch else stream.tolist())
+            top = hitters.top()
+            assert [item for item, _ in top] == expected
+            assert len(hitters) == 5 and hitters.heap.size == len(hitters.entries)
+            assert [estimate for _, estimate in top] == sorted(
+                (estimate for _, estimate in top), reverse=True
+            )
+
+    def test_eviction_and_updates(self):
+        hitters = HeavyHitters(2)
+        hitters.add("a", 3)
+        hitters.add("b", 1)
+        hitters.add("c", 2)
+        assert "b" not in hitters and hitters.top() == [("a", 3), ("c", 2)]
+        hitters.add("c", 5)
+        assert hitters.top(1) == [("c", 7)]
+
+    def test_merge_workers(self):
+        stream = np.random.default_rng(2).zipf(1.5, 20_000) % 1000
+        workers = [HeavyHitters(3, width=512, depth=4) for _ in range(4)]
+        for worker, part in zip(workers, np.array_split(stream, 4)):
+            worker.update_many(part)
+        merged = workers[0]
+        for worker in workers[1:]:
+            merged.merge(worker)
+        single = HeavyHitters(3, width=512, depth=4)
+        single.update_many(stream)
+        assert merged.top() == single.top()
+
+
+@requires_numpy
+class Test_Int_Hash_Map:
+    def test_single_operations(self, capsys):
+        h = IntHashMap(4)
+        for i in range(100):
+            h.set(i * 7919, i)
+        assert len(h) == 100 and h.size > 100
+        assert h.get(7919)[0] == 1 and h.add(7919, 5) == 6 and h.add(-3) == 1
+        assert h.remove(7919) == 6 and 7919 not in h and -3 in h
+        assert all(h.get(i * 7919)[0] == i for i in range(2, 100))
+        assert h.get(INT_EMPTY) is None and h.remove(12345) is None
+        assert capsys.readouterr().out == "Key is not present in Hash Table\n" * 2
+
+    def test_removal_keeps_clusters_reachable(self):
+        # a full small table has long clusters that wrap around the end of the arrays
+        h = IntHashMap(64, max_capacity=0.95)
+        keys = list(range(-30, 30))
+        for key in keys:
+            h.set(key, key)
+        for key in keys[::3]:
+            h.remove(key)
+        remaining = [key for key in keys if key not in keys[::3]]
+        assert all(h.get(key)[0] == key for key in remaining)
+        assert len(h) == len(remaining) == (h.keys != INT_EMPTY).sum()
+
+    def test_batches_match_dict(self):
+        rng = np.random.default_rng(0)
+        h, expected = IntHashMap(), {}
+        for _ in range(40):
+            keys = rng.integers(-200, 200, rng.integers(0, 300)) * 10**15
+            values = rng.integers(-1000, 1000, len(keys))
+            operation = rng.integers(0, 3)
+            if operation == 0:
+                h.set_many(keys, values)
+                expected.update(zip(keys.tolist(), values.tolist()))
+            elif operation == 1:
+                h.add_many(keys, values)
+                for key, value in zip(keys.tolist(), values.tolist()):
+                    expected[key] = expected.get(key, 0) + value
+            else:
+                removed = set(keys.tolist()) & set(expected)
+                assert h.remove_many(keys) == len(removed)
+                for key in removed:
+                    del expected[key]
+            assert len(h) == len(expected) and dict(h.items()) == expected
+        queries = np.array(list(expected) + [1, 2, INT_EMPTY], dtype=np.int64)
+        assert h.get_many(queries, default=-1).tolist() == list(expected.values()) + [-1] * 3
+        assert h.contains_many(queries).tolist() == [True] * len(expected) + [False] * 3
+
+    def test_add_many_counts_and_memory(self):
+        events = np.random.default_rng(1).integers(0, 5000, 100_000)
+        h = IntHashMap()
+        h.add_many(events)
+        distinct, counts = np.unique(events, return_counts=True)
+        assert np.array_equal(h.get_many(distinct), counts)
+        sized = IntHashMap.from_arrays(distinct, counts)
+        assert sized.occupancy()["bytes_per_entry"] <= 24
+        assert dict(sized.items()) == dict(h.items())
+        h.add_many(distinct[:10], 2)
+        assert h.get(int(distinct[0]))[0] == counts[0] + 2
+
+    def test_invalid(self):
+        h = IntHashMap()
+        with pytest.raises(ValueError):
+            h.set(INT_EMPTY, 1)
+        with pytest.raises(ValueError):
+            h.add_many([1, INT_EMPTY])
+        with pytest.raises(TypeError):
+            h.set("1", 1)
+        with pytest.raises(TypeError):
+            h.set_many([1.5], [1])
+        with pytest.raises(ValueError):
+            IntHashMap(growth_factor=1)
+
+    def test_out_of_range_keys(self):
+        with pytest.raises(ValueError):
+            IntHashMap.from_arrays(np.array([2**63], dtype=np.uint64), [1])
+        h = IntHashMap()
+        with pytest.raises(ValueError):
+            h.set_many([2**64], [1])
+        with pytest.raises(ValueError):
+            h.set(2**63, 1)
+        assert len(h) == 0
+        h.set_many(np.array([2**63 - 1], dtype=np.uint64), [1])
+        assert h.get(2**63 - 1)[0] == 1
+
+    def test_non_integral_values(self):
+        h = IntHashMap()
+        for bad in (lambda: h.set(1, 1.5), lambda: h.add(1, 0.5), lambda: h.set_many([1], 1.5),
+                    lambda: h.add_many([1], 1.5), lambda: h.set_many([1], [1.5])):
+            with pytest.raises(TypeError):
+                bad()
+        with pytest.raises(ValueError):
+            h.set(1, 2**63)
+        assert len(h) == 0
+
+
+class Test_Frequency_Counter:
+    def test_counts_without_output(self, capsys):
+        rng = random.Random(0)
+        tokens = [f"token-{int(rng.paretovariate(1.0))}" for _ in range(5000)]
+        counter = FrequencyCounter(tokens)
+        expected = collections.Counter(tokens)
+        assert dict(counter.items()) == dict(expected)
+        assert len(counter) == len(expected) and counter.total == 5000
+        assert counter["missing"] == 0 and "missing" not in counter
+        assert counter.add("token-1", 3) == expected["token-1"] + 3
+        assert capsys.readouterr().out == ""
+
+    @requires_numpy
+    @pytest.mark.parametrize("dtype", ["int64", "str"])
+    def test_numpy_fast_path(self, dtype):
+        array = (np.random.default_rng(1).zipf(1.5, 10_000) % 300).astype(dtype)
+        counter = FrequencyCounter(array)
+        assert dict(counter.items()) == dict(collections.Counter(array.tolist()))
+        assert counter.total == 10_000
+
+    def test_most_common(self):
+        counter = FrequencyCounter("abracadabra")
+        assert counter.most_common(1) == [("a", 5)]
+        counts = [count for _, count in counter.most_common()]
+        assert counts == [5, 2, 2, 1, 1]
+        assert counter.most_common(0) == [] and len(counter.most_common(10)) == 5
+        # equal counts keep the order in which the table yields the items
+        order = [item for item, _ in counter.items()]
+        tied = [item for item, count in counter.most_common() if count == 2]
+        assert tied == [item for item in order if counter[item] == 2]
+
+    def test_merge_and_remove(self):
+        words = [f"w{i % 37}" for i in range(1000)]
+        workers = [FrequencyCounter(words[i::4]) for i in range(4)]
+        merged = FrequencyCounter()
+        for worker in workers:
+            merged.merge(worker)
+        single = FrequencyCounter(words)
+        assert dict(merged.items()) == dict(single.items()) and merged.total == 1000
+        merged.update({"w0": 2, "new": 1})
+        assert merged["w0"] == single["w0"] + 2 and merged["new"] == 1
+        assert merged.remove("new") == 1 and merged.remove("new") is None
+        assert merged.total == 1002